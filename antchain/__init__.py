@@ -22,9 +22,17 @@
 - MIN: 获取最小值
 - SUM: 计算总和
 - AVG: 计算平均值
-- UNIQUE: 获取唯一值列表
-- SORT: 排序
+- AGG: 一次遍历同时计算多个字段的count、sum、min、max、avg等聚合
+- GROUP: 按分组键计算聚合，每个分组键只保存累加器
+- UNIQUE: 获取唯一值列表，保持首次出现的顺序，如UNIQUE("id")
+- SORT: 排序，如SORT("score", reverse=True)
+- TOPK: 使用堆取前n条数据，如TOPK(100, "score")
 - REVERSE: 反转
+- DISTINCT: 使用HyperLogLog近似去重计数
+- QUANTILES: 使用KLL近似计算分位数，如QUANTILES((0.5, 0.99), "latency")
+- HEAVY_HITTERS: 使用Count-Min近似计算出现次数最多的值
+- BATCH: 将字典数据转换为列式的Batch（antchain.columnar），数值列为NumPy数组
+- ROWS: 将Batch转换回字典数据
 
 使用示例：
     from antchain import DATA, Start
@@ -67,6 +75,17 @@ from .stream import (
     MIN,
     SUM,
     AVG,
+    AGG,
+    GROUP,
+    UNIQUE,
+    SORT,
+    TOPK,
+    REVERSE,
+    DISTINCT,
+    QUANTILES,
+    HEAVY_HITTERS,
+    BATCH,
+    ROWS,
 )
 
 __all__ = [
@@ -84,6 +103,17 @@ __all__ = [
     "MIN",
     "SUM",
     "AVG",
+    "AGG",
+    "GROUP",
+    "UNIQUE",
+    "SORT",
+    "TOPK",
+    "REVERSE",
+    "DISTINCT",
+    "QUANTILES",
+    "HEAVY_HITTERS",
+    "BATCH",
+    "ROWS",
 ]
 __version__ = "0.0.7"
 __author__ = "tumingjian@foxmail.com"
@@ -0,0 +1,526 @@
+"""
+Aggregate模块
+
+该模块包含收集器AGG和GROUP使用的聚合组件。
+
+AGG和GROUP的关键字参数是聚合名称到字段的映射：
+
+    AGG(count=True, sum="amount", avg={"amount": "amount", "qty": "qty"})
+    GROUP("city", count=True, max="amount", reduce=(lambda a, b: a | b, "tags", 0))
+
+字段可以是字段名（按row[字段名]取值）、键函数，或者True（数据本身）；reduce的字段为
+(归约函数, 字段)或(归约函数, 字段, 初始值)，与functools.reduce的参数顺序一致。
+AggregatePlan把这些参数整理为按字段去重的累加器方案，同一个字段上的多个聚合共用一个累加器。
+
+数据按块（AGG_CHUNK_SIZE或GROUP_CHUNK_SIZE条）从上游读取，块内使用内置的min、max、sum，每条数据只被读取一次。
+GROUP先把一个块按分组键拆开，再把各组的部分聚合合并到该键的累加器中，
+因此内存占用只与不同键的数量有关，与数据条数无关。
+输入为Batch时按列计算：数值列使用NumPy的reduceat一次得到所有分组的总和、最小值和最大值。
+"""
+
+from functools import reduce
+from itertools import accumulate, islice
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+from .columnar import Batch, numeric_column, numpy, to_list
+from .exceptions import ValidationError
+
+# 支持的聚合
+AGGREGATES = ("count", "sum", "min", "max", "avg", "first", "last", "reduce")
+# AGG每次从上游读取的数据条数
+AGG_CHUNK_SIZE = 1024
+# GROUP每次从上游读取的数据条数，块越大同一个键在块内的数据越多
+GROUP_CHUNK_SIZE = 8192
+# 没有初始值的归约
+_NO_VALUE = object()
+
+
+class _Field:
+    """
+    一个字段的取值方式以及需要累计的内容
+    """
+
+    __slots__ = ("getter", "tracked", "ranged", "summed", "reducers")
+
+    def __init__(self, getter: Optional[Callable[[Any], Any]]) -> None:
+        self.getter = getter
+        # 是否有count以外的聚合
+        self.tracked = False
+        self.ranged = False
+        self.summed = False
+        self.reducers: List[Tuple[Callable[[Any, Any], Any], Any]] = []
+
+
+# 累加器中每个字段依次保存: 非None数量、总和、最小值、最大值、第一个值、最后一个值、各个归约值
+_COUNT, _TOTAL, _LOW, _HIGH, _FIRST, _LAST, _REDUCED = range(7)
+
+
+class AggregatePlan:
+    """
+    AGG和GROUP的聚合方案
+
+    累加器是一个扁平的列表，第0项为数据条数，之后按字段依次保存该字段的中间状态，
+    GROUP为每个分组键复制一份累加器模板，不为每个键创建额外的对象。
+
+    Attributes:
+        aggregates (Dict[str, Any]): 聚合名称到字段的映射
+    """
+
+    __slots__ = ("aggregates", "_fields", "_columns", "_outputs", "_template")
+
+    def __init__(self, aggregates: Dict[str, Any]) -> None:
+        """
+        校验聚合并按字段整理累加器
+
+        Args:
+            aggregates (Dict[str, Any]): 聚合名称到字段的映射，字段也可以是{结果名: 字段}的字典
+
+        Raises:
+            ValidationError: 当聚合名称或字段不合法时
+        """
+        if not aggregates:
+            raise ValidationError("至少需要一个聚合")
+        self.aggregates = aggregates
+        fields: List[_Field] = []
+        # (聚合名称, 结果名, 字段序号, 归约序号)，结果名为None时结果不是字典
+        outputs: List[Tuple[str, Any, int, int]] = []
+        indexes: Dict[Any, int] = dict()
+        for name, spec in aggregates.items():
+            if name not in AGGREGATES:
+                raise ValidationError(
+                    f"不支持的聚合: {name}，可用的聚合为: {', '.join(AGGREGATES)}"
+                )
+            if isinstance(spec, dict) and not spec:
+                raise ValidationError(f"{name}的字段字典不能为空")
+            items = spec.items() if isinstance(spec, dict) else [(None, spec)]
+            for alias, field in items:
+                func, initial = None, _NO_VALUE
+                if name == "reduce":
+                    func, field, initial = _reducer(field)
+                key = _field_key(name, field)
+                if key not in indexes:
+                    getter = itemgetter(key) if isinstance(key, str) else key
+                    indexes[key] = len(fields)
+                    fields.append(_Field(getter))
+                target = fields[indexes[key]]
+                reducer = 0
+                target.tracked = target.tracked or name != "count"
+                if name in ("min", "max"):
+                    target.ranged = True
+                elif name in ("sum", "avg"):
+                    target.summed = True
+                elif func is not None:
+                    reducer = len(target.reducers)
+                    target.reducers.append((func, initial))
+                outputs.append((name, alias, indexes[key], reducer))
+        # 计算每个字段在累加器中的位置
+        self._template: List[Any] = [0]
+        self._fields: List[Tuple[Any, ...]] = []
+        # 与_fields对应的字段名，按列计算Batch时使用
+        self._columns: List[Any] = []
+        offsets = []
+        for key, field in zip(indexes, fields):
+            offset = len(self._template)
+            offsets.append(offset)
+            if field.getter is None and not field.tracked:
+                # count=True直接使用第0项的数据条数
+                continue
+            self._template.extend([0, 0, None, None, None, None])
+            self._template.extend(initial for _, initial in field.reducers)
+            funcs = tuple(func for func, _ in field.reducers)
+            self._fields.append(
+                (field.getter, offset, field.ranged, field.summed, funcs)
+            )
+            self._columns.append(key)
+        # (聚合名称, 结果名, 位置)，count=True的位置为0，avg的位置为字段的起始位置
+        self._outputs: List[Tuple[str, Any, int]] = []
+        slots = {"sum": _TOTAL, "min": _LOW, "max": _HIGH, "first": _FIRST}
+        slots.update({"last": _LAST, "count": _COUNT, "avg": _COUNT})
+        for name, alias, index, reducer in outputs:
+            if name == "count" and fields[index].getter is None:
+                slot = 0
+            elif name == "reduce":
+                slot = offsets[index] + _REDUCED + reducer
+            else:
+                slot = offsets[index] + slots[name]
+            self._outputs.append((name, alias, slot))
+
+    def accumulator(self) -> List[Any]:
+        """
+        创建新的累加器
+
+        Returns:
+            List[Any]: 累加器
+        """
+        return self._template.copy()
+
+    def update(self, state: List[Any], rows: List[Any]) -> None:
+        """
+        把一块数据累计到累加器中
+
+        Args:
+            state (List[Any]): accumulator()创建的累加器
+            rows (List[Any]): 数据块
+        """
+        state[0] += len(rows)
+        for getter, o, ranged, summed, reducers in self._fields:
+            values = rows if getter is None else list(map(getter, rows))
+            self._update_field(state, o, ranged, summed, reducers, values)
+
+    def _update_field(
+        self,
+        state: List[Any],
+        o: int,
+        ranged: bool,
+        summed: bool,
+        reducers: Tuple[Callable[[Any, Any], Any], ...],
+        values: List[Any],
+    ) -> None:
+        if None in values:
+            values = [value for value in values if value is not None]
+        if not values:
+            return
+        if ranged:
+            low, high = min(values), max(values)
+            if state[o] == 0 or low < state[o + _LOW]:
+                state[o + _LOW] = low
+            if state[o] == 0 or high > state[o + _HIGH]:
+                state[o + _HIGH] = high
+        if summed:
+            state[o + _TOTAL] += sum(values)
+        for index, func in enumerate(reducers, o + _REDUCED):
+            reduced = state[index]
+            if reduced is _NO_VALUE:
+                state[index] = reduce(func, values)
+            else:
+                state[index] = reduce(func, values, reduced)
+        if state[o] == 0:
+            state[o + _FIRST] = values[0]
+        state[o + _LAST] = values[-1]
+        state[o] += len(values)
+
+    def update_one(self, state: List[Any], row: Any) -> None:
+        """
+        把一条数据累计到累加器中，用于分组后只有一条数据的情况
+
+        Args:
+            state (List[Any]): accumulator()创建的累加器
+            row (Any): 数据
+        """
+        state[0] += 1
+        for getter, o, ranged, summed, reducers in self._fields:
+            value = row if getter is None else getter(row)
+            if value is None:
+                continue
+            if state[o] == 0:
+                state[o + _LOW] = state[o + _HIGH] = state[o + _FIRST] = value
+            elif ranged:
+                if value < state[o + _LOW]:
+                    state[o + _LOW] = value
+                elif value > state[o + _HIGH]:
+                    state[o + _HIGH] = value
+            if summed:
+                state[o + _TOTAL] += value
+            for index, func in enumerate(reducers, o + _REDUCED):
+                reduced = state[index]
+                state[index] = value if reduced is _NO_VALUE else func(reduced, value)
+            state[o + _LAST] = value
+            state[o] += 1
+
+    def update_batch(
+        self, states: List[List[Any]], batch: Batch, codes: Optional[List[int]] = None
+    ) -> None:
+        """
+        把Batch按列累计到各个分组的累加器中
+
+        字段名对应的列直接使用，数值列一次计算所有分组的聚合；键函数和True按行取值。
+
+        Args:
+            states (List[List[Any]]): 各个分组的累加器
+            batch (Batch): 数据
+            codes (List[int] | None): 每条数据所在分组在states中的序号，
+                默认为None即全部数据都属于states[0]
+        """
+        order, bounds = _segments(codes, len(states), len(batch))
+        for state, (start, end) in zip(states, bounds):
+            state[0] += end - start
+        rows = None
+        for column, field in zip(self._columns, self._fields):
+            getter, o, ranged, summed, reducers = field
+            if isinstance(column, str) and column in batch:
+                values = batch[column]
+            else:
+                if rows is None:
+                    rows = batch.to_rows()
+                values = rows if getter is None else list(map(getter, rows))
+            if numeric_column(values):
+                if order is not None:
+                    values = values[order]
+                self._update_array(states, field, values, bounds)
+                continue
+            values = to_list(values)
+            for state, (start, end) in zip(states, bounds):
+                if order is None:
+                    part = values[start:end]
+                else:
+                    part = [values[i] for i in order[start:end]]
+                self._update_field(state, o, ranged, summed, reducers, part)
+
+    def _update_array(
+        self,
+        states: List[List[Any]],
+        field: Tuple[Any, ...],
+        values: Any,
+        bounds: List[Tuple[int, int]],
+    ) -> None:
+        """
+        values为按分组排列好的数值列，bounds为各个分组在values中的范围
+        """
+        if not len(values):
+            return
+        _, o, ranged, summed, reducers = field
+        starts = [start for start, _ in bounds]
+        firsts = values[starts].tolist()
+        lasts = values[[end - 1 for _, end in bounds]].tolist()
+        if summed:
+            totals = numpy.add.reduceat(values, starts).tolist()
+        if ranged:
+            lows = numpy.minimum.reduceat(values, starts).tolist()
+            highs = numpy.maximum.reduceat(values, starts).tolist()
+        for g, state in enumerate(states):
+            if ranged:
+                if state[o] == 0 or lows[g] < state[o + _LOW]:
+                    state[o + _LOW] = lows[g]
+                if state[o] == 0 or highs[g] > state[o + _HIGH]:
+                    state[o + _HIGH] = highs[g]
+            if summed:
+                state[o + _TOTAL] += totals[g]
+            start, end = bounds[g]
+            if reducers:
+                part = values[start:end].tolist()
+                for index, func in enumerate(reducers, o + _REDUCED):
+                    reduced = state[index]
+                    if reduced is _NO_VALUE:
+                        state[index] = reduce(func, part)
+                    else:
+                        state[index] = reduce(func, part, reduced)
+            if state[o] == 0:
+                state[o + _FIRST] = firsts[g]
+            state[o + _LAST] = lasts[g]
+            state[o] += end - start
+
+    def result(self, state: List[Any]) -> Dict[str, Any]:
+        """
+        根据累加器生成聚合结果
+
+        Args:
+            state (List[Any]): 累加器
+
+        Returns:
+            Dict[str, Any]: 聚合名称到结果的映射，字段为字典时结果也是字典
+        """
+        result: Dict[str, Any] = dict()
+        for name, alias, slot in self._outputs:
+            if name == "avg":
+                count = state[slot]
+                value = state[slot - _COUNT + _TOTAL] / count if count > 0 else 0.0
+            else:
+                value = state[slot]
+                if value is _NO_VALUE:
+                    value = None
+            if alias is None:
+                result[name] = value
+            elif name in result:
+                result[name][alias] = value
+            else:
+                result[name] = {alias: value}
+        return result
+
+
+def _field_key(name: str, field: Any) -> Any:
+    if field is True:
+        return None
+    if field is not None and not isinstance(field, str) and not callable(field):
+        raise ValidationError(
+            f"聚合的字段必须是字段名、键函数或True，{name}收到了: {field!r}"
+        )
+    return field
+
+
+def _reducer(spec: Any) -> Tuple[Callable[[Any, Any], Any], Any, Any]:
+    if not isinstance(spec, tuple) or len(spec) not in (2, 3) or not callable(spec[0]):
+        raise ValidationError(
+            f"reduce的字段必须是(归约函数, 字段)或(归约函数, 字段, 初始值)，收到了: {spec!r}"
+        )
+    return spec[0], spec[1], spec[2] if len(spec) == 3 else _NO_VALUE
+
+
+def _chunks(rows: Any, size: int) -> Iterator[List[Any]]:
+    if not isinstance(rows, (list, tuple, Iterator)):
+        rows = [] if rows is None else [rows]
+    source = iter(rows)
+    return iter(lambda: list(islice(source, size)), [])
+
+
+def _segments(
+    codes: Optional[List[int]], groups: int, length: int
+) -> Tuple[Any, List[Tuple[int, int]]]:
+    """
+    计算把数据按分组排列的顺序，以及各个分组在排列后的范围
+
+    codes为None时只有一个分组，顺序为None表示不需要重新排列。
+    """
+    if codes is None:
+        return None, [(0, length)]
+    if numpy is not None:
+        indexes = numpy.asarray(codes, dtype=numpy.intp)
+        order: Any = numpy.argsort(indexes, kind="stable")
+        ends = numpy.cumsum(numpy.bincount(indexes, minlength=groups)).tolist()
+    else:
+        order = sorted(range(length), key=codes.__getitem__)
+        sizes = [0] * groups
+        for code in codes:
+            sizes[code] += 1
+        ends = list(accumulate(sizes))
+    return order, list(zip([0] + ends[:-1], ends))
+
+
+def _plan(aggregates: Union[Dict[str, Any], AggregatePlan]) -> AggregatePlan:
+    if isinstance(aggregates, AggregatePlan):
+        return aggregates
+    return AggregatePlan(aggregates)
+
+
+def group_key(key: Any) -> Callable[[Any], Any]:
+    """
+    把GROUP的分组键转换为键函数
+
+    Args:
+        key (Any): 字段名、字段名的元组/列表（分组键为元组）或键函数
+
+    Returns:
+        Callable: 键函数
+
+    Raises:
+        ValidationError: 当分组键不合法时
+    """
+    if isinstance(key, str):
+        return itemgetter(key)
+    if (
+        isinstance(key, (tuple, list))
+        and key
+        and all(isinstance(name, str) for name in key)
+    ):
+        return itemgetter(*key) if len(key) > 1 else lambda row: (row[key[0]],)
+    if callable(key):
+        key_func: Callable[[Any], Any] = key
+        return key_func
+    raise ValidationError(f"分组键必须是字段名、字段名的元组或键函数，收到了: {key!r}")
+
+
+def collect_aggregates(
+    rows: Any, aggregates: Union[Dict[str, Any], AggregatePlan], lazy: bool = True
+) -> Dict[str, Any]:
+    """
+    一次遍历数据，同时计算多个字段的聚合
+
+    值为None的数据不参与聚合（字段为True时count仍然计入）。
+
+    Args:
+        rows (Any): 数据
+        aggregates (Dict[str, Any] | AggregatePlan): 聚合名称到字段的映射或聚合方案
+        lazy (bool): 声明可以直接消费迭代器，流式执行时不会先物化上游数据
+
+    Returns:
+        Dict[str, Any]: 聚合名称到结果的映射；没有数据时count和sum为0，avg为0.0，其余为None
+
+    Raises:
+        ValidationError: 当聚合名称或字段不合法时
+    """
+    plan = _plan(aggregates)
+    state = plan.accumulator()
+    if isinstance(rows, Batch):
+        plan.update_batch([state], rows)
+        return plan.result(state)
+    for chunk in _chunks(rows, AGG_CHUNK_SIZE):
+        plan.update(state, chunk)
+    return plan.result(state)
+
+
+def collect_groups(
+    rows: Any,
+    key: Any,
+    aggregates: Union[Dict[str, Any], AggregatePlan],
+    lazy: bool = True,
+) -> Dict[Any, Dict[str, Any]]:
+    """
+    哈希分组聚合，每个分组键只保存累加器，不保存数据
+
+    Args:
+        rows (Any): 数据
+        key (Any): 字段名、字段名的元组/列表或键函数
+        aggregates (Dict[str, Any] | AggregatePlan): 聚合名称到字段的映射或聚合方案
+        lazy (bool): 声明可以直接消费迭代器，流式执行时不会先物化上游数据
+
+    Returns:
+        Dict[Any, Dict[str, Any]]: 分组键到聚合结果的映射，按分组键首次出现的顺序排列
+
+    Raises:
+        ValidationError: 当分组键、聚合名称或字段不合法时
+    """
+    plan = _plan(aggregates)
+    if isinstance(rows, Batch):
+        return _group_batch(rows, key, plan)
+    key_func = group_key(key)
+    groups: Dict[Any, List[Any]] = dict()
+    update_one = plan.update_one
+    for chunk in _chunks(rows, GROUP_CHUNK_SIZE):
+        keys = list(map(key_func, chunk))
+        if len(set(keys)) * 4 > len(chunk):
+            # 块内的键大多不重复，拆分没有收益，逐条累计
+            for k, row in zip(keys, chunk):
+                state = groups.get(k)
+                if state is None:
+                    state = groups[k] = plan.accumulator()
+                update_one(state, row)
+            continue
+        # 先在块内按键拆分，再把各组的部分聚合合并到累加器
+        parts: Dict[Any, List[Any]] = dict()
+        for k, row in zip(keys, chunk):
+            part = parts.get(k)
+            if part is None:
+                parts[k] = [row]
+            else:
+                part.append(row)
+        for k, part in parts.items():
+            state = groups.get(k)
+            if state is None:
+                state = groups[k] = plan.accumulator()
+            if len(part) == 1:
+                update_one(state, part[0])
+            else:
+                plan.update(state, part)
+    return {k: plan.result(state) for k, state in groups.items()}
+
+
+def _group_batch(
+    batch: Batch, key: Any, plan: AggregatePlan
+) -> Dict[Any, Dict[str, Any]]:
+    """
+    按列对Batch分组聚合，分组键为字段名时直接使用对应的列
+    """
+    names = [key] if isinstance(key, str) else key
+    if (
+        isinstance(names, (tuple, list))
+        and names
+        and all(isinstance(name, str) and name in batch for name in names)
+    ):
+        columns = [to_list(batch[name]) for name in names]
+        keys = columns[0] if isinstance(key, str) else list(zip(*columns))
+    else:
+        keys = list(map(group_key(key), batch.to_rows()))
+    index: Dict[Any, int] = dict()
+    codes = [index.setdefault(k, len(index)) for k in keys]
+    states = [plan.accumulator() for _ in index]
+    plan.update_batch(states, batch, codes)
+    return {k: plan.result(state) for k, state in zip(index, states)}
@@ -0,0 +1,272 @@
+"""
+Columnar模块
+
+该模块定义了列式的批数据Batch：每个字段保存为一列，而不是每条数据保存为一个字典。
+
+    batch = Batch.from_rows([{"amount": 10, "qty": 2}, {"amount": 20, "qty": 1}])
+    batch["amount"] * batch["qty"]  # array([20, 20])
+    batch.to_rows()  # [{"amount": 10, "qty": 2}, {"amount": 20, "qty": 1}]
+
+安装了NumPy时，全部为int或float（不含None和bool）的列保存为NumPy数组，
+>>函数可以对整列做向量化运算，SUM、AVG、MIN、MAX、AGG和GROUP直接在数组上计算；
+其他列（字符串、含None的列等）以及没有安装NumPy时保存为Python列表。
+Batch在链中是一条数据：>>函数收到整个Batch，>和-函数也只会被调用一次。
+"""
+
+from itertools import chain, compress
+from operator import itemgetter
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - NumPy为可选依赖
+    numpy = None  # type: ignore[assignment]
+
+
+def is_array(values: Any) -> bool:
+    """
+    判断是否为NumPy数组，没有安装NumPy时总是返回False
+
+    Args:
+        values (Any): 要判断的数据
+
+    Returns:
+        bool: 是否为NumPy数组
+    """
+    return numpy is not None and isinstance(values, numpy.ndarray)
+
+
+def numeric_column(values: Any) -> bool:
+    """
+    判断是否为可以向量化聚合的数值列（整数或浮点数的一维NumPy数组）
+
+    Args:
+        values (Any): 列
+
+    Returns:
+        bool: 是否为数值列
+    """
+    return is_array(values) and values.ndim == 1 and values.dtype.kind in "iuf"
+
+
+def to_list(values: Any) -> List[Any]:
+    """
+    把列转换为元素为Python对象的列表
+
+    Args:
+        values (Any): NumPy数组或列表
+
+    Returns:
+        List[Any]: 列表，NumPy的数值会被转换为int或float
+    """
+    if is_array(values):
+        result: List[Any] = values.tolist()
+        return result
+    return values if isinstance(values, list) else list(values)
+
+
+def _to_column(values: List[Any]) -> Any:
+    """
+    全部为int或float的列转换为NumPy数组，其余保持为列表
+    """
+    if numpy is None or not values:
+        return values
+    kinds = set(map(type, values))
+    if kinds == {int}:
+        try:
+            return numpy.array(values, dtype=numpy.int64)
+        except OverflowError:
+            # 超出int64范围的整数保留为Python整数
+            return values
+    if kinds <= {int, float}:
+        return numpy.array(values, dtype=numpy.float64)
+    return values
+
+
+class Batch:
+    """
+    列式的批数据，每个字段保存为一列，各列长度相同
+
+    Attributes:
+        columns (List[str]): 字段名，按创建时的顺序排列
+    """
+
+    __slots__ = ("_columns", "_length")
+
+    def __init__(self, columns: Optional[Dict[str, Any]] = None) -> None:
+        """
+        根据字段名到列的映射创建Batch
+
+        Args:
+            columns (Dict[str, Any] | None): 字段名到列的映射，列可以是NumPy数组或任意序列
+
+        Raises:
+            ValueError: 当各列的长度不同时
+        """
+        self._columns: Dict[str, Any] = {
+            name: values if is_array(values) else _to_column(list(values))
+            for name, values in (columns or {}).items()
+        }
+        lengths = {len(values) for values in self._columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"各列的长度必须相同，收到了: {sorted(lengths)}")
+        self._length = lengths.pop() if lengths else 0
+
+    @classmethod
+    def _wrap(cls, columns: Dict[str, Any], length: int) -> "Batch":
+        batch = cls.__new__(cls)
+        batch._columns = columns
+        batch._length = length
+        return batch
+
+    @classmethod
+    def from_rows(
+        cls, rows: Iterable[Dict[str, Any]], columns: Optional[List[str]] = None
+    ) -> "Batch":
+        """
+        把字典数据转换为Batch
+
+        使用示例:
+            batch = Batch.from_rows(load_orders())
+            batch = Batch.from_rows(load_orders(), columns=["amount", "qty"])
+
+        Args:
+            rows (Iterable[Dict[str, Any]]): 字典数据，可以是迭代器
+            columns (List[str] | None): 需要的字段，默认为None即所有数据中出现过的字段
+
+        Returns:
+            Batch: 批数据，数据中缺少的字段为None
+        """
+        if not isinstance(rows, list):
+            rows = list(rows)
+        if columns is None:
+            columns = list(dict.fromkeys(chain.from_iterable(rows)))
+        result: Dict[str, Any] = dict()
+        for name in columns:
+            try:
+                values = list(map(itemgetter(name), rows))
+            except KeyError:
+                values = [row.get(name) for row in rows]
+            result[name] = _to_column(values)
+        return cls._wrap(result, len(rows))
+
+    def to_rows(self) -> List[Dict[str, Any]]:
+        """
+        把Batch转换为字典数据
+
+        Returns:
+            List[Dict[str, Any]]: 字典数据，NumPy的数值会被转换为int或float
+        """
+        if not self._columns:
+            return [dict() for _ in range(self._length)]
+        names = list(self._columns)
+        values = [to_list(column) for column in self._columns.values()]
+        return [dict(zip(names, row)) for row in zip(*values)]
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._columns)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._columns
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.to_rows())
+
+    def __getitem__(self, key: Any) -> Any:
+        """
+        按字段名取列，或按切片取部分数据
+
+        Args:
+            key (str | slice): 字段名或切片
+
+        Returns:
+            Any: 字段名返回列（NumPy数组或列表），切片返回新的Batch
+
+        Raises:
+            KeyError: 当字段不存在时
+            TypeError: 当key不是字段名或切片时
+        """
+        if isinstance(key, str):
+            return self._columns[key]
+        if isinstance(key, slice):
+            columns = {name: values[key] for name, values in self._columns.items()}
+            return Batch._wrap(columns, len(range(*key.indices(self._length))))
+        raise TypeError(f"Batch只支持按字段名或切片取值，收到了: {key!r}")
+
+    def with_column(self, name: str, values: Any) -> "Batch":
+        """
+        添加或替换一列，返回新的Batch，原有的Batch不变
+
+        使用示例:
+            batch = batch.with_column("total", batch["amount"] * batch["qty"])
+
+        Args:
+            name (str): 字段名
+            values (Any): 列，长度必须与Batch相同
+
+        Returns:
+            Batch: 新的Batch
+
+        Raises:
+            ValueError: 当列的长度与Batch不同时
+        """
+        column = values if is_array(values) else _to_column(list(values))
+        if len(column) != self._length:
+            raise ValueError(
+                f"列{name}的长度为{len(column)}，Batch的长度为{self._length}"
+            )
+        return Batch._wrap({**self._columns, name: column}, self._length)
+
+    def select(self, *names: str) -> "Batch":
+        """
+        只保留指定的字段
+
+        Args:
+            *names (str): 字段名
+
+        Returns:
+            Batch: 新的Batch
+
+        Raises:
+            KeyError: 当字段不存在时
+        """
+        return Batch._wrap({name: self._columns[name] for name in names}, self._length)
+
+    def filter(self, mask: Any) -> "Batch":
+        """
+        按布尔掩码保留数据
+
+        使用示例:
+            batch = batch.filter(batch["amount"] > 100)
+
+        Args:
+            mask (Any): 与Batch等长的布尔数组或序列
+
+        Returns:
+            Batch: 新的Batch，只包含掩码为True的数据
+
+        Raises:
+            ValueError: 当掩码的长度与Batch不同时
+        """
+        if len(mask) != self._length:
+            raise ValueError(f"掩码的长度为{len(mask)}，Batch的长度为{self._length}")
+        columns: Dict[str, Any] = dict()
+        if numpy is not None:
+            mask = numpy.asarray(mask, dtype=bool)
+            length = int(mask.sum())
+        else:
+            mask = list(map(bool, mask))
+            length = sum(mask)
+        for name, values in self._columns.items():
+            if is_array(values):
+                columns[name] = values[mask]
+            else:
+                columns[name] = list(compress(values, mask))
+        return Batch._wrap(columns, length)
+
+    def __repr__(self) -> str:
+        return f"Batch({self._length} rows, columns={self.columns})"
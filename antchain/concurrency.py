@@ -0,0 +1,332 @@
+"""
+Concurrency模块
+
+该模块管理整个库共享的线程池和进程池，并提供有界并发的映射函数。
+处理函数通过默认参数声明并发方式（与stream_size的约定一致）：
+
+- workers: 单条处理(>)时同时在途的数据条数，大于1时使用共享线程池并发执行
+- ordered: 为False时按完成顺序返回结果，默认为True，即保持输入顺序
+- processes: 大于0时单条处理(>)和批处理(>>)使用共享进程池执行，适合CPU密集型函数，
+  数值为同时在途的数据块个数
+
+异步执行(acall)时，协程函数直接在当前事件循环中并发执行，不经过线程池：
+workers限制单条处理和过滤同时在途的协程数，stream_concurrency限制批处理和连接同时在途的切片数，
+未声明时都使用DEFAULT_ASYNC_CONCURRENCY。
+
+线程池和进程池都在第一次使用时创建，之后被所有链和所有调用共享，进程池中的工作进程会被长期复用。
+工作进程使用forkserver或spawn方式启动，处理函数必须可以被pickle序列化（即模块级函数）。
+注意不要在并发执行的处理函数中再同步等待同一个线程池中的任务，否则可能耗尽线程导致死锁。
+"""
+
+import asyncio
+import multiprocessing
+import os
+import pickle
+import threading
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+)
+from .exceptions import ValidationError
+
+# 共享线程池的默认线程数
+DEFAULT_THREAD_POOL_SIZE = 32
+# 单条处理使用进程池且无法预先知道数据量时，每个数据块的默认大小
+DEFAULT_PROCESS_CHUNK_SIZE = 1024
+# 异步执行时未声明并发数的阶段，同时在途的协程数
+DEFAULT_ASYNC_CONCURRENCY = 64
+
+_thread_pool: Optional[ThreadPoolExecutor] = None
+_thread_pool_size = DEFAULT_THREAD_POOL_SIZE
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_size = os.cpu_count() or 1
+_lock = threading.Lock()
+
+
+def get_thread_pool() -> ThreadPoolExecutor:
+    """
+    获取共享线程池，不存在时创建
+
+    Returns:
+        ThreadPoolExecutor: 共享线程池
+    """
+    global _thread_pool
+    if _thread_pool is None:
+        with _lock:
+            if _thread_pool is None:
+                _thread_pool = ThreadPoolExecutor(
+                    max_workers=_thread_pool_size, thread_name_prefix="antchain"
+                )
+    return _thread_pool
+
+
+def set_thread_pool_size(size: int) -> None:
+    """
+    设置共享线程池的线程数，已经创建的线程池会在已提交的任务完成后关闭
+
+    Args:
+        size (int): 线程数，必须大于0
+
+    Raises:
+        ValueError: 当size小于等于0时
+    """
+    global _thread_pool, _thread_pool_size
+    if size <= 0:
+        raise ValueError("线程池大小必须大于0")
+    with _lock:
+        old_pool = _thread_pool
+        _thread_pool_size = size
+        _thread_pool = None
+    if old_pool is not None:
+        old_pool.shutdown(wait=False)
+
+
+def _process_context() -> Any:
+    """
+    进程池使用forkserver（不支持时为spawn）启动工作进程，而不是fork：
+    共享线程池中的线程可能正持有锁，fork一个有活动线程的进程可能导致死锁。
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    获取共享进程池，不存在时创建
+
+    Returns:
+        ProcessPoolExecutor: 共享进程池，默认进程数为CPU核数
+    """
+    global _process_pool
+    if _process_pool is None:
+        with _lock:
+            if _process_pool is None:
+                _process_pool = ProcessPoolExecutor(
+                    max_workers=_process_pool_size, mp_context=_process_context()
+                )
+    return _process_pool
+
+
+def set_process_pool_size(size: int) -> None:
+    """
+    设置共享进程池的进程数，已经创建的进程池会在已提交的任务完成后关闭
+
+    Args:
+        size (int): 进程数，必须大于0
+
+    Raises:
+        ValueError: 当size小于等于0时
+    """
+    global _process_pool, _process_pool_size
+    if size <= 0:
+        raise ValueError("进程池大小必须大于0")
+    with _lock:
+        old_pool = _process_pool
+        _process_pool_size = size
+        _process_pool = None
+    if old_pool is not None:
+        old_pool.shutdown(wait=False)
+
+
+def shutdown() -> None:
+    """
+    关闭共享的线程池和进程池，之后再次使用时会重新创建
+    """
+    global _thread_pool, _process_pool
+    with _lock:
+        pools: List[Any] = [_thread_pool, _process_pool]
+        _thread_pool = None
+        _process_pool = None
+    for pool in pools:
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+
+def ensure_picklable(func: Callable[..., Any]) -> None:
+    """
+    检查函数能否被pickle序列化，进程池只能执行可序列化的函数
+
+    Args:
+        func (Callable[..., Any]): 要检查的函数
+
+    Raises:
+        ValidationError: 当函数无法被序列化时（如lambda、嵌套函数）
+    """
+    try:
+        pickle.dumps(func)
+    except Exception as e:
+        name = getattr(func, "__name__", repr(func))
+        raise ValidationError(
+            f"处理函数 {name} 无法被pickle序列化，不能在进程池中执行"
+            + f"（请使用模块级函数，不要使用lambda或嵌套函数）: {str(e)}"
+        ) from e
+
+
+def process_map(
+    func: Callable[[Any], Any], chunks: Iterable[List[Any]], processes: int
+) -> Iterator[List[Any]]:
+    """
+    在共享进程池中对每个数据块中的每条数据调用func，按输入顺序返回每个数据块的结果
+
+    每个数据块只序列化一次，同时在途的数据块不超过processes个。
+
+    Args:
+        func (Callable[[Any], Any]): 单条处理函数，必须可以被pickle序列化
+        chunks (Iterable[List[Any]]): 数据块
+        processes (int): 最大在途数据块数
+
+    Returns:
+        Iterator[List[Any]]: 每个数据块的结果列表
+    """
+    return _submit_ordered(get_process_pool(), _apply_one, func, chunks, processes)
+
+
+def process_batches(
+    func: Callable[[Any], Any], chunks: Iterable[Any], processes: int
+) -> Iterator[Any]:
+    """
+    在共享进程池中对每个数据块调用批处理函数func，按输入顺序返回每次调用的结果
+
+    Args:
+        func (Callable[[Any], Any]): 批处理函数，必须可以被pickle序列化
+        chunks (Iterable[Any]): 数据块
+        processes (int): 最大在途数据块数
+
+    Returns:
+        Iterator[Any]: 每个数据块的处理结果
+    """
+    return _submit_ordered(get_process_pool(), _call, func, chunks, processes)
+
+
+def _apply_one(func: Callable[[Any], Any], chunk: List[Any]) -> List[Any]:
+    """
+    在工作进程中逐条处理一个数据块
+    """
+    return [func(item) for item in chunk]
+
+
+def _call(func: Callable[[Any], Any], arg: Any) -> Any:
+    """
+    在工作线程或工作进程中调用func，批处理时arg为一个数据块
+    """
+    return func(arg)
+
+
+def _submit_ordered(
+    pool: Any,
+    runner: Callable[..., Any],
+    func: Callable[[Any], Any],
+    items: Iterable[Any],
+    limit: int,
+) -> Iterator[Any]:
+    pending: Deque[Future] = deque()
+    try:
+        for item in items:
+            pending.append(pool.submit(runner, func, item))
+            if len(pending) >= limit:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def parallel_map(
+    func: Callable[[Any], Any],
+    rows: Iterable[Any],
+    workers: int,
+    ordered: bool = True,
+) -> Iterator[Any]:
+    """
+    使用共享线程池并发地对每条数据调用func，同时在途的任务不超过workers个
+
+    输入可以是迭代器，只会按需拉取数据；任务抛出的异常会在取结果时原样抛出，
+    此时尚未开始的任务会被取消。
+
+    Args:
+        func (Callable[[Any], Any]): 单条处理函数
+        rows (Iterable[Any]): 输入数据
+        workers (int): 最大在途任务数
+        ordered (bool): 是否按输入顺序返回结果，默认为True
+
+    Returns:
+        Iterator[Any]: 结果迭代器
+    """
+    if ordered:
+        return _ordered_map(func, rows, workers)
+    return _unordered_map(func, rows, workers)
+
+
+def _ordered_map(
+    func: Callable[[Any], Any], rows: Iterable[Any], workers: int
+) -> Iterator[Any]:
+    return _submit_ordered(get_thread_pool(), _call, func, rows, workers)
+
+
+def _unordered_map(
+    func: Callable[[Any], Any], rows: Iterable[Any], workers: int
+) -> Iterator[Any]:
+    pool = get_thread_pool()
+    pending: Set[Future] = set()
+    try:
+        for item in rows:
+            pending.add(pool.submit(func, item))
+            if len(pending) >= workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in as_completed(pending):
+            pending.discard(future)
+            yield future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+async def async_map(
+    func: Callable[[Any], Awaitable[Any]], items: Iterable[Any], limit: int
+) -> List[Any]:
+    """
+    在当前事件循环中并发地对每条数据调用协程函数func，同时在途的协程不超过limit个
+
+    结果按输入顺序返回；任一协程抛出异常时，其余尚未完成的协程会被取消，异常原样抛出。
+
+    Args:
+        func (Callable[[Any], Awaitable[Any]]): 协程函数
+        items (Iterable[Any]): 输入数据
+        limit (int): 最大在途协程数，小于等于0时使用DEFAULT_ASYNC_CONCURRENCY
+
+    Returns:
+        List[Any]: 结果列表
+    """
+    semaphore = asyncio.Semaphore(limit if limit > 0 else DEFAULT_ASYNC_CONCURRENCY)
+
+    async def run(item: Any) -> Any:
+        async with semaphore:
+            return await func(item)
+
+    tasks = [asyncio.ensure_future(run(item)) for item in items]
+    try:
+        return list(await asyncio.gather(*tasks))
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
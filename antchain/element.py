@@ -8,27 +8,48 @@ Element类支持多种操作符重载，包括：
 - -: 过滤操作符
 - *: 左连接操作符
 - **: 全连接操作符
+- @: 内连接操作符
+- %: 半连接操作符
+- ^: 反连接操作符
 - >: 单条处理操作符
 - >>: 批处理操作符
 
-每个Element实例表示数据流中的一个处理步骤。
+每个Element实例表示数据流中的一个处理步骤。Element在创建后不可修改，
+所有操作符都返回新的Element，因此同一个Element（包括全局的DATA）可以被多条链、多个线程共享。
+
+Element使用__slots__，不再为每个实例创建__dict__。由于不可修改，操作符生成的Element会被缓存：
+同一个函数多次使用同一个操作符（如多次书写 DATA > f）得到的是同一个Element，
+函数签名的校验也只做一次。缓存按函数的身份（id）而不是相等性区分函数，
+定义了__eq__的可调用对象不会被合并；同一个对象的绑定方法（如 DATA > obj.method）同样会被缓存。
+缓存使用弱引用，不再被任何链引用的Element会被正常回收。
 """
 
-from typing import Callable, Any
+import types
+import weakref
+from typing import Callable, Any, Hashable
 from .validators import validate_function_args_count, validate_filter_function
+from .exceptions import ElementError
 
 
 class Element:
     """
-    数据流处理管道中的基本元素类
+    数据流处理管道中的基本元素类，创建后不可修改
 
     Attributes:
         element_type (str): 元素类型，决定使用哪种处理策略
-        left_data (Any): 左侧数据，用于连接操作
+        left_data (Any): 单独调用StrategyFactory.process时使用的左侧数据，
+            链执行时数据通过参数在阶段之间传递，不会写入Element
         right_func (Callable | None): 右侧函数，具体的处理函数
         join_func (Callable | None): 连接函数，用于连接操作
     """
 
+    __slots__ = ("element_type", "left_data", "right_func", "join_func", "__weakref__")
+
+    element_type: str
+    left_data: Any
+    right_func: Callable[..., Any] | None
+    join_func: Callable[..., Any] | None
+
     def __init__(
         self,
         element_type: str = "none",
@@ -45,10 +66,51 @@ class Element:
             right_func (Callable | None): 右侧处理函数，默认为None
             join_func (Callable | None): 连接函数，默认为None
         """
-        self.left_data: None | list | tuple | Any = None
-        self.element_type = element_type
-        self.right_func = right_func
-        self.join_func = join_func
+        object.__setattr__(self, "left_data", left_data)
+        object.__setattr__(self, "element_type", element_type)
+        object.__setattr__(self, "right_func", right_func)
+        object.__setattr__(self, "join_func", join_func)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """
+        禁止修改Element的属性
+
+        Raises:
+            ElementError: 总是抛出，Element创建后不可修改
+        """
+        raise ElementError(f"Element创建后不可修改，不能设置属性 {name}")
+
+    def __delattr__(self, name: str) -> None:
+        raise ElementError(f"Element创建后不可修改，不能删除属性 {name}")
+
+    @classmethod
+    def interned(
+        cls,
+        element_type: str,
+        right_func: Callable[..., Any] | None,
+        join_func: Callable[..., Any] | None = None,
+        validator: Callable[[], None] | None = None,
+    ) -> "Element":
+        """
+        获取缓存中相同类型、同一个函数的Element，不存在时校验函数后创建并放入缓存
+
+        Args:
+            element_type (str): 元素类型
+            right_func (Callable | None): 右侧处理函数
+            join_func (Callable | None): 连接函数
+            validator (Callable | None): 创建前执行的校验，校验失败时不会写入缓存
+
+        Returns:
+            Element: Element实例
+        """
+        key = (element_type, _identity(right_func), _identity(join_func))
+        element = _interned.get(key)
+        if element is not None:
+            return element
+        if validator is not None:
+            validator()
+        element = cls(element_type, right_func=right_func, join_func=join_func)
+        return _interned.setdefault(key, element)
 
     def __and__(self, other: Callable[..., Any]) -> "Element":
         """
@@ -60,7 +122,7 @@ class Element:
         Returns:
             Element: 新的Element实例，类型为"and"
         """
-        return Element(element_type="and", right_func=other)
+        return Element.interned("and", other)
 
     def __add__(self, other: Callable[..., Any]) -> "Element":
         """
@@ -72,7 +134,7 @@ class Element:
         Returns:
             Element: 新的Element实例，类型为"merge"
         """
-        return Element(element_type="merge", right_func=other)
+        return Element.interned("merge", other)
 
     def __sub__(self, other: Callable[..., Any]) -> "Element":
         """
@@ -87,8 +149,9 @@ class Element:
         Raises:
             ValidationError: 当函数参数或返回值类型不符合要求时
         """
-        validate_filter_function(other)
-        return Element(element_type="filter", right_func=other)
+        return Element.interned(
+            "filter", other, validator=lambda: validate_filter_function(other)
+        )
 
     def __mul__(self, other: Callable[..., Any]) -> "Element":
         """
@@ -98,11 +161,9 @@ class Element:
             other (Callable): 连接函数
 
         Returns:
-            Element: 当前Element实例，类型更新为"left_join"
+            Element: 新的Element实例，类型为"left_join"，right_func沿用当前实例
         """
-        self.element_type = "left_join"
-        self.join_func = other
-        return self
+        return Element.interned("left_join", self.right_func, other)
 
     def __pow__(self, other: Callable[..., Any]) -> "Element":
         """
@@ -112,11 +173,45 @@ class Element:
             other (Callable): 连接函数
 
         Returns:
-            Element: 当前Element实例，类型更新为"all_join"
+            Element: 新的Element实例，类型为"all_join"，right_func沿用当前实例
+        """
+        return Element.interned("all_join", self.right_func, other)
+
+    def __matmul__(self, other: Callable[..., Any]) -> "Element":
+        """
+        @ 操作符重载，用于内连接操作
+
+        Args:
+            other (Callable): 连接函数
+
+        Returns:
+            Element: 新的Element实例，类型为"inner_join"，right_func沿用当前实例
         """
-        self.element_type = "all_join"
-        self.join_func = other
-        return self
+        return Element.interned("inner_join", self.right_func, other)
+
+    def __mod__(self, other: Callable[..., Any]) -> "Element":
+        """
+        % 操作符重载，用于半连接操作
+
+        Args:
+            other (Callable): 连接函数，只需要声明left_key和right_key
+
+        Returns:
+            Element: 新的Element实例，类型为"semi_join"，right_func沿用当前实例
+        """
+        return Element.interned("semi_join", self.right_func, other)
+
+    def __xor__(self, other: Callable[..., Any]) -> "Element":
+        """
+        ^ 操作符重载，用于反连接操作
+
+        Args:
+            other (Callable): 连接函数，只需要声明left_key和right_key
+
+        Returns:
+            Element: 新的Element实例，类型为"anti_join"，right_func沿用当前实例
+        """
+        return Element.interned("anti_join", self.right_func, other)
 
     def __gt__(self, other: Callable[..., Any]) -> "Element":
         """
@@ -131,8 +226,11 @@ class Element:
         Raises:
             ValidationError: 当函数参数个数不符合要求时
         """
-        validate_function_args_count(other, 1, "单条处理")
-        return Element(element_type="one", right_func=other)
+        return Element.interned(
+            "one",
+            other,
+            validator=lambda: validate_function_args_count(other, 1, "单条处理"),
+        )
 
     def __rshift__(self, other: Callable[..., Any]) -> "Element":
         """
@@ -147,5 +245,25 @@ class Element:
         Raises:
             ValidationError: 当函数参数个数不符合要求时
         """
-        validate_function_args_count(other, 1, "批处理")
-        return Element(element_type="multi", right_func=other)
+        return Element.interned(
+            "multi",
+            other,
+            validator=lambda: validate_function_args_count(other, 1, "批处理"),
+        )
+
+
+def _identity(func: Callable[..., Any] | None) -> Hashable:
+    """
+    按身份区分函数的缓存键，绑定方法由所属对象和函数的id组成
+
+    缓存中的Element持有函数（以及绑定方法的所属对象），它们存活期间id不会被复用。
+    """
+    if isinstance(func, types.MethodType):
+        return (id(func.__self__), id(func.__func__))
+    return id(func)
+
+
+# 操作符生成的Element的缓存，键为(element_type, right_func和join_func的身份)
+_interned: "weakref.WeakValueDictionary[Hashable, Element]" = (
+    weakref.WeakValueDictionary()
+)
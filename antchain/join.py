@@ -0,0 +1,713 @@
+"""
+Join模块
+
+该模块包含连接操作(* / **)的辅助组件。
+
+JoinCache是挂在连接函数上的按键读穿缓存，通过连接函数的默认参数cache声明
+（与left_key、right_key等连接条件的约定一致）：
+
+    user_cache = JoinCache(maxsize=10000, ttl=60)
+
+    def join_user(
+        left_key=lambda x: x["user_id"],
+        right_key=lambda x: x["id"],
+        left_property="user",
+        one_to_many=False,
+        cache=user_cache,
+    ):
+        pass
+
+    chain = Start() | init_orders | ((DATA & fetch_users) * join_user)
+
+执行左连接时，先用left_key计算每条左侧数据的键并查询缓存，只有缓存中没有的键对应的
+左侧数据才会被交给右侧函数；获取到的右侧数据按right_key分组后写回缓存，
+没有匹配的键也会被缓存（负缓存），之后不再重复查询。
+
+BroadcastTable是广播连接使用的右侧静态数据表：右侧数据和按键建立的索引只构建一次，
+按TTL或版本号过期，被所有调用和线程只读共享。把它放在&的右边即可：
+
+    users = BroadcastTable(load_all_users, ttl=300)
+
+    chain = Start() | init_orders | ((DATA & users) * join_user)
+
+RangeIndex是范围连接使用的区间索引：连接函数声明right_range（而不是right_key）时，
+左侧数据的left_key值落在右侧数据的区间内即视为匹配：
+
+    def in_session(
+        left_key=lambda e: e["ts"],
+        right_range=lambda s: (s["start"], s["end"]),
+        left_property="session",
+        one_to_many=False,
+        closed="left",
+    ):
+        pass
+
+    chain = Start() | init_events | ((DATA & fetch_sessions) * in_session)
+
+SpillBuffer是连接的溢写缓冲：连接函数声明memory_budget（内存中最多保存的右侧数据条数）时，
+右侧数据超过该条数后，两侧数据按键的哈希分区写入临时文件，再逐个分区连接（Grace哈希连接）。
+
+MergedRow是没有left_property的连接在连接函数声明了row_view=True时输出的合并行视图：
+它只引用左右两侧的原始数据，读取时右侧字段优先（与{**left, **right}一致），
+第一次写入时才复制为真正的dict。一对多连接时左侧的宽行不会再为每条右侧数据复制一次。
+"""
+
+import copy
+import os
+import pickle
+import tempfile
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Tuple,
+)
+
+from .utils import group_by, mapping
+
+
+class JoinCache:
+    """
+    连接右侧数据的按键缓存，支持LRU淘汰和TTL过期
+
+    每个键对应一个右侧数据列表，空列表表示该键没有匹配的右侧数据（负缓存）。
+    缓存是线程安全的，可以被多条链或多个线程共享。
+    写入和读取时都会浅拷贝每条右侧数据，修改连接结果中的右侧数据不会影响缓存；
+    右侧数据中嵌套的可变对象仍然是共享的。
+
+    Attributes:
+        maxsize (int): 最多缓存的键数，超出时淘汰最久未使用的键
+        ttl (float | None): 过期时间（秒），为None时永不过期
+        negative (bool): 是否缓存没有匹配数据的键
+        hits (int): 命中次数
+        misses (int): 未命中次数
+    """
+
+    def __init__(
+        self, maxsize: int = 10000, ttl: Optional[float] = None, negative: bool = True
+    ) -> None:
+        """
+        初始化JoinCache实例
+
+        Args:
+            maxsize (int): 最多缓存的键数，默认为10000
+            ttl (float | None): 过期时间（秒），默认为None即永不过期
+            negative (bool): 是否缓存没有匹配数据的键，默认为True
+
+        Raises:
+            ValueError: 当maxsize小于等于0或ttl小于等于0时
+        """
+        if maxsize <= 0:
+            raise ValueError("maxsize必须大于0")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl必须大于0")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative = negative
+        self.hits = 0
+        self.misses = 0
+        # 键 -> (过期时间, 右侧数据列表)
+        self._data: "OrderedDict[Hashable, Tuple[float, List[Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get_many(
+        self, keys: Iterable[Hashable]
+    ) -> Tuple[Dict[Hashable, List[Any]], List[Hashable]]:
+        """
+        批量查询缓存
+
+        Args:
+            keys (Iterable[Hashable]): 要查询的键，可以重复
+
+        Returns:
+            tuple: (命中的键到右侧数据列表的映射, 未命中的键列表)，未命中的键已去重并保持顺序，
+            命中的右侧数据是缓存的浅拷贝
+        """
+        found: Dict[Hashable, List[Any]] = dict()
+        missing: Dict[Hashable, None] = dict()
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                if key in found or key in missing:
+                    continue
+                entry = self._data.get(key)
+                if entry is not None and entry[0] > now:
+                    self._data.move_to_end(key)
+                    found[key] = entry[1]
+                else:
+                    if entry is not None:
+                        del self._data[key]
+                    missing[key] = None
+            self.hits += len(found)
+            self.misses += len(missing)
+        for key, rows in found.items():
+            found[key] = [copy.copy(row) for row in rows]
+        return found, list(missing)
+
+    def put_many(self, values: Dict[Hashable, List[Any]]) -> None:
+        """
+        批量写入缓存，空列表只有在negative为True时才会被写入
+
+        缓存保存的是每条右侧数据的浅拷贝，之后修改传入的数据不会影响缓存。
+
+        Args:
+            values (Dict[Hashable, List[Any]]): 键到右侧数据列表的映射
+        """
+        values = {key: [copy.copy(row) for row in rows] for key, rows in values.items()}
+        expire_at = float("inf") if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            for key, rows in values.items():
+                if not rows and not self.negative:
+                    continue
+                self._data[key] = (expire_at, rows)
+                self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        删除一个键的缓存
+
+        Args:
+            key (Hashable): 要删除的键
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        清空缓存和命中统计
+        """
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+class MergedRow(MutableMapping):
+    """
+    左右两侧数据合并后的只读优先视图
+
+    读取时先查右侧再查左侧，键的顺序与{**left, **right}一致；
+    第一次写入或删除时把两侧合并复制为一个dict，之后的读写都在这个dict上进行，
+    不会影响左右两侧的原始数据。与dict比较时按内容比较，需要真正的dict时使用dict(row)。
+
+    Attributes:
+        left (Mapping): 左侧数据
+        right (Mapping): 右侧数据
+    """
+
+    __slots__ = ("left", "right", "_data")
+
+    def __init__(self, left: Mapping, right: Mapping) -> None:
+        """
+        初始化MergedRow实例
+
+        Args:
+            left (Mapping): 左侧数据
+            right (Mapping): 右侧数据，与左侧同名的字段以右侧为准
+        """
+        self.left = left
+        self.right = right
+        self._data: Optional[Dict[Any, Any]] = None
+
+    def __getitem__(self, key: Any) -> Any:
+        if self._data is not None:
+            return self._data[key]
+        if key in self.right:
+            return self.right[key]
+        return self.left[key]
+
+    def __contains__(self, key: Any) -> bool:
+        if self._data is not None:
+            return key in self._data
+        return key in self.right or key in self.left
+
+    def __iter__(self) -> Iterator[Any]:
+        if self._data is not None:
+            return iter(self._data)
+        return self._keys()
+
+    def _keys(self) -> Iterator[Any]:
+        yield from self.left
+        for key in self.right:
+            if key not in self.left:
+                yield key
+
+    def __len__(self) -> int:
+        if self._data is not None:
+            return len(self._data)
+        return len(self.left) + sum(1 for key in self.right if key not in self.left)
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self.materialize()[key] = value
+
+    def __delitem__(self, key: Any) -> None:
+        del self.materialize()[key]
+
+    def materialize(self) -> Dict[Any, Any]:
+        """
+        把视图复制为真正的dict，之后的读写都在这个dict上进行
+
+        Returns:
+            Dict[Any, Any]: 合并后的dict
+        """
+        if self._data is None:
+            self._data = {**self.left, **self.right}
+        return self._data
+
+    def __repr__(self) -> str:
+        return f"MergedRow({dict(self)!r})"
+
+    def __reduce__(self) -> Any:
+        # 序列化（如交给进程池）时直接使用合并后的dict
+        return (dict, (dict(self),))
+
+
+class RangeIndex:
+    """
+    右侧数据区间的有序索引，用于范围连接
+
+    区间按起点排序，并记录起点不大于当前区间的所有区间终点的最大值。查询时先二分找到
+    起点满足条件的最后一个区间，再向前扫描，直到之前所有区间的终点都不可能包含查询值为止。
+    区间互不重叠时（如会话、价格档位）每次查询为O(log m)。
+
+    Attributes:
+        closed (str): 区间的闭合方式，"left"为[start, end)，"right"为(start, end]，
+            "both"为[start, end]，"neither"为(start, end)
+    """
+
+    __slots__ = ("closed", "_starts", "_ends", "_max_ends", "_rows")
+
+    CLOSED = ("left", "right", "both", "neither")
+
+    def __init__(
+        self,
+        rows: Iterable[Any],
+        range_func: Callable[[Any], Tuple[Any, Any]],
+        closed: str = "left",
+    ) -> None:
+        """
+        初始化RangeIndex实例
+
+        Args:
+            rows (Iterable[Any]): 右侧数据
+            range_func (Callable): 区间函数，返回(start, end)
+            closed (str): 区间的闭合方式，默认为"left"即[start, end)
+
+        Raises:
+            ValueError: 当closed不合法时
+        """
+        if closed not in self.CLOSED:
+            raise ValueError(
+                f"closed只能是{'、'.join(self.CLOSED)}之一，当前值: {closed!r}"
+            )
+        self.closed = closed
+        entries = sorted(
+            ((range_func(row), row) for row in rows), key=lambda entry: entry[0][0]
+        )
+        self._starts: List[Any] = [bounds[0] for bounds, _ in entries]
+        self._ends: List[Any] = [bounds[1] for bounds, _ in entries]
+        self._rows: List[Any] = [row for _, row in entries]
+        self._max_ends: List[Any] = []
+        for end in self._ends:
+            if self._max_ends and self._max_ends[-1] > end:
+                end = self._max_ends[-1]
+            self._max_ends.append(end)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def find(self, value: Any) -> List[Any]:
+        """
+        查询包含value的所有区间对应的数据
+
+        Args:
+            value (Any): 查询值
+
+        Returns:
+            List[Any]: 按区间起点升序排列的数据，没有匹配时为空列表
+        """
+        result = list(self._scan(value))
+        result.reverse()
+        return result
+
+    def find_one(self, value: Any) -> Any:
+        """
+        查询包含value的区间中起点最大的一个
+
+        Args:
+            value (Any): 查询值
+
+        Returns:
+            Any: 匹配的数据，没有匹配时为None
+        """
+        return next(self._scan(value), None)
+
+    def _scan(self, value: Any) -> Iterator[Any]:
+        # 按区间起点降序产出包含value的数据
+        if self.closed in ("left", "both"):
+            index = bisect_right(self._starts, value)
+        else:
+            index = bisect_left(self._starts, value)
+        include_end = self.closed in ("right", "both")
+        ends, max_ends, rows = self._ends, self._max_ends, self._rows
+        for i in range(index - 1, -1, -1):
+            if include_end:
+                if max_ends[i] < value:
+                    return
+                if ends[i] >= value:
+                    yield rows[i]
+            else:
+                if max_ends[i] <= value:
+                    return
+                if ends[i] > value:
+                    yield rows[i]
+
+
+class BroadcastTable:
+    """
+    广播连接的右侧数据表
+
+    右侧数据由loader一次性加载，连接时按(right_key, one_to_many)建立的索引也只构建一次，
+    之后所有调用和线程共享同一份只读的数据和索引，不再调用loader，也不再重建索引。
+    数据在ttl秒后过期，或者version返回的版本号变化时重新加载；也可以调用invalidate主动失效。
+
+    共享的数据和索引不能被修改：使用left_property时挂到左侧数据上的是共享的右侧数据（一对多时为共享的列表）。
+
+    Attributes:
+        loader (Callable): 加载全部右侧数据的函数，不接受参数
+        ttl (float | None): 过期时间（秒），为None时永不过期
+        version (Callable | None): 返回数据版本号的函数，版本号变化时重新加载
+        loads (int): 已加载的次数
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[], Any],
+        ttl: Optional[float] = None,
+        version: Optional[Callable[[], Hashable]] = None,
+    ) -> None:
+        """
+        初始化BroadcastTable实例
+
+        Args:
+            loader (Callable): 加载全部右侧数据的函数，不接受参数
+            ttl (float | None): 过期时间（秒），默认为None即永不过期
+            version (Callable | None): 返回数据版本号的函数，默认为None
+
+        Raises:
+            ValueError: 当ttl小于等于0时
+        """
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl必须大于0")
+        self.loader = loader
+        self.ttl = ttl
+        self.version = version
+        self.loads = 0
+        self._snapshot: Optional[_Snapshot] = None
+        self._lock = threading.Lock()
+
+    def __call__(self, *args: Any) -> List[Any]:
+        """
+        返回当前的全部右侧数据，忽略传入的参数，因此可以直接作为&右侧的函数使用
+
+        Returns:
+            List[Any]: 共享的右侧数据
+        """
+        return self._current().rows
+
+    def index(
+        self, key_func: Callable[[Any], Any], one_to_many: bool
+    ) -> Dict[Any, Any]:
+        """
+        获取按key_func建立的共享索引，第一次使用时构建
+
+        Args:
+            key_func (Callable): 右侧键函数
+            one_to_many (bool): 是否一对多，一对多时为dict[key, list]，否则为dict[key, row]
+
+        Returns:
+            Dict[Any, Any]: 共享的只读索引
+        """
+        snapshot = self._current()
+        index_key = (key_func, one_to_many)
+        index = snapshot.indexes.get(index_key)
+        if index is None:
+            with self._lock:
+                index = snapshot.indexes.get(index_key)
+                if index is None:
+                    if one_to_many:
+                        index = group_by(snapshot.rows, key_func)
+                    else:
+                        index = mapping(snapshot.rows, key_func)
+                    snapshot.indexes[index_key] = index
+        return index
+
+    def invalidate(self) -> None:
+        """
+        使当前数据失效，下次使用时重新加载
+        """
+        with self._lock:
+            self._snapshot = None
+
+    def _current(self) -> "_Snapshot":
+        # 读取路径不加锁：快照创建后不再替换其中的数据，过期时整体替换为新的快照
+        snapshot = self._snapshot
+        version = self.version() if self.version is not None else None
+        if snapshot is not None and snapshot.fresh(version):
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.fresh(version):
+                return snapshot
+            rows = self.loader()
+            expire_at = (
+                float("inf") if self.ttl is None else time.monotonic() + self.ttl
+            )
+            snapshot = _Snapshot(list(rows) if rows else [], version, expire_at)
+            self._snapshot = snapshot
+            self.loads += 1
+            return snapshot
+
+
+class _Snapshot:
+    """
+    BroadcastTable某一次加载的数据及其索引
+    """
+
+    __slots__ = ("rows", "version", "expire_at", "indexes")
+
+    def __init__(self, rows: List[Any], version: Any, expire_at: float) -> None:
+        self.rows = rows
+        self.version = version
+        self.expire_at = expire_at
+        self.indexes: Dict[Tuple[Any, bool], Dict[Any, Any]] = dict()
+
+    def fresh(self, version: Any) -> bool:
+        return self.version == version and self.expire_at > time.monotonic()
+
+
+class SpillFile:
+    """
+    只追加写入、之后顺序读取的临时文件，文件在close时删除
+
+    记录每凑满chunk_size条序列化一次，读取时按写入顺序逐块反序列化，不会一次性读入内存。
+    """
+
+    __slots__ = ("_file", "_pending", "_chunks", "chunk_size", "count")
+
+    def __init__(self, directory: Optional[str] = None, chunk_size: int = 256) -> None:
+        """
+        初始化SpillFile实例
+
+        Args:
+            directory (str | None): 临时文件所在的目录，默认为None即系统临时目录
+            chunk_size (int): 每次序列化的记录条数，即内存中最多暂存的记录条数，默认为256
+
+        Raises:
+            ValueError: 当chunk_size小于等于0时
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size必须大于0")
+        self._file = tempfile.TemporaryFile(dir=directory)
+        self._pending: List[Any] = []
+        self._chunks = 0
+        self.chunk_size = chunk_size
+        self.count = 0
+
+    def write(self, record: Any) -> None:
+        """
+        追加一条记录
+
+        Args:
+            record (Any): 可以被pickle序列化的记录
+        """
+        self._pending.append(record)
+        self.count += 1
+        if len(self._pending) >= self.chunk_size:
+            self._dump()
+
+    def read(self) -> Iterator[Any]:
+        """
+        按写入顺序读取全部记录
+
+        Returns:
+            Iterator[Any]: 记录的迭代器
+        """
+        if self._pending:
+            self._dump()
+        self._file.flush()
+        self._file.seek(0)
+        for _ in range(self._chunks):
+            yield from pickle.load(self._file)
+        self._file.seek(0, os.SEEK_END)
+
+    def close(self) -> None:
+        """
+        关闭并删除临时文件
+        """
+        self._pending = []
+        self._file.close()
+
+    def _dump(self) -> None:
+        pickle.dump(self._pending, self._file, pickle.HIGHEST_PROTOCOL)
+        self._pending = []
+        self._chunks += 1
+
+
+class SpillBuffer:
+    """
+    连接的溢写缓冲
+
+    右侧数据不超过memory_budget条时，两侧数据都保存在内存中；超过后把已缓冲的两侧数据以及
+    之后的数据按键的哈希写入partitions个临时文件分区，同一个键的两侧数据总是在同一个分区中。
+    左侧数据记录为(序号, 数据)，右侧数据记录为(序号, 数据)，序号用于在连接后恢复原有的顺序。
+
+    Attributes:
+        memory_budget (int): 内存中最多保存的右侧数据条数
+        partitions (int): 分区数
+        left_rows (List[Any]): 没有溢写时缓冲的左侧数据
+        right_rows (List[Any]): 没有溢写时缓冲的右侧数据
+        spilled (bool): 是否已经溢写到临时文件
+    """
+
+    def __init__(
+        self,
+        left_key: Callable[[Any], Any],
+        right_key: Callable[[Any], Any],
+        memory_budget: int,
+        partitions: int = 16,
+        directory: Optional[str] = None,
+    ) -> None:
+        """
+        初始化SpillBuffer实例
+
+        Args:
+            left_key (Callable): 左侧键函数
+            right_key (Callable): 右侧键函数
+            memory_budget (int): 内存中最多保存的右侧数据条数
+            partitions (int): 溢写时的分区数，默认为16
+            directory (str | None): 临时文件所在的目录，默认为None即系统临时目录
+
+        Raises:
+            ValueError: 当memory_budget或partitions小于等于0时
+        """
+        if memory_budget <= 0:
+            raise ValueError("memory_budget必须大于0")
+        if partitions <= 0:
+            raise ValueError("partitions必须大于0")
+        self.left_key = left_key
+        self.right_key = right_key
+        self.memory_budget = memory_budget
+        self.partitions = partitions
+        self.directory = directory
+        # 每个分区暂存在内存中的记录不超过memory_budget / partitions条
+        self.chunk_size = max(1, min(256, memory_budget // partitions))
+        self.left_rows: List[Any] = []
+        self.right_rows: List[Any] = []
+        self.spilled = False
+        self._left_files: List[SpillFile] = []
+        self._right_files: List[SpillFile] = []
+        self._left_count = 0
+        self._right_count = 0
+
+    def add_left(self, row: Any) -> None:
+        """
+        添加一条左侧数据
+
+        Args:
+            row (Any): 左侧数据
+        """
+        if self.spilled:
+            self._spill(self._left_files, self.left_key(row), (self._left_count, row))
+        else:
+            self.left_rows.append(row)
+        self._left_count += 1
+
+    def add_right(self, row: Any) -> None:
+        """
+        添加一条右侧数据，超过memory_budget时开始溢写
+
+        Args:
+            row (Any): 右侧数据
+        """
+        if self.spilled:
+            self._spill(
+                self._right_files, self.right_key(row), (self._right_count, row)
+            )
+        else:
+            self.right_rows.append(row)
+            if len(self.right_rows) > self.memory_budget:
+                self._start_spill()
+        self._right_count += 1
+
+    def left(self, partition: int) -> Iterator[Tuple[int, Any]]:
+        """
+        读取一个分区的左侧数据
+
+        Args:
+            partition (int): 分区序号
+
+        Returns:
+            Iterator[Tuple[int, Any]]: 按序号升序的(序号, 数据)
+        """
+        return self._left_files[partition].read()
+
+    def right(self, partition: int) -> Iterator[Tuple[int, Any]]:
+        """
+        读取一个分区的右侧数据
+
+        Args:
+            partition (int): 分区序号
+
+        Returns:
+            Iterator[Tuple[int, Any]]: 按序号升序的(序号, 数据)
+        """
+        return self._right_files[partition].read()
+
+    def spill_file(self) -> SpillFile:
+        """
+        创建与分区使用相同目录和块大小的临时文件，用于保存各分区的连接结果
+
+        Returns:
+            SpillFile: 新的临时文件
+        """
+        return SpillFile(self.directory, self.chunk_size)
+
+    def close(self) -> None:
+        """
+        删除所有临时文件
+        """
+        for spill in self._left_files + self._right_files:
+            spill.close()
+        self._left_files = []
+        self._right_files = []
+
+    def _start_spill(self) -> None:
+        self._left_files = [self.spill_file() for _ in range(self.partitions)]
+        self._right_files = [self.spill_file() for _ in range(self.partitions)]
+        self.spilled = True
+        for index, row in enumerate(self.left_rows):
+            self._spill(self._left_files, self.left_key(row), (index, row))
+        for index, row in enumerate(self.right_rows):
+            self._spill(self._right_files, self.right_key(row), (index, row))
+        self.left_rows = []
+        self.right_rows = []
+
+    def _spill(self, files: List[SpillFile], key: Any, record: Any) -> None:
+        files[hash(key) % self.partitions].write(record)
@@ -0,0 +1,262 @@
+"""
+Plan模块
+
+该模块定义了预编译的执行计划。Stream.compile会把整条链中的每个Element
+预先解析为CompiledStage，得到一个扁平的阶段列表，执行时按顺序调用即可，
+不再经过StrategyFactory.process的逐次分发。
+
+适用于同一条链被高频、反复执行，且每次输入数据量较小的场景。
+ExecutionPlan.stream则使用各阶段的惰性处理器执行，多行数据以迭代器的形式在阶段之间流动。
+ExecutionPlan.acall在当前事件循环中执行计划，协程处理函数会被等待并在阶段内并发执行。
+
+ForkPlan由Stream.fork生成，把共享前缀的多条链合并为一棵树（DAG）：
+公共的阶段只执行一次，其输出同时交给每一个分支。
+"""
+
+from typing import Any, Dict, Iterator, List, Optional
+from .element import Element
+from .strategy import CompiledStage, StrategyFactory
+from .exceptions import ProcessingError
+
+
+class ExecutionPlan:
+    """
+    预编译的执行计划
+
+    Attributes:
+        stages (List[CompiledStage]): 按执行顺序排列的预编译阶段
+    """
+
+    def __init__(self, stages: List[CompiledStage]) -> None:
+        """
+        初始化ExecutionPlan实例
+
+        Args:
+            stages (List[CompiledStage]): 预编译阶段列表，第一个阶段为init
+        """
+        self.stages = stages
+
+    def __len__(self) -> int:
+        return len(self.stages)
+
+    def __call__(self, *args: Any, **kwds: Any) -> Any:
+        """
+        执行计划
+
+        Args:
+            mode (str): 执行模式，传入"lazy"时等价于调用stream()
+
+        Returns:
+            Any: 处理结果
+
+        Raises:
+            ProcessingError: 当数据流处理过程中出现异常时
+        """
+        if kwds.get("mode") == "lazy":
+            return self.stream()
+        try:
+            data = None
+            for stage in self.stages:
+                data = stage.processor(stage, data)
+            return data
+        except Exception as e:
+            raise ProcessingError(f"数据流处理过程中出现错误: {str(e)}") from e
+
+    async def acall(self) -> Any:
+        """
+        在当前事件循环中异步执行计划
+
+        右侧函数为协程函数的阶段使用异步处理器，在事件循环中并发执行；
+        普通函数的阶段仍使用同步处理器，直接在事件循环所在的线程中执行。
+
+        Returns:
+            Any: 处理结果
+
+        Raises:
+            ProcessingError: 当数据流处理过程中出现异常时
+        """
+        try:
+            data = None
+            for stage in self.stages:
+                if stage.async_processor is None:
+                    data = stage.processor(stage, data)
+                else:
+                    data = await stage.async_processor(stage, data)
+            return data
+        except Exception as e:
+            raise ProcessingError(f"数据流处理过程中出现错误: {str(e)}") from e
+
+    def stream(self) -> Any:
+        """
+        以流式（惰性）模式执行计划
+
+        Returns:
+            Any: 最后一个阶段为收集器时返回收集结果，否则返回结果迭代器
+
+        Raises:
+            ProcessingError: 当数据流处理过程中出现异常时
+        """
+        try:
+            data = None
+            for stage in self.stages:
+                data = stage.lazy_processor(stage, data)
+        except Exception as e:
+            raise ProcessingError(f"数据流处理过程中出现错误: {str(e)}") from e
+        if isinstance(data, Iterator):
+            return self._guard(data)
+        return data
+
+    def _guard(self, rows: Iterator[Any]) -> Iterator[Any]:
+        """
+        包装结果迭代器，使迭代过程中出现的异常与立即执行时一致
+        """
+        try:
+            yield from rows
+        except Exception as e:
+            raise ProcessingError(f"数据流处理过程中出现错误: {str(e)}") from e
+
+
+class ForkNode:
+    """
+    分支执行计划中的一个节点
+
+    Attributes:
+        stages (List[CompiledStage]): 该节点上依次执行的阶段（一段没有分叉的线性路径）
+        children (List[ForkNode]): 以该节点的输出为输入的下游节点
+        names (List[str]): 以该节点的输出为结果的分支名
+    """
+
+    def __init__(self) -> None:
+        """
+        初始化ForkNode实例
+        """
+        self.stages: List[CompiledStage] = list()
+        self.children: List["ForkNode"] = list()
+        self.names: List[str] = list()
+
+
+class ForkPlan:
+    """
+    共享前缀的分支执行计划
+
+    每个分支是一条完整的链，各分支中同一位置上的同一个元素（同一个Element对象）
+    只会被执行一次，例如 sales | COUNT 和 sales | MAX 共享 sales 的全部阶段。
+
+    Attributes:
+        roots (List[ForkNode]): 根节点，通常只有一个（共享同一个Start数据源）
+        names (List[str]): 按声明顺序排列的分支名
+    """
+
+    def __init__(self, paths: Dict[str, List[Element]], fuse: bool = True) -> None:
+        """
+        初始化ForkPlan实例
+
+        Args:
+            paths (Dict[str, List[Element]]): 分支名到该分支完整元素列表的映射
+            fuse (bool): 是否融合每个节点内相邻的>和-阶段，默认为True
+
+        Raises:
+            StrategyError: 当链中存在空元素或不支持的element_type时
+        """
+        self.names = list(paths)
+        self.roots = self._build(paths, fuse)
+
+    def _build(self, paths: Dict[str, List[Element]], fuse: bool) -> List[ForkNode]:
+        """
+        把各分支的元素列表合并为前缀树，再把没有分叉的路径压缩为一个节点
+        """
+        factory = StrategyFactory()
+        # 前缀树：每个节点为 (元素, 子节点字典, 分支名列表)，子节点以元素的id为键
+        trie: Dict[int, Any] = dict()
+        for name, elements in paths.items():
+            level = trie
+            node: Optional[List[Any]] = None
+            for element in elements:
+                node = level.get(id(element))
+                if node is None:
+                    node = [element, dict(), list()]
+                    level[id(element)] = node
+                level = node[1]
+            if node is not None:
+                node[2].append(name)
+
+        def compress(node: List[Any]) -> ForkNode:
+            result = ForkNode()
+            stages: List[CompiledStage] = list()
+            while True:
+                element, children, names = node
+                stages.append(factory.compile(element))
+                if names or len(children) != 1:
+                    break
+                node = next(iter(children.values()))
+            result.stages = factory.fuse(stages) if fuse else stages
+            result.names = names
+            result.children = [compress(child) for child in children.values()]
+            return result
+
+        return [compress(root) for root in trie.values()]
+
+    def __call__(self, *args: Any, **kwds: Any) -> Dict[str, Any]:
+        """
+        执行所有分支，公共阶段只执行一次
+
+        Returns:
+            Dict[str, Any]: 分支名到该分支结果的映射，顺序与声明顺序一致
+
+        Raises:
+            ProcessingError: 当数据流处理过程中出现异常时
+        """
+        results: Dict[str, Any] = dict()
+        try:
+            for root in self.roots:
+                self._run(root, None, results)
+        except Exception as e:
+            raise ProcessingError(f"数据流处理过程中出现错误: {str(e)}") from e
+        return {name: results[name] for name in self.names}
+
+    def _run(self, node: ForkNode, data: Any, results: Dict[str, Any]) -> None:
+        for stage in node.stages:
+            data = stage.processor(stage, data)
+        data = self._share(node, data)
+        for name in node.names:
+            results[name] = data
+        for child in node.children:
+            self._run(child, data, results)
+
+    async def acall(self) -> Dict[str, Any]:
+        """
+        在当前事件循环中异步执行所有分支，规则与ExecutionPlan.acall一致
+
+        Returns:
+            Dict[str, Any]: 分支名到该分支结果的映射
+
+        Raises:
+            ProcessingError: 当数据流处理过程中出现异常时
+        """
+        results: Dict[str, Any] = dict()
+        try:
+            for root in self.roots:
+                await self._arun(root, None, results)
+        except Exception as e:
+            raise ProcessingError(f"数据流处理过程中出现错误: {str(e)}") from e
+        return {name: results[name] for name in self.names}
+
+    async def _arun(self, node: ForkNode, data: Any, results: Dict[str, Any]) -> None:
+        for stage in node.stages:
+            if stage.async_processor is None:
+                data = stage.processor(stage, data)
+            else:
+                data = await stage.async_processor(stage, data)
+        data = self._share(node, data)
+        for name in node.names:
+            results[name] = data
+        for child in node.children:
+            await self._arun(child, data, results)
+
+    def _share(self, node: ForkNode, data: Any) -> Any:
+        """
+        节点的输出会被多个下游使用时，把迭代器物化为列表，避免被第一个分支消费完
+        """
+        if isinstance(data, Iterator) and len(node.children) + len(node.names) > 1:
+            return list(data)
+        return data
@@ -0,0 +1,517 @@
+"""
+Sketch模块
+
+该模块包含近似统计收集器DISTINCT、QUANTILES和HEAVY_HITTERS使用的概率数据结构。
+它们的内存占用与数据条数无关，同一种参数的数据结构可以合并，
+因此可以分批或在多个进程中分别计算，再用merge合并为整体的结果：
+
+    total = HyperLogLog()
+    for batch in batches:
+        total.merge((Start() | load(batch) | DISTINCT("user_id", sketch=True))())
+    total.count()
+
+- HyperLogLog: 基数（不同值的数量）估计，2**precision个寄存器，相对误差约为1.04 / sqrt(2**precision)
+- KLLSketch: 分位数估计，保存O(k log(n / k))个样本，排名误差约为O(1 / k)
+- CountMinSketch: 频率估计，width * depth个计数器，同时保存估计频率最高的top个值（热点值）
+
+值的哈希使用splitmix64和blake2b而不是内置的hash，结果不受PYTHONHASHSEED影响，
+不同进程中的数据结构可以合并。
+"""
+
+import math
+import random
+from collections import Counter
+from hashlib import blake2b
+from heapq import nlargest
+from itertools import accumulate, islice
+from operator import itemgetter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# update每次处理的值的数量
+SKETCH_CHUNK_SIZE = 4096
+# KLLSketch最底层每次压缩前至少累积的值的数量
+KLL_BATCH_SIZE = 1024
+
+
+_MASK64 = (1 << 64) - 1
+
+
+def _hash64(value: Any) -> int:
+    """
+    计算值的64位哈希，相等的字符串、字节串、整数在任何进程中的哈希都相同
+
+    64位以内的非负整数使用splitmix64混合，其余的值使用blake2b。
+
+    Args:
+        value (Any): 值
+
+    Returns:
+        int: 64位哈希
+    """
+    cls = type(value)
+    if cls is int and 0 <= value <= _MASK64:
+        z: int = (value + 0x9E3779B97F4A7C15) & _MASK64
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+        return z ^ (z >> 31)
+    if cls is str:
+        data = b"s" + value.encode("utf-8")
+    elif cls is bytes:
+        data = b"b" + value
+    elif cls is int:
+        data = b"i" + str(value).encode("ascii")
+    else:
+        data = b"r" + repr(value).encode("utf-8")
+    return int.from_bytes(blake2b(data, digest_size=8).digest(), "big")
+
+
+def _chunks(values: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    source = iter(values)
+    for chunk in iter(lambda: list(islice(source, size)), []):
+        if None in chunk:
+            chunk = [value for value in chunk if value is not None]
+        yield chunk
+
+
+def _distinct(chunk: List[Any]) -> Iterable[Any]:
+    try:
+        return set(chunk)
+    except TypeError:
+        # 不可哈希的值按repr计算哈希，逐个处理
+        return chunk
+
+
+def _counted(chunk: List[Any]) -> Iterable[Tuple[Any, int]]:
+    try:
+        return Counter(chunk).items()
+    except TypeError:
+        # 不可哈希的值按repr计算哈希，逐个处理
+        return [(value, 1) for value in chunk]
+
+
+class _ReprKey:
+    """
+    不可哈希的值（如字典、列表）作为热点值候选时使用的键，按repr判断相等，与_hash64一致
+    """
+
+    __slots__ = ("value", "text")
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+        self.text = repr(value)
+
+    def __hash__(self) -> int:
+        return hash(self.text)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _ReprKey) and other.text == self.text
+
+
+def _unwrap(key: Any) -> Any:
+    return key.value if isinstance(key, _ReprKey) else key
+
+
+class HyperLogLog:
+    """
+    HyperLogLog基数估计
+
+    Attributes:
+        precision (int): 寄存器数量为2**precision
+    """
+
+    __slots__ = ("precision", "_registers")
+
+    def __init__(self, precision: int = 14) -> None:
+        """
+        初始化HyperLogLog实例
+
+        Args:
+            precision (int): 寄存器数量为2**precision，取值范围为4到18，默认为14（16KB，误差约0.8%）
+
+        Raises:
+            ValueError: 当precision不在4到18之间时
+        """
+        if not 4 <= precision <= 18:
+            raise ValueError("precision必须在4到18之间")
+        self.precision = precision
+        self._registers = bytearray(1 << precision)
+
+    def add(self, value: Any) -> None:
+        """
+        添加一个值
+
+        Args:
+            value (Any): 值，None会被忽略
+        """
+        if value is not None:
+            self.update((value,))
+
+    def update(self, values: Iterable[Any]) -> None:
+        """
+        添加多个值
+
+        Args:
+            values (Iterable[Any]): 值，None会被忽略
+        """
+        registers = self._registers
+        bits = 64 - self.precision
+        mask = (1 << bits) - 1
+        for chunk in _chunks(values, SKETCH_CHUNK_SIZE):
+            # 重复的值不改变寄存器，块内先去重
+            for value in _distinct(chunk):
+                hashed = _hash64(value)
+                rank = bits - (hashed & mask).bit_length() + 1
+                if rank > registers[hashed >> bits]:
+                    registers[hashed >> bits] = rank
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """
+        合并另一个HyperLogLog，结果等价于把两边的值添加到同一个HyperLogLog
+
+        Args:
+            other (HyperLogLog): precision相同的HyperLogLog
+
+        Returns:
+            HyperLogLog: 合并后的自身
+
+        Raises:
+            ValueError: 当precision不同时
+        """
+        if other.precision != self.precision:
+            raise ValueError("只能合并precision相同的HyperLogLog")
+        self._registers = bytearray(map(max, self._registers, other._registers))
+        return self
+
+    def count(self) -> int:
+        """
+        估计不同值的数量
+
+        Returns:
+            int: 估计的基数
+        """
+        m = len(self._registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / math.fsum(2.0**-r for r in self._registers)
+        zeros = self._registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # 小基数时使用线性计数
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+class KLLSketch:
+    """
+    KLL分位数估计
+
+    每一层的样本达到容量时排序并隔一个取一个，取出的样本进入上一层，权重翻倍。
+    数据条数不超过最底层的容量时结果是精确的。
+
+    Attributes:
+        k (int): 最上层的容量，越大越精确
+        count (int): 添加的数据条数
+    """
+
+    __slots__ = ("k", "count", "_levels", "_size", "_capacity", "_random")
+
+    def __init__(self, k: int = 200, seed: Optional[int] = None) -> None:
+        """
+        初始化KLLSketch实例
+
+        Args:
+            k (int): 最上层的容量，默认为200（排名误差约1%）
+            seed (int | None): 压缩时随机选择奇偶位置使用的种子，默认为None
+
+        Raises:
+            ValueError: 当k小于8时
+        """
+        if k < 8:
+            raise ValueError("k不能小于8")
+        self.k = k
+        self.count = 0
+        self._levels: List[List[Any]] = [[]]
+        self._size = 0
+        self._capacity = self._level_capacity(0)
+        self._random = random.Random(seed)
+
+    def _level_capacity(self, level: int) -> int:
+        depth = len(self._levels) - level - 1
+        return int(math.ceil(self.k * (2 / 3) ** depth)) + 1
+
+    def _max_size(self) -> int:
+        return sum(self._level_capacity(h) for h in range(len(self._levels)))
+
+    def add(self, value: Any) -> None:
+        """
+        添加一个值
+
+        Args:
+            value (Any): 可以比较大小的值，None会被忽略
+        """
+        if value is not None:
+            self.update((value,))
+
+    def update(self, values: Iterable[Any]) -> None:
+        """
+        添加多个值
+
+        Args:
+            values (Iterable[Any]): 可以比较大小的值，None会被忽略
+        """
+        bottom = self._levels[0]
+        source = iter(values)
+        while True:
+            # 最底层每次至少累积KLL_BATCH_SIZE个值再压缩，减少小规模排序的次数
+            room = max(self._capacity - self._size, KLL_BATCH_SIZE)
+            chunk = list(islice(source, room))
+            if not chunk:
+                break
+            if None in chunk:
+                chunk = [value for value in chunk if value is not None]
+            bottom.extend(chunk)
+            self.count += len(chunk)
+            self._size += len(chunk)
+            if self._size >= self._capacity:
+                self._compress()
+
+    def _compress(self) -> None:
+        for level in range(len(self._levels)):
+            items = self._levels[level]
+            if len(items) < self._level_capacity(level):
+                continue
+            if level + 1 == len(self._levels):
+                self._levels.append([])
+            items.sort()
+            offset = self._random.randint(0, 1)
+            self._levels[level + 1].extend(items[offset::2])
+            # 原地清空，update中保存的最底层引用仍然有效
+            del items[:]
+            self._size = sum(len(items) for items in self._levels)
+            self._capacity = self._max_size()
+            if self._size < self._capacity:
+                break
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        """
+        合并另一个KLLSketch
+
+        Args:
+            other (KLLSketch): k相同的KLLSketch
+
+        Returns:
+            KLLSketch: 合并后的自身
+
+        Raises:
+            ValueError: 当k不同时
+        """
+        if other.k != self.k:
+            raise ValueError("只能合并k相同的KLLSketch")
+        while len(self._levels) < len(other._levels):
+            self._levels.append([])
+        for level, items in enumerate(other._levels):
+            self._levels[level].extend(items)
+        self.count += other.count
+        self._size = sum(len(items) for items in self._levels)
+        self._capacity = self._max_size()
+        while self._size >= self._capacity:
+            self._compress()
+        return self
+
+    def quantiles(self, qs: Iterable[float]) -> List[Any]:
+        """
+        估计多个分位数
+
+        Args:
+            qs (Iterable[float]): 0到1之间的分位点
+
+        Returns:
+            List[Any]: 与分位点一一对应的估计值，没有数据时为None
+
+        Raises:
+            ValueError: 当分位点不在0到1之间时
+        """
+        qs = list(qs)
+        if any(not 0 <= q <= 1 for q in qs):
+            raise ValueError("分位点必须在0到1之间")
+        samples = sorted(
+            (value, 1 << level)
+            for level, items in enumerate(self._levels)
+            for value in items
+        )
+        if not samples:
+            return [None for _ in qs]
+        weights = list(accumulate(weight for _, weight in samples))
+        total = weights[-1]
+        result = []
+        for q in qs:
+            # 第一个累计权重达到q * total的样本，与按排序后的位置取分位数一致
+            target = max(1, math.ceil(q * total))
+            low, high = 0, len(weights) - 1
+            while low < high:
+                middle = (low + high) // 2
+                if weights[middle] < target:
+                    low = middle + 1
+                else:
+                    high = middle
+            result.append(samples[low][0])
+        return result
+
+    def quantile(self, q: float) -> Any:
+        """
+        估计一个分位数
+
+        Args:
+            q (float): 0到1之间的分位点，例如0.99
+
+        Returns:
+            Any: 估计值，没有数据时为None
+        """
+        return self.quantiles([q])[0]
+
+
+class CountMinSketch:
+    """
+    Count-Min频率估计以及热点值
+
+    估计的频率不会小于真实频率，高估的部分不超过总数的e / width（概率1 - e**-depth）。
+
+    Attributes:
+        width (int): 每一行的计数器数量
+        depth (int): 行数
+        top (int): 保留的热点值数量
+        total (int): 添加的总次数
+    """
+
+    __slots__ = ("width", "depth", "top", "total", "_table", "_candidates", "_floor")
+
+    def __init__(self, width: int = 2048, depth: int = 5, top: int = 10) -> None:
+        """
+        初始化CountMinSketch实例
+
+        Args:
+            width (int): 每一行的计数器数量，默认为2048
+            depth (int): 行数，默认为5
+            top (int): 保留的热点值数量，默认为10
+
+        Raises:
+            ValueError: 当参数小于等于0时
+        """
+        if width <= 0 or depth <= 0 or top <= 0:
+            raise ValueError("width、depth和top必须大于0")
+        self.width = width
+        self.depth = depth
+        self.top = top
+        self.total = 0
+        self._table = [[0] * width for _ in range(depth)]
+        # 热点值的候选，最多保存top * 2个，值 -> 估计频率
+        self._candidates: Dict[Any, int] = dict()
+        # 候选已满时的最低估计频率，不超过它的值不会成为候选
+        self._floor = 0
+
+    def _columns(self, value: Any) -> List[int]:
+        hashed = _hash64(value)
+        column, step = hashed >> 32, (hashed & 0xFFFFFFFF) | 1
+        return [(column + row * step) % self.width for row in range(self.depth)]
+
+    def add(self, value: Any, count: int = 1) -> None:
+        """
+        添加一个值
+
+        Args:
+            value (Any): 值，None会被忽略；不可哈希的值按repr区分
+            count (int): 次数，默认为1
+        """
+        if value is None:
+            return
+        self.total += count
+        width = self.width
+        hashed = _hash64(value)
+        column, step = hashed >> 32, (hashed & 0xFFFFFFFF) | 1
+        estimate = -1
+        for row in self._table:
+            # 与_columns相同的双重哈希
+            index = column % width
+            row[index] += count
+            if estimate < 0 or row[index] < estimate:
+                estimate = row[index]
+            column += step
+        candidates = self._candidates
+        key = value
+        try:
+            present = key in candidates
+        except TypeError:
+            key = _ReprKey(value)
+            present = key in candidates
+        if present:
+            candidates[key] = estimate
+        elif len(candidates) < self.top * 2:
+            candidates[key] = estimate
+            if len(candidates) == self.top * 2:
+                self._floor = min(candidates.values())
+        elif estimate > self._floor:
+            # 候选已满时只保留估计频率最高的top个
+            kept = nlargest(self.top, candidates.items(), key=itemgetter(1))
+            self._candidates = dict(kept)
+            self._candidates[key] = estimate
+
+    def update(self, values: Iterable[Any]) -> None:
+        """
+        添加多个值
+
+        Args:
+            values (Iterable[Any]): 值，None会被忽略；不可哈希的值按repr区分
+        """
+        for chunk in _chunks(values, SKETCH_CHUNK_SIZE):
+            # 块内先计数，每个不同的值只计算一次哈希
+            for value, count in _counted(chunk):
+                self.add(value, count)
+
+    def estimate(self, value: Any) -> int:
+        """
+        估计一个值的频率
+
+        Args:
+            value (Any): 值
+
+        Returns:
+            int: 估计的频率，不小于真实频率
+        """
+        return min(
+            row[column] for row, column in zip(self._table, self._columns(value))
+        )
+
+    def merge(self, other: "CountMinSketch") -> "CountMinSketch":
+        """
+        合并另一个CountMinSketch
+
+        Args:
+            other (CountMinSketch): width和depth相同的CountMinSketch
+
+        Returns:
+            CountMinSketch: 合并后的自身
+
+        Raises:
+            ValueError: 当width或depth不同时
+        """
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("只能合并width和depth相同的CountMinSketch")
+        for row, other_row in zip(self._table, other._table):
+            row[:] = map(int.__add__, row, other_row)
+        self.total += other.total
+        keys = set(self._candidates) | set(other._candidates)
+        estimates = {key: self.estimate(_unwrap(key)) for key in keys}
+        kept = nlargest(self.top * 2, estimates.items(), key=itemgetter(1))
+        self._candidates = dict(kept)
+        self._floor = min(self._candidates.values()) if kept else 0
+        return self
+
+    def heavy_hitters(self) -> List[Tuple[Any, int]]:
+        """
+        估计频率最高的top个值
+
+        Returns:
+            List[Tuple[Any, int]]: (值, 估计频率)，按估计频率降序
+        """
+        estimates = [
+            (value, self.estimate(value)) for value in map(_unwrap, self._candidates)
+        ]
+        return nlargest(self.top, estimates, key=itemgetter(1))
@@ -10,15 +10,238 @@ StrategyFactory采用单例模式，确保整个应用中只有一个策略工
 - multi: 批处理策略
 - left_join: 左连接策略
 - all_join: 全连接策略
+- inner_join: 内连接策略
+- semi_join: 半连接策略，只保留右侧存在匹配的左侧数据
+- anti_join: 反连接策略，只保留右侧不存在匹配的左侧数据
 - filter: 过滤策略
 - merge: 合并策略
+
+单条处理函数声明了默认参数workers(大于1)时，会通过共享线程池并发执行，见concurrency模块。
+
+async_processor中注册了各个策略的异步版本，供ExecutionPlan.acall使用：
+右侧函数为协程函数时在当前事件循环中并发执行，普通函数仍使用同步处理器。
+
+左连接(*)和内连接(@)默认使用哈希连接，需要为右侧建立完整的索引；连接函数声明
+algorithm="merge"（或同时声明left_sorted=True和right_sorted=True）时改用排序合并连接，
+两侧数据按键升序流式合并，只保留当前键对应的右侧数据。
+
+左连接和内连接的连接函数声明right_range（返回右侧数据的(start, end)区间）而不是right_key时，
+使用范围连接：右侧数据建立RangeIndex，每条左侧数据按left_key的值二分查找所在的区间。
+
+连接函数声明memory_budget时，右侧数据超过该条数后使用Grace哈希连接：两侧数据按键的哈希
+分区写入临时文件，再逐个分区连接，最后按原有顺序合并，结果与内存中的连接相同。
+
+&右侧为BroadcastTable时为广播连接：右侧数据和索引只构建一次，被所有调用共享，
+连接时直接用左侧数据探测共享的索引。
+
+除了逐次分发的process方法外，StrategyFactory.compile可以把Element预先解析为
+CompiledStage：处理器、stream_size以及连接条件都只解析一次，适合同一条链被反复执行的场景。
 """
 
-from typing import Any, Callable, Dict, List, Tuple, Union, Optional
+import heapq
+import inspect
+import threading
+from itertools import chain, groupby, tee
+from operator import itemgetter
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Container,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Set,
+    Tuple,
+    Union,
+    Optional,
+)
 from .element import Element
-from .utils import batch_process_data, get_join_condition, mapping, group_by
-from .validators import validate_join_conditions
-from .exceptions import StrategyError, ProcessingError, JoinError
+from .utils import (
+    abatch_process_data,
+    batch_process_data,
+    get_default_values,
+    get_join_condition,
+    get_stream_size,
+    is_rows,
+    iter_batches,
+    iter_key_batches,
+    mapping,
+    group_by,
+)
+from .concurrency import (
+    DEFAULT_PROCESS_CHUNK_SIZE,
+    async_map,
+    ensure_picklable,
+    parallel_map,
+    process_batches,
+    process_map,
+)
+from .join import BroadcastTable, MergedRow, RangeIndex, SpillBuffer, SpillFile
+from .validators import (
+    validate_join_algorithm,
+    validate_join_cache,
+    validate_join_conditions,
+)
+from .exceptions import AntChainError, StrategyError, ProcessingError, JoinError
+
+
+class CompiledStage:
+    """
+    预编译的处理阶段
+
+    由StrategyFactory.compile生成，保存了绑定好的处理器以及预先解析出的
+    stream_size和连接条件，执行时不再查找处理器，也不再调用inspect.signature。
+
+    Attributes:
+        element_type (str): 元素类型
+        right_func (Callable | None): 右侧处理函数
+        join_func (Callable | None): 连接函数
+        processor (Callable): 绑定好的处理器
+        lazy_processor (Callable): 绑定好的惰性处理器，用于流式执行
+        async_processor (Callable | None): 绑定好的异步处理器，为None时acall使用processor
+        options (Dict[str, Any]): right_func上所有带默认值的参数
+        stream_size (int): 预先解析的批次大小
+        lazy (bool): right_func是否声明了lazy=True，即可以直接消费迭代器
+        workers (int): right_func上声明的并发数，大于1时单条处理使用共享线程池
+        ordered (bool): 并发执行时是否保持输入顺序
+        processes (int): right_func上声明的进程并发数，大于0时使用共享进程池
+        stream_concurrency (int): right_func上声明的切片并发数，大于1时并发调用各个切片
+        distinct_keys (bool): 连接右侧函数是否声明了distinct_keys=True，即只接收去重后的键
+        join_condition (tuple | None): 预先解析的连接条件
+            (left_key, right_key, left_property, one_to_many)
+        is_async (bool): right_func是否为协程函数或异步生成器函数
+        join_options (Dict[str, Any]): join_func上所有带默认值的参数
+        cache (JoinCache | None): join_func上声明的右侧数据缓存
+    """
+
+    def __init__(
+        self,
+        element: Element,
+        processor: Callable[..., Any],
+        lazy_processor: Optional[Callable[..., Any]] = None,
+        options: Optional[Dict[str, Any]] = None,
+        join_condition: Optional[Tuple[Any, Any, Any, Any]] = None,
+        async_processor: Optional[Callable[..., Any]] = None,
+        join_options: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        初始化CompiledStage实例
+
+        Args:
+            element (Element): 原始元素
+            processor (Callable): 绑定好的处理器
+            lazy_processor (Callable | None): 惰性处理器，为None时使用processor
+            options (Dict[str, Any] | None): right_func上带默认值的参数
+            join_condition (tuple | None): 连接条件，默认为None
+            async_processor (Callable | None): 异步处理器，默认为None
+            join_options (Dict[str, Any] | None): join_func上带默认值的参数
+        """
+        self.element_type = element.element_type
+        self.right_func = element.right_func
+        self.join_func = element.join_func
+        self.processor = processor
+        self.lazy_processor = lazy_processor or processor
+        self.options = options or {}
+        self.stream_size: int = self.options.get("stream_size") or 0
+        self.lazy = bool(self.options.get("lazy"))
+        self.workers: int = self.options.get("workers") or 0
+        self.ordered = bool(self.options.get("ordered", True))
+        self.processes: int = self.options.get("processes") or 0
+        self.stream_concurrency: int = self.options.get("stream_concurrency") or 0
+        self.distinct_keys = bool(self.options.get("distinct_keys"))
+        self.join_condition = join_condition
+        self.async_processor = async_processor
+        self.is_async = is_async_function(self.right_func)
+        self.join_options = join_options or {}
+        self.cache = self.join_options.get("cache")
+
+    def __call__(self, left_data: Any) -> Any:
+        """
+        执行该阶段
+
+        Args:
+            left_data (Any): 左侧数据
+
+        Returns:
+            Any: 处理结果
+        """
+        return self.processor(self, left_data)
+
+    def __repr__(self) -> str:
+        name = getattr(self.right_func, "__name__", repr(self.right_func))
+        return f"CompiledStage({self.element_type}, {name})"
+
+
+class FusedStage(CompiledStage):
+    """
+    融合后的处理阶段
+
+    由StrategyFactory.fuse把相邻的单条处理(one)和过滤(filter)阶段合并而成，
+    每条数据在一次遍历中依次经过所有函数，被过滤掉的数据不会再进入后续函数。
+
+    Attributes:
+        steps (Tuple[tuple, ...]): 每一步为(is_filter, func, index, name)，
+            index为该步在整条链中的阶段序号（从1开始），用于异常信息
+    """
+
+    def __init__(
+        self,
+        stages: List[CompiledStage],
+        first_index: int,
+        processor: Callable[..., Any],
+        lazy_processor: Callable[..., Any],
+    ) -> None:
+        """
+        初始化FusedStage实例
+
+        Args:
+            stages (List[CompiledStage]): 被融合的one/filter阶段
+            first_index (int): 第一个被融合阶段在整条链中的序号
+            processor (Callable): 融合处理器
+            lazy_processor (Callable): 惰性融合处理器
+        """
+        super().__init__(Element(element_type="fused"), processor, lazy_processor)
+        self.steps: Tuple[Tuple[Any, ...], ...] = tuple(
+            (
+                stage.element_type == "filter",
+                stage.right_func,
+                first_index + offset,
+                getattr(stage.right_func, "__name__", repr(stage.right_func)),
+            )
+            for offset, stage in enumerate(stages)
+        )
+
+    def __repr__(self) -> str:
+        names = ", ".join(step[3] for step in self.steps)
+        return f"FusedStage({names})"
+
+
+def is_async_function(func: Any) -> bool:
+    """
+    判断函数是否为协程函数或异步生成器函数
+
+    Args:
+        func (Any): 要检查的函数
+
+    Returns:
+        bool: 是否需要在事件循环中执行
+    """
+    return func is not None and (
+        inspect.iscoroutinefunction(func) or inspect.isasyncgenfunction(func)
+    )
+
+
+# 融合阶段中被过滤掉的数据的标记
+_DROPPED = object()
+# StrategyFactory.process没有传入左侧数据的标记（None也是合法的左侧数据）
+_NO_DATA = object()
+# 排序合并连接的右侧函数没有声明stream_size时，每次传入的左侧数据（或去重后的键）条数
+MERGE_JOIN_BATCH_SIZE = 1024
+
+# 处理器既可以接收原始Element，也可以接收预编译的CompiledStage
+AnyElement = Union[Element, CompiledStage]
 
 
 class StrategyFactory:
@@ -31,38 +254,75 @@ class StrategyFactory:
 
     # 类属性：存储唯一实例（初始为 None）
     _instance: Optional["StrategyFactory"] = None
+    # 保证多个线程同时第一次创建工厂时只初始化一次
+    _lock = threading.Lock()
 
     def __init__(self) -> None:
         """
         初始化策略工厂
 
-        初始化时会创建各种处理策略的映射表。
-        """
-        # 若需确保初始化逻辑只执行一次，可加判断
-        if not hasattr(self, "_initialized"):
-            # 你的初始化代码（如加载配置、创建资源等）
-            self._initialized = True  # 标记已初始化
-            self.processor: Dict[str, Callable[..., Any]] = dict()
-            self.processor["one"] = self.one
-            self.processor["init"] = self.init
-            self.processor["multi"] = self.multi
-            self.processor["left_join"] = self.left_join
-            self.processor["all_join"] = self.all_join
-            self.processor["filter"] = self.filter
-            self.processor["merge"] = self.merge
+        各种处理策略的映射表在__new__中第一次创建实例时注册，这里不再重复初始化。
+        """
 
     # 重写 __new__ 方法，控制实例创建
     def __new__(cls, *args: Any, **kwargs: Any) -> "StrategyFactory":
         """
         创建策略工厂实例，确保单例模式
 
+        实例在加锁后创建并完成初始化，之后才对其他线程可见，
+        因此多个线程同时第一次创建工厂时不会拿到未初始化完成的实例。
+
         Returns:
             StrategyFactory: 策略工厂实例
         """
         # 如果实例不存在，创建并返回；否则直接返回已有实例
-        if not cls._instance:
-            cls._instance = super().__new__(cls, *args, **kwargs)
-        return cls._instance
+        instance = cls._instance
+        if instance is None:
+            with cls._lock:
+                instance = cls._instance
+                if instance is None:
+                    instance = super().__new__(cls, *args, **kwargs)
+                    instance._register()
+                    cls._instance = instance
+        return instance
+
+    def _register(self) -> None:
+        """
+        创建各种处理策略的映射表
+        """
+        self.processor: Dict[str, Callable[..., Any]] = dict()
+        self.processor["one"] = self.one
+        self.processor["init"] = self.init
+        self.processor["multi"] = self.multi
+        self.processor["left_join"] = self.left_join
+        self.processor["all_join"] = self.all_join
+        self.processor["inner_join"] = self.inner_join
+        self.processor["semi_join"] = self.semi_join
+        self.processor["anti_join"] = self.anti_join
+        self.processor["filter"] = self.filter
+        self.processor["merge"] = self.merge
+        self.processor["fused"] = self.fused
+        # 惰性处理器：以迭代器在阶段之间传递数据，未注册的类型会先物化再使用processor
+        self.lazy_processor: Dict[str, Callable[..., Any]] = dict()
+        self.lazy_processor["one"] = self.lazy_one
+        self.lazy_processor["multi"] = self.lazy_multi
+        self.lazy_processor["filter"] = self.lazy_filter
+        self.lazy_processor["merge"] = self.lazy_merge
+        self.lazy_processor["fused"] = self.lazy_fused
+        self.lazy_processor["left_join"] = self.lazy_left_join
+        self.lazy_processor["inner_join"] = self.lazy_inner_join
+        # 异步处理器：右侧函数为协程函数时使用，init总是使用异步处理器以支持异步数据源
+        self.async_processor: Dict[str, Callable[..., Any]] = dict()
+        self.async_processor["init"] = self.ainit
+        self.async_processor["one"] = self.aone
+        self.async_processor["multi"] = self.amulti
+        self.async_processor["left_join"] = self.aleft_join
+        self.async_processor["all_join"] = self.aall_join
+        self.async_processor["inner_join"] = self.ainner_join
+        self.async_processor["semi_join"] = self.asemi_join
+        self.async_processor["anti_join"] = self.aanti_join
+        self.async_processor["filter"] = self.afilter
+        self.async_processor["merge"] = self.amerge
 
     def get_processor(self, element_type: str) -> Union[Callable[..., Any], None]:
         """
@@ -77,12 +337,15 @@ class StrategyFactory:
         return self.processor[element_type] if element_type in self.processor else None
 
     @staticmethod
-    def process(element: Element) -> Any:
+    def process(element: Element, left_data: Any = _NO_DATA) -> Any:
         """
         处理Element元素
 
+        数据通过参数传入，不会写入Element，因此同一个Element可以被多个线程同时处理。
+
         Args:
             element (Element): 要处理的元素
+            left_data (Any): 左侧数据，未传入时使用element.left_data
 
         Returns:
             Any: 处理结果
@@ -98,16 +361,112 @@ class StrategyFactory:
             processor = factory.get_processor(element.element_type)
             if processor is None:
                 raise StrategyError("不支持的element_type:" + element.element_type)
-            left_data = element.left_data
-            element.left_data = None
+            if left_data is _NO_DATA:
+                left_data = element.left_data
             return processor(element, left_data)
 
-    def init(self, element: Element, left_data: Any) -> Any:
+    def compile(self, element: Element) -> CompiledStage:
+        """
+        把Element预编译为CompiledStage
+
+        处理器和惰性处理器在此处绑定，right_func上的默认参数(stream_size、lazy等)
+        和join_func上的连接条件也在此处解析，之后每次执行都直接使用这些结果。
+
+        Args:
+            element (Element): 要编译的元素
+
+        Returns:
+            CompiledStage: 预编译的处理阶段
+
+        Raises:
+            StrategyError: 当element为空或不支持的element_type时
+            ValidationError: 当声明了processes的函数无法被pickle序列化，或cache不合法时
+        """
+        if element is None:
+            raise StrategyError("element 不能为空")
+        processor = self.get_processor(element.element_type)
+        if processor is None:
+            raise StrategyError("不支持的element_type:" + element.element_type)
+        options: Dict[str, Any] = dict()
+        if element.right_func is not None and element.element_type != "init":
+            options = get_default_values(element.right_func)
+        if options.get("processes") and element.element_type in ("one", "multi"):
+            # 不能被序列化的函数（如lambda）在编译时就报错，而不是等到执行时
+            ensure_picklable(element.right_func)  # type: ignore
+        join_condition = None
+        join_options: Dict[str, Any] = dict()
+        if element.join_func is not None:
+            join_condition = get_join_condition(element.join_func)
+            join_options = get_default_values(element.join_func)
+            validate_join_cache(join_options.get("cache"))
+            validate_join_algorithm(join_options.get("algorithm"))
+        async_processor = None
+        if element.element_type == "init" or is_async_function(element.right_func):
+            async_processor = self.async_processor.get(element.element_type)
+        return CompiledStage(
+            element,
+            processor,
+            self.lazy_processor.get(element.element_type, self.lazy_materialize),
+            options,
+            join_condition,
+            async_processor,
+            join_options,
+        )
+
+    def fuse(self, stages: List[CompiledStage]) -> List[CompiledStage]:
+        """
+        融合相邻的单条处理(one)和过滤(filter)阶段
+
+        例如 init | (DATA > f) | (DATA > g) | (DATA - h) 中的三个阶段会被融合为一个FusedStage，
+        数据只遍历一次，也不会再生成中间列表。单独出现的one/filter阶段保持不变。
+
+        Args:
+            stages (List[CompiledStage]): 按执行顺序排列的预编译阶段
+
+        Returns:
+            List[CompiledStage]: 融合后的阶段列表
+        """
+        result: List[CompiledStage] = list()
+        run: List[CompiledStage] = list()
+        run_start = 0
+        for index, stage in enumerate(stages, start=1):
+            if self._fusible(stage):
+                if not run:
+                    run_start = index
+                run.append(stage)
+                continue
+            self._flush_run(result, run, run_start)
+            run = list()
+            result.append(stage)
+        self._flush_run(result, run, run_start)
+        return result
+
+    def _fusible(self, stage: CompiledStage) -> bool:
+        """
+        判断阶段是否可以参与融合
+        """
+        if stage.right_func is None or stage.element_type not in ("one", "filter"):
+            return False
+        # 并发执行的单条处理阶段和协程函数需要独立调度，不参与融合
+        return stage.workers <= 1 and stage.processes <= 0 and not stage.is_async
+
+    def _flush_run(
+        self, result: List[CompiledStage], run: List[CompiledStage], run_start: int
+    ) -> None:
+        """
+        把一段连续的可融合阶段写入结果，只有一个阶段时不做融合
+        """
+        if len(run) > 1:
+            result.append(FusedStage(run, run_start, self.fused, self.lazy_fused))
+        else:
+            result.extend(run)
+
+    def init(self, element: AnyElement, left_data: Any) -> Any:
         """
         初始化策略
 
         Args:
-            element (Element): 元素
+            element (AnyElement): 元素或预编译阶段
             left_data (Any): 左侧数据
 
         Returns:
@@ -124,12 +483,12 @@ class StrategyFactory:
         except Exception as e:
             raise ProcessingError(f"初始化函数执行失败: {str(e)}") from e
 
-    def one(self, element: Element, left_data: Any) -> List[Any]:
+    def one(self, element: AnyElement, left_data: Any) -> List[Any]:
         """
         单条处理策略
 
         Args:
-            element (Element): 元素
+            element (AnyElement): 元素或预编译阶段
             left_data (Any): 左侧数据
 
         Returns:
@@ -137,26 +496,44 @@ class StrategyFactory:
 
         Raises:
             StrategyError: 当right_func为空时
+            ValidationError: 当声明了processes的函数无法被pickle序列化时
             ProcessingError: 当处理函数执行失败时
         """
         if element.right_func is None:
             raise StrategyError("right_func 不能为空")
+        workers, ordered = self._workers(element)
+        processes = self._processes(element)
+        if processes > 0:
+            ensure_picklable(element.right_func)
         try:
             if left_data is None:
                 return [element.right_func(None)]
             if isinstance(left_data, list) or isinstance(left_data, tuple):
+                if processes > 0:
+                    return list(
+                        self._process_one(
+                            element.right_func,
+                            left_data,
+                            processes,
+                            self._chunk_size(element, left_data, processes),
+                        )
+                    )
+                if workers > 1:
+                    return list(
+                        parallel_map(element.right_func, left_data, workers, ordered)
+                    )
                 return [element.right_func(item) for item in left_data]
             else:
                 return [element.right_func(left_data)]
         except Exception as e:
             raise ProcessingError(f"单条处理函数执行失败: {str(e)}") from e
 
-    def multi(self, element: Element, left_data: Any) -> Any:
+    def multi(self, element: AnyElement, left_data: Any) -> Any:
         """
         批处理策略
 
         Args:
-            element (Element): 元素
+            element (AnyElement): 元素或预编译阶段
             left_data (Any): 左侧数据
 
         Returns:
@@ -164,26 +541,42 @@ class StrategyFactory:
 
         Raises:
             StrategyError: 当right_func为空时
+            ValidationError: 当声明了processes的函数无法被pickle序列化时
             ProcessingError: 当批处理函数执行失败时
         """
         if element.right_func is None:
             raise StrategyError("right_func 不能为空")
+        processes = self._processes(element)
+        if processes > 0:
+            ensure_picklable(element.right_func)
         try:
             if left_data is None:
                 return element.right_func(None)
             if isinstance(left_data, list) or isinstance(left_data, tuple):
-                return batch_process_data(left_data, element.right_func, wrap_result=False)  # type: ignore
+                if processes > 0:
+                    return self._process_multi(
+                        element.right_func,
+                        left_data,
+                        processes,
+                        self._stream_size(element),
+                    )
+                return batch_process_data(
+                    left_data,
+                    element.right_func,
+                    wrap_result=False,
+                    **self._batch_options(element),
+                )
             else:
                 return element.right_func(left_data)
         except Exception as e:
             raise ProcessingError(f"批处理函数执行失败: {str(e)}") from e
 
-    def left_join(self, element: Element, left_data: Any) -> List[Any]:
+    def left_join(self, element: AnyElement, left_data: Any) -> List[Any]:
         """
         左连接策略
 
         Args:
-            element (Element): 元素
+            element (AnyElement): 元素或预编译阶段
             left_data (Any): 左侧数据
 
         Returns:
@@ -195,36 +588,72 @@ class StrategyFactory:
         if element.join_func is None:
             raise JoinError("* 运算符的右边不能为空")
         try:
+            right_range = self._right_range(element)
+            if right_range is not None:
+                # 范围连接：left_key的值落在right_range返回的区间内即视为匹配
+                condition = self._range_check(element, right_range)
+                if left_data is None or len(left_data) == 0:
+                    return []
+                right_data = self._fetch_right(element, left_data, condition[0])
+                return self._range_join_rows(
+                    left_data, right_data, condition, self._row_view(element)
+                )
             # 拿到 * 后面的join条件信息
             left_key, right_key, left_property, one_to_many = self._join_check(
                 element, left_data
             )
             if left_data is None or len(left_data) == 0:
                 return []
-            r_func = element.right_func
-            # 批处理,拿到右侧数据
-            right_data = batch_process_data(left_data, r_func)  # type: ignore
-            if right_data is None or len(right_data) == 0:
-                return list(left_data) if isinstance(left_data, tuple) else left_data
-            # 连接左右两边的数据
-            result = self._left_join_merge(
+            table = self._broadcast(element)
+            if table is not None:
+                return self._join_probe(
+                    left_data,
+                    table.index(right_key, one_to_many),
+                    left_key,
+                    left_property,
+                    self._row_view(element),
+                )
+            if self._join_algorithm(element) == "merge":
+                return list(
+                    self._merge_join(
+                        element,
+                        left_data,
+                        left_key,
+                        right_key,
+                        left_property,
+                        one_to_many,
+                    )
+                )
+            if self._memory_budget(element):
+                return list(
+                    self._grace_join(
+                        element,
+                        left_data,
+                        left_key,
+                        right_key,
+                        left_property,
+                        one_to_many,
+                    )
+                )
+            right_data = self._join_right(element, left_data, left_key, right_key)
+            return self._left_join_rows(
                 left_data,
-                one_to_many,
                 right_data,
                 left_key,
                 right_key,
                 left_property,
+                one_to_many,
+                self._row_view(element),
             )
-            return result
         except Exception as e:
             raise JoinError(f"左连接操作失败: {str(e)}") from e
 
-    def all_join(self, element: Element, left_data: Any) -> List[Any]:
+    def inner_join(self, element: AnyElement, left_data: Any) -> List[Any]:
         """
-        全连接策略
+        内连接策略，只保留在右侧有匹配的左侧数据，合并方式与左连接相同
 
         Args:
-            element (Element): 元素
+            element (AnyElement): 元素或预编译阶段
             left_data (Any): 左侧数据
 
         Returns:
@@ -234,197 +663,2372 @@ class StrategyFactory:
             JoinError: 当连接函数或条件不满足时
         """
         if element.join_func is None:
-            raise JoinError("** 运算符的右边不能为空")
+            raise JoinError("@ 运算符的右边不能为空")
         try:
+            right_range = self._right_range(element)
+            if right_range is not None:
+                # 范围连接：left_key的值落在right_range返回的区间内即视为匹配
+                condition = self._range_check(element, right_range)
+                if left_data is None or len(left_data) == 0:
+                    return []
+                right_data = self._fetch_right(element, left_data, condition[0])
+                return self._range_join_rows(
+                    left_data,
+                    right_data,
+                    condition,
+                    self._row_view(element),
+                    inner=True,
+                )
             left_key, right_key, left_property, one_to_many = self._join_check(
                 element, left_data
             )
-            r_func = element.right_func
-            # 批处理,拿到右侧数据
-            right_data = batch_process_data(left_data, r_func)  # type: ignore
-            if right_data is None or len(right_data) == 0:
-                if left_data is None or len(left_data) == 0:
-                    return []
-                else:
-                    return (
-                        list(left_data) if isinstance(left_data, tuple) else left_data
+            if left_data is None or len(left_data) == 0:
+                return []
+            table = self._broadcast(element)
+            if table is not None:
+                return self._join_probe(
+                    left_data,
+                    table.index(right_key, one_to_many),
+                    left_key,
+                    left_property,
+                    self._row_view(element),
+                    inner=True,
+                )
+            if self._join_algorithm(element) == "merge":
+                return list(
+                    self._merge_join(
+                        element,
+                        left_data,
+                        left_key,
+                        right_key,
+                        left_property,
+                        one_to_many,
+                        inner=True,
+                    )
+                )
+            if self._memory_budget(element):
+                return list(
+                    self._grace_join(
+                        element,
+                        left_data,
+                        left_key,
+                        right_key,
+                        left_property,
+                        one_to_many,
+                        inner=True,
                     )
-            # 连接左右两边的数据
-            result = self._left_join_merge(
+                )
+            right_data = self._join_right(element, left_data, left_key, right_key)
+            return self._inner_join_rows(
                 left_data,
-                one_to_many,
                 right_data,
                 left_key,
                 right_key,
                 left_property,
+                one_to_many,
+                self._row_view(element),
             )
-            right_data_dict: Dict[Any, Any] = dict()
-            # 转换右边为字段,一对多转换为dict[key,list],一对一转换为dict[key,dict]
-            if one_to_many:
-                right_data_dict = group_by(right_data, right_key)
-            else:
-                right_data_dict = mapping(right_data, right_key)
-            # 转换左边为dict
-            left_data_dict = mapping(left_data, left_key)
-            # 循环右边
-            for r_k, item in right_data_dict.items():
-                # 不在左边的数据,需要插入到结果中,并且这部分数据不用管left_property
-                if r_k not in left_data_dict:
-                    if isinstance(item, list):
-                        for i in item:
-                            result.append(i)
-                    elif isinstance(item, tuple):
-                        result.extend(list(item))
-                    else:
-                        result.append(item)
-            return result
         except Exception as e:
-            raise JoinError(f"全连接操作失败: {str(e)}") from e
+            raise JoinError(f"内连接操作失败: {str(e)}") from e
 
-    def merge(self, element: Element, left_data: Any) -> List[Any]:
+    def semi_join(self, element: AnyElement, left_data: Any) -> List[Any]:
         """
-        合并策略
+        半连接策略，只保留在右侧存在匹配键的左侧数据，不合并右侧数据
 
         Args:
-            element (Element): 元素
+            element (AnyElement): 元素或预编译阶段
             left_data (Any): 左侧数据
 
         Returns:
-            List[Any]: 合并结果
+            List[Any]: 原样保留的左侧数据
 
         Raises:
-            StrategyError: 当right_func为空时
-            ProcessingError: 当合并函数执行失败时
+            JoinError: 当连接函数或条件不满足时
         """
-        if element.right_func is None:
-            raise StrategyError("right_func 不能为空")
+        if element.join_func is None:
+            raise JoinError("% 运算符的右边不能为空")
         try:
-            result: List[Any] = list()
-            data = element.right_func()
-            if isinstance(data, list) or isinstance(data, tuple):
-                result.extend(data)
-            else:
-                result.append(data)
-            if left_data is None:
-                return result
-            elif isinstance(left_data, list) or isinstance(left_data, tuple):
-                # 将左侧数据转换为列表进行合并
-                left_list = (
-                    list(left_data) if isinstance(left_data, tuple) else left_data
+            left_key, right_key = self._join_keys(element)
+            if left_data is None or len(left_data) == 0:
+                return []
+            table = self._broadcast(element)
+            if table is not None:
+                return self._semi_probe(
+                    left_data, table.index(right_key, False), left_key
                 )
-                result = left_list + result
-            else:
-                result.insert(0, left_data)
-            return result
+            right_data = self._join_right(element, left_data, left_key, right_key)
+            return self._semi_join_rows(left_data, right_data, left_key, right_key)
         except Exception as e:
-            raise ProcessingError(f"合并操作失败: {str(e)}") from e
+            raise JoinError(f"半连接操作失败: {str(e)}") from e
 
-    def filter(self, element: Element, left_data: Any) -> List[Any]:
+    def anti_join(self, element: AnyElement, left_data: Any) -> List[Any]:
         """
-        过滤策略
+        反连接策略，只保留在右侧不存在匹配键的左侧数据
 
         Args:
-            element (Element): 元素
+            element (AnyElement): 元素或预编译阶段
             left_data (Any): 左侧数据
 
         Returns:
-            List[Any]: 过滤结果
+            List[Any]: 原样保留的左侧数据
 
         Raises:
-            StrategyError: 当right_func为空时
-            ProcessingError: 当过滤函数执行失败时
+            JoinError: 当连接函数或条件不满足时
         """
-        if element.right_func is None:
-            raise StrategyError("right_func 不能为空")
+        if element.join_func is None:
+            raise JoinError("^ 运算符的右边不能为空")
         try:
-            if left_data is None:
+            left_key, right_key = self._join_keys(element)
+            if left_data is None or len(left_data) == 0:
                 return []
-            if isinstance(left_data, list) or isinstance(left_data, tuple):
-                result: List[Any] = list()
-                for data in left_data:
-                    if element.right_func(data):
-                        result.append(data)
-                return result
-            return []
+            table = self._broadcast(element)
+            if table is not None:
+                return self._semi_probe(
+                    left_data, table.index(right_key, False), left_key, anti=True
+                )
+            right_data = self._join_right(element, left_data, left_key, right_key)
+            return self._semi_join_rows(
+                left_data, right_data, left_key, right_key, anti=True
+            )
         except Exception as e:
-            raise ProcessingError(f"过滤操作失败: {str(e)}") from e
+            raise JoinError(f"反连接操作失败: {str(e)}") from e
 
-    def _join_check(
-        self, element: Element, left_data: Any
-    ) -> Tuple[Any, Any, Any, Any]:
+    def _join_right(
+        self,
+        element: AnyElement,
+        left_data: Any,
+        left_key: Callable[..., Any],
+        right_key: Callable[..., Any],
+    ) -> List[Any]:
         """
-        连接条件检查
+        获取以左侧数据驱动的连接（左连接、内连接、半连接、反连接）的右侧数据，
+        连接函数声明了cache时只获取缓存中没有的键
 
         Args:
-            element (Element): 元素
+            element (AnyElement): 元素或预编译阶段
             left_data (Any): 左侧数据
+            left_key (Callable): 左侧键函数
+            right_key (Callable): 右侧键函数
 
         Returns:
-            tuple: (left_key, right_key, left_property, one_to_many)
+            List[Any]: 右侧数据
+        """
+        cache = self._join_cache(element)
+        if cache is None:
+            # 批处理,拿到右侧数据
+            return self._fetch_right(element, left_data, left_key)
+        # 只获取缓存中没有的键
+        rows, missing, cached = self._cache_lookup(cache, left_data, left_key)
+        fresh = self._fetch_right(element, rows, left_key) if rows else []
+        return self._cache_fill(cache, missing, fresh, right_key, cached)
 
-        Raises:
-            JoinError: 当连接条件不满足时
+    def _fetch_right(
+        self, element: AnyElement, left_data: Any, left_key: Callable[..., Any]
+    ) -> List[Any]:
         """
-        if element.join_func is not None:
-            left_key, right_key, left_property, one_to_many = get_join_condition(
-                element.join_func
-            )
-            validate_join_conditions(element, left_key, right_key, one_to_many)
-            return left_key, right_key, left_property, one_to_many
-        else:
-            from .exceptions import JoinError
+        调用&右侧的函数，按批次获取连接的右侧数据
 
-            raise JoinError("join_func 不能为空")
+        Args:
+            element (AnyElement): 元素或预编译阶段
+            left_data (Any): 左侧数据
+            left_key (Callable): 左侧键函数，右侧函数声明了distinct_keys=True时使用
 
-    def _left_join_merge(
+        Returns:
+            List[Any]: 右侧数据
+        """
+        return batch_process_data(
+            self._fetch_payload(element, left_data, left_key),
+            element.right_func,  # type: ignore
+            **self._batch_options(element),
+        )
+
+    def _fetch_payload(
+        self, element: AnyElement, left_data: Any, left_key: Callable[..., Any]
+    ) -> Any:
+        """
+        生成交给&右侧函数的数据
+
+        右侧函数声明了distinct_keys=True时，只传入去重后的left_key值（保持首次出现的顺序），
+        再按stream_size切分，重复的键不会出现在多个批次中；否则传入完整的左侧数据。
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+            left_data (Any): 左侧数据
+            left_key (Callable): 左侧键函数
+
+        Returns:
+            Any: 左侧数据或去重后的键列表
+        """
+        if not self._distinct_keys(element):
+            return left_data
+        return list(dict.fromkeys(left_key(item) for item in left_data))
+
+    def _cache_lookup(
+        self, cache: Any, left_data: Any, left_key: Callable[..., Any]
+    ) -> Tuple[List[Any], List[Any], List[Any]]:
+        """
+        用left_key查询连接缓存
+
+        Args:
+            cache (Any): 连接缓存
+            left_data (Any): 左侧数据
+            left_key (Callable): 左侧键函数
+
+        Returns:
+            tuple: (需要交给右侧函数的左侧数据, 未命中的键, 缓存中命中的右侧数据)
+        """
+        keys = [left_key(item) for item in left_data]
+        found, missing = cache.get_many(keys)
+        cached = [row for rows in found.values() for row in rows]
+        if not missing:
+            return [], missing, cached
+        missing_keys = set(missing)
+        rows = [item for item, key in zip(left_data, keys) if key in missing_keys]
+        return rows, missing, cached
+
+    def _cache_fill(
         self,
-        left_data: Union[List[Any], Tuple[Any, ...]],
-        one_to_many: bool,
+        cache: Any,
+        missing: List[Any],
+        fresh: Any,
+        right_key: Callable[..., Any],
+        cached: List[Any],
+    ) -> List[Any]:
+        """
+        把新获取的右侧数据按right_key分组写回缓存，并与缓存中命中的数据合并
+
+        没有匹配数据的键会以空列表写入缓存（负缓存）。
+
+        Args:
+            cache (Any): 连接缓存
+            missing (List[Any]): 未命中的键
+            fresh (Any): 右侧函数返回的数据
+            right_key (Callable): 右侧键函数
+            cached (List[Any]): 缓存中命中的右侧数据
+
+        Returns:
+            List[Any]: 合并后的右侧数据
+        """
+        fresh_rows: List[Any] = list(fresh) if fresh else []
+        grouped = group_by(fresh_rows, right_key)
+        cache.put_many({key: grouped.get(key, []) for key in missing})
+        return cached + fresh_rows
+
+    def _left_join_rows(
+        self,
+        left_data: Any,
         right_data: Any,
         left_key: Callable[..., Any],
         right_key: Callable[..., Any],
         left_property: Optional[str],
+        one_to_many: bool,
+        row_view: bool = False,
     ) -> List[Any]:
         """
-        左连接合并操作
+        左连接获取到右侧数据之后的合并阶段
 
         Args:
-            left_data (Union[List[Any], Tuple[Any, ...]]): 左侧数据
-            one_to_many (bool): 是否一对多连接
+            left_data (Any): 左侧数据
             right_data (Any): 右侧数据
             left_key (Callable): 左侧键函数
             right_key (Callable): 右侧键函数
             left_property (Optional[str]): 左侧属性名
+            one_to_many (bool): 是否一对多连接
+            row_view (bool): 没有left_property时是否输出MergedRow视图
 
         Returns:
-            List[Any]: 合并结果
+            List[Any]: 连接结果
         """
-        # 如果有一边为空,那么都返回左边,因为是左连接
         if right_data is None or len(right_data) == 0:
             return list(left_data) if isinstance(left_data, tuple) else left_data
-        right_data_dict: Dict[Any, Any] = dict()
-        # 转换右边为字段,一对多转换为dict[key,list],一对一转换为dict[key,dict]
-        if one_to_many:
-            right_data_dict = group_by(right_data, right_key)
-        else:
-            right_data_dict = mapping(right_data, right_key)
-        # 最终处理结果
-        result: List[Any] = list()
-        # 遍历左边
-        for item in left_data:
-            try:
-                # 左边key
-                l_k = left_key(item)
-                # 根据左边key获取右边数据，使用更高效的get方法
-                right_item = right_data_dict.get(l_k)
-                # 右边数据为空,那么只把左边数据加入到结果集中
-                if right_item is None:
-                    result.append(item)
-                    continue
-                # 有left_property时,那么把右边数据加入到左边的一个属性字段中
-                if left_property is not None:
-                    item[left_property] = right_item
-                    result.append(item)
+        # 连接左右两边的数据
+        return self._left_join_merge(
+            left_data,
+            one_to_many,
+            right_data,
+            left_key,
+            right_key,
+            left_property,
+            row_view,
+        )
+
+    def _merge_join(
+        self,
+        element: AnyElement,
+        left_data: Any,
+        left_key: Callable[..., Any],
+        right_key: Callable[..., Any],
+        left_property: Optional[str],
+        one_to_many: bool,
+        inner: bool = False,
+    ) -> Iterator[Any]:
+        """
+        排序合并连接，左右两侧数据都必须按键升序排列
+
+        右侧函数按stream_size（未声明时为MERGE_JOIN_BATCH_SIZE）分批惰性调用，
+        键相同的左侧数据不会被拆到两个批次中；
+        右侧函数可以返回迭代器（如数据库游标），只会被顺序读取一遍。
+        左侧数据为迭代器时（流式执行）同样只读取一遍，额外内存只与批次大小和单个键的右侧数据量有关。
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+            left_data (Any): 按left_key升序排列的左侧数据
+            left_key (Callable): 左侧键函数
+            right_key (Callable): 右侧键函数
+            left_property (Optional[str]): 左侧属性名
+            one_to_many (bool): 是否一对多连接
+            inner (bool): 为True时丢弃没有匹配的左侧数据（内连接）
+
+        Returns:
+            Iterator[Any]: 连接结果的迭代器
+
+        Raises:
+            JoinError: 当连接函数声明了cache时
+        """
+        self._check_merge_cache(element)
+        if isinstance(left_data, Iterator):
+            probe_rows, fetch_rows = tee(left_data)
+        else:
+            probe_rows = fetch_rows = left_data
+        return self._merge_join_rows(
+            probe_rows,
+            self._iter_right(element, fetch_rows, left_key),
+            left_key,
+            right_key,
+            left_property,
+            one_to_many,
+            self._row_view(element),
+            inner,
+        )
+
+    def _iter_right(
+        self, element: AnyElement, left_data: Any, left_key: Callable[..., Any]
+    ) -> Iterator[Any]:
+        """
+        按顺序惰性获取排序合并连接的右侧数据
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+            left_data (Any): 按left_key升序排列的左侧数据
+            left_key (Callable): 左侧键函数
+
+        Returns:
+            Iterator[Any]: 右侧数据的迭代器
+        """
+        func: Callable[..., Any] = element.right_func  # type: ignore
+        # 没有声明stream_size时也按固定大小分批，左侧数据不会被一次性读入内存
+        stream_size = self._stream_size(element) or MERGE_JOIN_BATCH_SIZE
+        batches: Iterable[List[Any]]
+        if self._distinct_keys(element):
+            # 左侧已排序，相邻去重即为全局去重
+            keys = (key for key, _ in groupby(left_data, key=left_key))
+            batches = iter_batches(keys, stream_size)
+        else:
+            batches = iter_key_batches(left_data, left_key, stream_size)
+        for batch in batches:
+            result = func(batch)
+            if result is None:
+                continue
+            if is_rows(result):
+                yield from result
+            else:
+                yield result
+
+    def _merge_join_rows(
+        self,
+        left_rows: Iterable[Any],
+        right_rows: Iterable[Any],
+        left_key: Callable[..., Any],
+        right_key: Callable[..., Any],
+        left_property: Optional[str],
+        one_to_many: bool,
+        row_view: bool = False,
+        inner: bool = False,
+    ) -> Iterator[Any]:
+        """
+        同时遍历两侧按键升序排列的数据，生成连接结果
+
+        一对多时当前键的右侧数据合并为列表，一对一时与哈希连接一样取该键的最后一条，
+        left_property和row_view的处理方式与哈希连接相同。
+
+        Args:
+            left_rows (Iterable[Any]): 按left_key升序排列的左侧数据
+            right_rows (Iterable[Any]): 按right_key升序排列的右侧数据
+            left_key (Callable): 左侧键函数
+            right_key (Callable): 右侧键函数
+            left_property (Optional[str]): 左侧属性名
+            one_to_many (bool): 是否一对多连接
+            row_view (bool): 没有left_property时是否输出MergedRow视图
+            inner (bool): 为True时丢弃没有匹配的左侧数据（内连接）
+
+        Returns:
+            Iterator[Any]: 连接结果的迭代器
+
+        Raises:
+            JoinError: 当任意一侧没有按键升序排列，或合并过程中出现错误时
+        """
+        right_iter = iter(right_rows)
+
+        def advance(previous: Any) -> Tuple[Any, Any]:
+            row = next(right_iter, _NO_DATA)
+            if row is _NO_DATA:
+                return row, None
+            key = right_key(row)
+            if previous is not _NO_DATA and key < previous:
+                raise JoinError("右侧数据没有按right_key升序排列")
+            return row, key
+
+        try:
+            pending, r_k = advance(_NO_DATA)
+            l_k: Any = _NO_DATA
+            right_item: Any = None
+            for item in left_rows:
+                key = left_key(item)
+                if l_k is _NO_DATA or key != l_k:
+                    if l_k is not _NO_DATA and key < l_k:
+                        raise JoinError("左侧数据没有按left_key升序排列")
+                    l_k = key
+                    # 跳过比当前左侧键小的右侧数据
+                    while pending is not _NO_DATA and r_k < key:
+                        pending, r_k = advance(r_k)
+                    right_item = None
+                    group: List[Any] = []
+                    while pending is not _NO_DATA and r_k == key:
+                        if one_to_many:
+                            group.append(pending)
+                        else:
+                            right_item = pending
+                        pending, r_k = advance(r_k)
+                    if group:
+                        right_item = group
+                if right_item is None:
+                    if not inner:
+                        yield item
+                    continue
+                if left_property is not None:
+                    item[left_property] = right_item
+                    yield item
+                else:
+                    yield from self._joined_rows(item, right_item, row_view)
+        except AntChainError:
+            raise
+        except Exception as e:
+            raise JoinError(f"排序合并连接过程中出现错误: {str(e)}") from e
+
+    def _joined_rows(self, item: Any, right_item: Any, row_view: bool) -> List[Any]:
+        """
+        没有left_property时，生成一条左侧数据与其匹配的右侧数据合并后的结果，规则与_join_probe相同
+
+        Args:
+            item (Any): 左侧数据
+            right_item (Any): 匹配的右侧数据，一对多时为列表
+            row_view (bool): 是否输出MergedRow视图
+
+        Returns:
+            List[Any]: 合并结果
+        """
+        rows = right_item if isinstance(right_item, list) else [right_item]
+        if row_view:
+            return [
+                MergedRow(item, dict(r) if isinstance(r, tuple) else r) for r in rows
+            ]
+        return [{**item, **(dict(r) if isinstance(r, tuple) else r)} for r in rows]
+
+    def _range_check(
+        self, element: AnyElement, right_range: Callable[..., Any]
+    ) -> Tuple[Any, Any, Any, Any, str]:
+        """
+        范围连接的连接条件检查
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+            right_range (Callable): 区间函数，返回右侧数据的(start, end)
+
+        Returns:
+            tuple: (left_key, right_range, left_property, one_to_many, closed)
+
+        Raises:
+            JoinError: 当连接条件不满足，或声明了cache时
+        """
+        if isinstance(element, CompiledStage) and element.join_condition is not None:
+            left_key, _, left_property, one_to_many = element.join_condition
+        else:
+            left_key, _, left_property, one_to_many = get_join_condition(
+                element.join_func  # type: ignore
+            )
+        validate_join_conditions(element, left_key, right_range, one_to_many)
+        if self._join_cache(element) is not None:
+            raise JoinError("范围连接(right_range)不支持cache")
+        closed = self._join_options(element).get("closed") or "left"
+        return left_key, right_range, left_property, one_to_many, closed
+
+    def _range_join_rows(
+        self,
+        left_data: Any,
+        right_data: Any,
+        condition: Tuple[Any, Any, Any, Any, str],
+        row_view: bool = False,
+        inner: bool = False,
+    ) -> List[Any]:
+        """
+        范围连接获取到右侧数据之后的合并阶段
+
+        一对多时匹配的右侧数据按区间起点升序合并为列表；一对一时取起点最大的一个区间。
+
+        Args:
+            left_data (Any): 左侧数据
+            right_data (Any): 右侧数据
+            condition (tuple): _range_check返回的连接条件
+            row_view (bool): 没有left_property时是否输出MergedRow视图
+            inner (bool): 为True时丢弃没有匹配的左侧数据（内连接）
+
+        Returns:
+            List[Any]: 连接结果
+
+        Raises:
+            JoinError: 当建立索引或合并过程中出现错误时
+        """
+        left_key, right_range, left_property, one_to_many, closed = condition
+        if right_data is None or len(right_data) == 0:
+            if inner:
+                return []
+            return list(left_data) if isinstance(left_data, tuple) else left_data
+        try:
+            index = RangeIndex(right_data, right_range, closed)
+            find = index.find if one_to_many else index.find_one
+            result: List[Any] = list()
+            for item in left_data:
+                right_item = find(left_key(item))
+                if right_item is None or (one_to_many and not right_item):
+                    if not inner:
+                        result.append(item)
+                    continue
+                if left_property is not None:
+                    item[left_property] = right_item
+                    result.append(item)
+                else:
+                    result.extend(self._joined_rows(item, right_item, row_view))
+            return result
+        except Exception as e:
+            raise JoinError(f"范围连接过程中出现错误: {str(e)}") from e
+
+    def _inner_join_rows(
+        self,
+        left_data: Any,
+        right_data: Any,
+        left_key: Callable[..., Any],
+        right_key: Callable[..., Any],
+        left_property: Optional[str],
+        one_to_many: bool,
+        row_view: bool = False,
+    ) -> List[Any]:
+        """
+        内连接获取到右侧数据之后的合并阶段
+
+        Args:
+            left_data (Any): 左侧数据
+            right_data (Any): 右侧数据
+            left_key (Callable): 左侧键函数
+            right_key (Callable): 右侧键函数
+            left_property (Optional[str]): 左侧属性名
+            one_to_many (bool): 是否一对多连接
+            row_view (bool): 没有left_property时是否输出MergedRow视图
+
+        Returns:
+            List[Any]: 连接结果
+        """
+        if right_data is None or len(right_data) == 0:
+            return []
+        right_data_dict = self._join_index(right_data, right_key, one_to_many)
+        return self._join_probe(
+            left_data,
+            right_data_dict,
+            left_key,
+            left_property,
+            row_view,
+            inner=True,
+        )
+
+    def _semi_join_rows(
+        self,
+        left_data: Any,
+        right_data: Any,
+        left_key: Callable[..., Any],
+        right_key: Callable[..., Any],
+        anti: bool = False,
+    ) -> List[Any]:
+        """
+        半连接/反连接获取到右侧数据之后的筛选阶段
+
+        只为右侧的键建立集合，用左侧的键探测，不生成任何合并后的数据。
+
+        Args:
+            left_data (Any): 左侧数据
+            right_data (Any): 右侧数据
+            left_key (Callable): 左侧键函数
+            right_key (Callable): 右侧键函数
+            anti (bool): 为True时保留没有匹配的左侧数据（反连接）
+
+        Returns:
+            List[Any]: 筛选后的左侧数据
+
+        Raises:
+            JoinError: 当计算键的过程中出现错误时
+        """
+        if right_data is None or len(right_data) == 0:
+            return list(left_data) if anti else []
+        try:
+            keys = {right_key(item) for item in right_data}
+        except Exception as e:
+            raise JoinError(f"连接键计算过程中出现错误: {str(e)}") from e
+        return self._semi_probe(left_data, keys, left_key, anti)
+
+    def _semi_probe(
+        self,
+        left_data: Any,
+        keys: Container[Any],
+        left_key: Callable[..., Any],
+        anti: bool = False,
+    ) -> List[Any]:
+        """
+        用左侧数据的键探测右侧键集合，筛选出半连接/反连接的结果
+
+        Args:
+            left_data (Any): 左侧数据
+            keys (Container[Any]): 右侧键的集合（或以右侧键为键的索引）
+            left_key (Callable): 左侧键函数
+            anti (bool): 为True时保留没有匹配的左侧数据（反连接）
+
+        Returns:
+            List[Any]: 筛选后的左侧数据
+
+        Raises:
+            JoinError: 当计算键的过程中出现错误时
+        """
+        try:
+            if anti:
+                return [item for item in left_data if left_key(item) not in keys]
+            return [item for item in left_data if left_key(item) in keys]
+        except Exception as e:
+            raise JoinError(f"连接键计算过程中出现错误: {str(e)}") from e
+
+    def all_join(self, element: AnyElement, left_data: Any) -> List[Any]:
+        """
+        全连接策略
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+            left_data (Any): 左侧数据
+
+        Returns:
+            List[Any]: 连接结果
+
+        Raises:
+            JoinError: 当连接函数或条件不满足时
+        """
+        if element.join_func is None:
+            raise JoinError("** 运算符的右边不能为空")
+        try:
+            left_key, right_key, left_property, one_to_many = self._join_check(
+                element, left_data
+            )
+            self._check_all_join_cache(element)
+            table = self._broadcast(element)
+            if table is not None:
+                return self._full_probe(
+                    left_data or [],
+                    table.index(right_key, one_to_many),
+                    left_key,
+                    left_property,
+                    self._row_view(element),
+                )
+            if self._memory_budget(element):
+                return list(
+                    self._grace_join(
+                        element,
+                        left_data,
+                        left_key,
+                        right_key,
+                        left_property,
+                        one_to_many,
+                        full=True,
+                    )
+                )
+            # 批处理,拿到右侧数据
+            right_data = self._fetch_right(element, left_data, left_key)
+            return self._all_join_rows(
+                left_data,
+                right_data,
+                left_key,
+                right_key,
+                left_property,
+                one_to_many,
+                self._row_view(element),
+            )
+        except Exception as e:
+            raise JoinError(f"全连接操作失败: {str(e)}") from e
+
+    def _all_join_rows(
+        self,
+        left_data: Any,
+        right_data: Any,
+        left_key: Callable[..., Any],
+        right_key: Callable[..., Any],
+        left_property: Optional[str],
+        one_to_many: bool,
+        row_view: bool = False,
+    ) -> List[Any]:
+        """
+        全连接获取到右侧数据之后的合并阶段
+
+        Args:
+            left_data (Any): 左侧数据
+            right_data (Any): 右侧数据
+            left_key (Callable): 左侧键函数
+            right_key (Callable): 右侧键函数
+            left_property (Optional[str]): 左侧属性名
+            one_to_many (bool): 是否一对多连接
+            row_view (bool): 没有left_property时是否输出MergedRow视图
+
+        Returns:
+            List[Any]: 连接结果
+        """
+        if right_data is None or len(right_data) == 0:
+            if left_data is None or len(left_data) == 0:
+                return []
+            else:
+                return list(left_data) if isinstance(left_data, tuple) else left_data
+        right_data_dict = self._join_index(right_data, right_key, one_to_many)
+        return self._full_probe(
+            left_data, right_data_dict, left_key, left_property, row_view
+        )
+
+    def _full_probe(
+        self,
+        left_data: Any,
+        right_data_dict: Dict[Any, Any],
+        left_key: Callable[..., Any],
+        left_property: Optional[str],
+        row_view: bool = False,
+    ) -> List[Any]:
+        """
+        用左侧数据探测右侧索引，再从同一个索引输出没有匹配的右侧数据，生成全连接的结果
+
+        Args:
+            left_data (Any): 左侧数据
+            right_data_dict (Dict[Any, Any]): 右侧索引
+            left_key (Callable): 左侧键函数
+            left_property (Optional[str]): 左侧属性名
+            row_view (bool): 没有left_property时是否输出MergedRow视图
+
+        Returns:
+            List[Any]: 连接结果
+        """
+        # 右侧只建一次索引：探测左侧时记录匹配到的键，再从同一个索引输出没有匹配的右侧数据
+        matched: Set[Any] = set()
+        result = self._join_probe(
+            left_data,
+            right_data_dict,
+            left_key,
+            left_property,
+            row_view,
+            matched,
+        )
+        # 不在左边的数据,需要插入到结果中,并且这部分数据不用管left_property
+        for r_k, item in right_data_dict.items():
+            if r_k not in matched:
+                result.extend(self._unmatched_rows(item))
+        return result
+
+    def _unmatched_rows(self, item: Any) -> List[Any]:
+        """
+        全连接中没有匹配左侧数据的右侧索引项对应的输出数据
+
+        Args:
+            item (Any): 右侧索引中的值，一对多时为列表
+
+        Returns:
+            List[Any]: 输出数据
+        """
+        if isinstance(item, list):
+            return item
+        elif isinstance(item, tuple):
+            return list(item)
+        return [item]
+
+    def _grace_join(
+        self,
+        element: AnyElement,
+        left_data: Any,
+        left_key: Callable[..., Any],
+        right_key: Callable[..., Any],
+        left_property: Optional[str],
+        one_to_many: bool,
+        inner: bool = False,
+        full: bool = False,
+    ) -> Iterator[Any]:
+        """
+        Grace哈希连接，用于右侧数据过大、无法完整放入内存的哈希连接
+
+        右侧数据不超过连接函数上声明的memory_budget条时，与普通的哈希连接完全相同；
+        超过后两侧数据按键的哈希分区写入临时文件（分区数为spill_partitions，目录为spill_dir），
+        每次只为一个分区的右侧数据建立索引，各分区的结果同样写入临时文件，
+        最后按左侧数据的原有顺序合并输出，全连接中没有匹配的右侧数据按首次出现的顺序追加在最后。
+        溢写后输出的是反序列化得到的副本，原有的左侧数据不会被修改。
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+            left_data (Any): 左侧数据
+            left_key (Callable): 左侧键函数
+            right_key (Callable): 右侧键函数
+            left_property (Optional[str]): 左侧属性名
+            one_to_many (bool): 是否一对多连接
+            inner (bool): 为True时丢弃没有匹配的左侧数据（内连接）
+            full (bool): 为True时追加没有匹配的右侧数据（全连接）
+
+        Returns:
+            Iterator[Any]: 连接结果的迭代器
+
+        Raises:
+            JoinError: 当连接函数同时声明了cache时
+            ValueError: 当memory_budget或spill_partitions不合法时
+        """
+        if self._join_cache(element) is not None:
+            raise JoinError("声明了memory_budget的连接不支持cache")
+        options = self._join_options(element)
+        buffer = SpillBuffer(
+            left_key,
+            right_key,
+            options["memory_budget"],
+            options.get("spill_partitions") or 16,
+            options.get("spill_dir"),
+        )
+        return self._grace_rows(
+            element,
+            left_data,
+            buffer,
+            left_property,
+            one_to_many,
+            inner,
+            full,
+        )
+
+    def _grace_rows(
+        self,
+        element: AnyElement,
+        left_data: Any,
+        buffer: SpillBuffer,
+        left_property: Optional[str],
+        one_to_many: bool,
+        inner: bool,
+        full: bool,
+    ) -> Iterator[Any]:
+        """
+        _grace_join的执行部分：参数检查在_grace_join中立即进行，连接在遍历结果时才执行，
+        输出结束或中断时关闭所有临时文件
+        """
+        left_key, right_key = buffer.left_key, buffer.right_key
+        row_view = self._row_view(element)
+        outputs: List[SpillFile] = []
+        unmatched: List[SpillFile] = []
+        try:
+            self._spill_fetch(element, left_data, left_key, buffer)
+            if not buffer.spilled:
+                # 右侧数据没有超过memory_budget，直接在内存中连接
+                if full:
+                    join_rows = self._all_join_rows
+                elif inner:
+                    join_rows = self._inner_join_rows
+                else:
+                    join_rows = self._left_join_rows
+                yield from join_rows(
+                    buffer.left_rows,
+                    buffer.right_rows,
+                    left_key,
+                    right_key,
+                    left_property,
+                    one_to_many,
+                    row_view,
+                )
+                return
+            for partition in range(buffer.partitions):
+                output, rest = self._grace_partition(
+                    buffer, partition, left_property, one_to_many, row_view, inner, full
+                )
+                outputs.append(output)
+                if rest is not None:
+                    unmatched.append(rest)
+            # 各分区的结果都按序号升序写入，多路归并即可恢复原有的顺序
+            for files in (outputs, unmatched):
+                merged = heapq.merge(*(f.read() for f in files), key=itemgetter(0))
+                for _, rows in merged:
+                    yield from rows
+        except AntChainError:
+            raise
+        except Exception as e:
+            raise JoinError(f"Grace哈希连接过程中出现错误: {str(e)}") from e
+        finally:
+            buffer.close()
+            for spill in outputs + unmatched:
+                spill.close()
+
+    def _spill_fetch(
+        self,
+        element: AnyElement,
+        left_data: Any,
+        left_key: Callable[..., Any],
+        buffer: SpillBuffer,
+    ) -> None:
+        """
+        把左侧数据写入溢写缓冲，同时调用&右侧的函数获取右侧数据并写入溢写缓冲
+
+        切片方式与batch_process_data相同（声明了distinct_keys时为去重后的键），
+        右侧函数收到的数据与内存中的连接一致；声明了stream_size时左侧数据只遍历一次，
+        每凑满一个切片就调用一次右侧函数，声明了stream_concurrency时各个切片并发调用，
+        同时在途的切片不超过stream_concurrency个。
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+            left_data (Any): 左侧数据，可以是迭代器
+            left_key (Callable): 左侧键函数
+            buffer (SpillBuffer): 溢写缓冲
+        """
+        func: Callable[..., Any] = element.right_func  # type: ignore
+        stream_size = self._stream_size(element)
+        batches = self._spill_batches(element, left_data, left_key, buffer, stream_size)
+        if stream_size <= 0:
+            for batch in batches:
+                result = func(batch)
+                # 与整体调用时的batch_process_data一致：非列表的返回值视为一条数据
+                if result is not None and not isinstance(result, list):
+                    result = [result]
+                self._spill_right(buffer, result)
+            return
+        concurrency = self._stream_concurrency(element)
+        if concurrency > 1:
+            # 切片在调用线程中生成，左侧数据也在调用线程中写入溢写缓冲
+            results: Iterator[Any] = parallel_map(func, batches, concurrency)
+        else:
+            results = map(func, batches)
+        for result in results:
+            self._spill_right(buffer, result)
+
+    def _spill_batches(
+        self,
+        element: AnyElement,
+        left_data: Any,
+        left_key: Callable[..., Any],
+        buffer: SpillBuffer,
+        stream_size: int,
+    ) -> Iterator[List[Any]]:
+        """
+        遍历左侧数据并写入溢写缓冲，按stream_size产出交给右侧函数的切片，
+        没有声明stream_size时只产出一个包含全部数据的切片
+        """
+        distinct = self._distinct_keys(element)
+        seen: Set[Any] = set()
+        batch: List[Any] = []
+        for row in left_data:
+            buffer.add_left(row)
+            if distinct:
+                key = left_key(row)
+                if key in seen:
+                    continue
+                seen.add(key)
+                batch.append(key)
+            else:
+                batch.append(row)
+            if stream_size > 0 and len(batch) >= stream_size:
+                yield batch
+                batch = []
+        if stream_size <= 0 or batch:
+            yield batch
+
+    def _spill_right(self, buffer: SpillBuffer, result: Any) -> None:
+        """
+        把右侧函数的一次返回值写入溢写缓冲，列表和元组逐条写入，None被忽略
+        """
+        if result is None:
+            return
+        if isinstance(result, (list, tuple)):
+            for row in result:
+                buffer.add_right(row)
+        else:
+            buffer.add_right(result)
+
+    def _grace_partition(
+        self,
+        buffer: SpillBuffer,
+        partition: int,
+        left_property: Optional[str],
+        one_to_many: bool,
+        row_view: bool,
+        inner: bool,
+        full: bool,
+    ) -> Tuple[SpillFile, Optional[SpillFile]]:
+        """
+        连接一个分区的两侧数据
+
+        Args:
+            buffer (SpillBuffer): 已溢写的缓冲
+            partition (int): 分区序号
+            left_property (Optional[str]): 左侧属性名
+            one_to_many (bool): 是否一对多连接
+            row_view (bool): 没有left_property时是否输出MergedRow视图
+            inner (bool): 是否丢弃没有匹配的左侧数据
+            full (bool): 是否输出没有匹配的右侧数据
+
+        Returns:
+            tuple: (按左侧序号排列的结果文件, 按右侧首次出现序号排列的未匹配数据文件或None)
+        """
+        left_key, right_key = buffer.left_key, buffer.right_key
+        right_data_dict: Dict[Any, Any] = dict()
+        first_seen: Dict[Any, int] = dict()
+        for seq, row in buffer.right(partition):
+            key = right_key(row)
+            if key not in first_seen:
+                first_seen[key] = seq
+            if not one_to_many:
+                right_data_dict[key] = row
+            elif key in right_data_dict:
+                right_data_dict[key].append(row)
+            else:
+                right_data_dict[key] = [row]
+        matched: Set[Any] = set()
+        output = buffer.spill_file()
+        for index, item in buffer.left(partition):
+            l_k = left_key(item)
+            right_item = right_data_dict.get(l_k)
+            if right_item is None:
+                if not inner:
+                    output.write((index, [item]))
+                continue
+            matched.add(l_k)
+            if left_property is not None:
+                item[left_property] = right_item
+                output.write((index, [item]))
+            else:
+                output.write((index, self._joined_rows(item, right_item, row_view)))
+        if not full:
+            return output, None
+        rest = buffer.spill_file()
+        for key, item in right_data_dict.items():
+            if key not in matched:
+                rest.write((first_seen[key], self._unmatched_rows(item)))
+        return output, rest
+
+    def merge(self, element: AnyElement, left_data: Any) -> List[Any]:
+        """
+        合并策略
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+            left_data (Any): 左侧数据
+
+        Returns:
+            List[Any]: 合并结果
+
+        Raises:
+            StrategyError: 当right_func为空时
+            ProcessingError: 当合并函数执行失败时
+        """
+        if element.right_func is None:
+            raise StrategyError("right_func 不能为空")
+        try:
+            return self._merge_rows(left_data, element.right_func())
+        except Exception as e:
+            raise ProcessingError(f"合并操作失败: {str(e)}") from e
+
+    def _merge_rows(self, left_data: Any, data: Any) -> List[Any]:
+        """
+        把合并函数返回的数据追加到左侧数据之后
+
+        Args:
+            left_data (Any): 左侧数据
+            data (Any): 合并函数返回的数据
+
+        Returns:
+            List[Any]: 合并结果
+        """
+        result: List[Any] = list()
+        if isinstance(data, list) or isinstance(data, tuple):
+            result.extend(data)
+        else:
+            result.append(data)
+        if left_data is None:
+            return result
+        elif isinstance(left_data, list) or isinstance(left_data, tuple):
+            # 将左侧数据转换为列表进行合并
+            left_list = list(left_data) if isinstance(left_data, tuple) else left_data
+            result = left_list + result
+        else:
+            result.insert(0, left_data)
+        return result
+
+    def filter(self, element: AnyElement, left_data: Any) -> List[Any]:
+        """
+        过滤策略
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+            left_data (Any): 左侧数据
+
+        Returns:
+            List[Any]: 过滤结果
+
+        Raises:
+            StrategyError: 当right_func为空时
+            ProcessingError: 当过滤函数执行失败时
+        """
+        if element.right_func is None:
+            raise StrategyError("right_func 不能为空")
+        try:
+            if left_data is None:
+                return []
+            if isinstance(left_data, list) or isinstance(left_data, tuple):
+                result: List[Any] = list()
+                for data in left_data:
+                    if element.right_func(data):
+                        result.append(data)
+                return result
+            return []
+        except Exception as e:
+            raise ProcessingError(f"过滤操作失败: {str(e)}") from e
+
+    def fused(self, element: FusedStage, left_data: Any) -> List[Any]:
+        """
+        融合处理策略，每条数据一次性依次经过所有单条处理和过滤函数
+
+        对非多行数据的处理与第一个被融合的阶段保持一致：
+        第一个阶段为one时None和单条数据按一条数据处理，为filter时返回空列表。
+
+        Args:
+            element (FusedStage): 融合阶段
+            left_data (Any): 左侧数据
+
+        Returns:
+            List[Any]: 处理结果
+
+        Raises:
+            ProcessingError: 当任一函数执行失败时，异常信息中包含出错的阶段序号和函数名
+        """
+        steps = element.steps
+        rows = self._fused_rows(steps, left_data, False)
+        result: List[Any] = list()
+        append = result.append
+        step = steps[0]
+        try:
+            for item in rows:
+                for step in steps:
+                    if step[0]:
+                        if not step[1](item):
+                            break
+                    else:
+                        item = step[1](item)
+                else:
+                    append(item)
+        except Exception as e:
+            raise self._fused_error(step, e) from e
+        return result
+
+    def lazy_fused(self, element: FusedStage, left_data: Any) -> Iterator[Any]:
+        """
+        惰性融合处理策略，与fused相同，但以迭代器的形式逐条产出结果
+
+        Args:
+            element (FusedStage): 融合阶段
+            left_data (Any): 左侧数据
+
+        Returns:
+            Iterator[Any]: 处理结果迭代器
+        """
+        steps = element.steps
+        rows = self._fused_rows(steps, left_data, True)
+        return self._lazy_fused(steps, rows)
+
+    def _lazy_fused(self, steps: Tuple[Any, ...], rows: Any) -> Iterator[Any]:
+        for item in rows:
+            step = steps[0]
+            try:
+                for step in steps:
+                    if step[0]:
+                        if not step[1](item):
+                            item = _DROPPED
+                            break
+                    else:
+                        item = step[1](item)
+            except Exception as e:
+                raise self._fused_error(step, e) from e
+            if item is not _DROPPED:
+                yield item
+
+    def _fused_rows(self, steps: Tuple[Any, ...], left_data: Any, lazy: bool) -> Any:
+        """
+        按第一个被融合阶段的规则把左侧数据转换为可遍历的行
+
+        与one和filter一致，非惰性时只有列表和元组是多行数据，迭代器按一条数据处理；
+        与lazy_one和lazy_filter一致，惰性时迭代器也是多行数据。
+        """
+        if is_rows(left_data) if lazy else isinstance(left_data, (list, tuple)):
+            return left_data
+        # filter对None和单条数据返回空列表，one则把它们当作一条数据处理
+        return [] if steps[0][0] else [left_data]
+
+    def _fused_error(self, step: Tuple[Any, ...], e: Exception) -> ProcessingError:
+        """
+        生成融合阶段的异常，保留与未融合时一致的前缀，并注明出错的阶段
+        """
+        is_filter, _, index, name = step
+        prefix = "过滤操作失败" if is_filter else "单条处理函数执行失败"
+        return ProcessingError(f"{prefix}(第{index}个阶段 {name}): {str(e)}")
+
+    def lazy_one(self, element: AnyElement, left_data: Any) -> Any:
+        """
+        惰性单条处理策略，多行数据以迭代器的形式逐条处理
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+            left_data (Any): 左侧数据
+
+        Returns:
+            Any: 处理结果迭代器，非多行数据时与one一致
+
+        Raises:
+            StrategyError: 当right_func为空时
+            ProcessingError: 当处理函数执行失败时
+        """
+        if element.right_func is None:
+            raise StrategyError("right_func 不能为空")
+        if not is_rows(left_data):
+            return self.one(element, left_data)
+        processes = self._processes(element)
+        if processes > 0:
+            ensure_picklable(element.right_func)
+            chunk_size = self._chunk_size(element, left_data, processes)
+            return self._lazy_pooled(
+                self._process_one(element.right_func, left_data, processes, chunk_size),
+                "单条处理函数执行失败",
+            )
+        workers, ordered = self._workers(element)
+        if workers > 1:
+            return self._lazy_pooled(
+                parallel_map(element.right_func, left_data, workers, ordered),
+                "单条处理函数执行失败",
+            )
+        return self._lazy_one(element.right_func, left_data)
+
+    def _lazy_one(self, func: Callable[..., Any], rows: Any) -> Iterator[Any]:
+        """
+        逐条调用处理函数并产出结果，把处理函数的异常转换为ProcessingError
+        """
+        for item in rows:
+            try:
+                result = func(item)
+            except Exception as e:
+                raise ProcessingError(f"单条处理函数执行失败: {str(e)}") from e
+            yield result
+
+    def _lazy_pooled(self, results: Iterator[Any], message: str) -> Iterator[Any]:
+        """
+        包装线程池或进程池返回的结果迭代器，把处理函数的异常转换为ProcessingError
+        """
+        try:
+            yield from results
+        except AntChainError:
+            # 上游阶段抛出的异常已经带有出错阶段的信息，直接向上抛出
+            raise
+        except Exception as e:
+            raise ProcessingError(f"{message}: {str(e)}") from e
+
+    def _process_one(
+        self, func: Callable[..., Any], rows: Any, processes: int, chunk_size: int
+    ) -> Iterator[Any]:
+        """
+        把数据切分为数据块，在共享进程池中逐条处理，按输入顺序产出结果
+        """
+        for part in process_map(func, iter_batches(rows, chunk_size), processes):
+            yield from part
+
+    def _process_multi(
+        self, func: Callable[..., Any], rows: Any, processes: int, stream_size: int
+    ) -> Any:
+        """
+        在共享进程池中执行批处理，结果的拼接规则与batch_process_data一致
+        """
+        if stream_size <= 0:
+            # 没有声明stream_size时函数需要完整的数据，只能作为一个任务执行
+            result_data = next(process_batches(func, [rows], 1))
+            return [] if result_data is None else result_data
+        return list(self._process_batches(func, rows, processes, stream_size))
+
+    def _process_batches(
+        self, func: Callable[..., Any], rows: Any, processes: int, stream_size: int
+    ) -> Iterator[Any]:
+        chunks = iter_batches(rows, stream_size)
+        for result in process_batches(func, chunks, processes):
+            if result is None:
+                continue
+            elif isinstance(result, (list, tuple)):
+                yield from result
+            else:
+                yield result
+
+    def _chunk_size(self, element: AnyElement, rows: Any, processes: int) -> int:
+        """
+        计算单条处理使用进程池时每个数据块的大小
+
+        优先使用函数上声明的stream_size；否则把已知长度的数据平均切分为processes*4块，
+        迭代器则使用DEFAULT_PROCESS_CHUNK_SIZE。
+        """
+        stream_size = self._stream_size(element)
+        if stream_size > 0:
+            return stream_size
+        if isinstance(rows, (list, tuple)):
+            return max(1, -(-len(rows) // (processes * 4)))
+        return DEFAULT_PROCESS_CHUNK_SIZE
+
+    def lazy_filter(self, element: AnyElement, left_data: Any) -> Any:
+        """
+        惰性过滤策略，多行数据以迭代器的形式逐条过滤
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+            left_data (Any): 左侧数据
+
+        Returns:
+            Any: 过滤结果迭代器，非多行数据时与filter一致
+
+        Raises:
+            StrategyError: 当right_func为空时
+            ProcessingError: 当过滤函数执行失败时
+        """
+        if element.right_func is None:
+            raise StrategyError("right_func 不能为空")
+        if not is_rows(left_data):
+            return self.filter(element, left_data)
+        return self._lazy_filter(element.right_func, left_data)
+
+    def _lazy_filter(self, func: Callable[..., Any], rows: Any) -> Iterator[Any]:
+        for item in rows:
+            try:
+                keep = func(item)
+            except Exception as e:
+                raise ProcessingError(f"过滤操作失败: {str(e)}") from e
+            if keep:
+                yield item
+
+    def lazy_merge(self, element: AnyElement, left_data: Any) -> Any:
+        """
+        惰性合并策略，左侧多行数据不会被复制，而是与右侧数据串联为一个迭代器
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+            left_data (Any): 左侧数据
+
+        Returns:
+            Any: 合并结果迭代器，非多行数据时与merge一致
+
+        Raises:
+            StrategyError: 当right_func为空时
+            ProcessingError: 当合并函数执行失败时
+        """
+        if element.right_func is None:
+            raise StrategyError("right_func 不能为空")
+        if not is_rows(left_data):
+            return self.merge(element, left_data)
+        return chain(left_data, self.merge(element, None))
+
+    def lazy_multi(self, element: AnyElement, left_data: Any) -> Any:
+        """
+        惰性批处理策略
+
+        - right_func声明了lazy=True时，直接把迭代器交给函数消费（如COUNT、SUM等收集器）
+        - right_func声明了stream_size时，按批次从迭代器中取数据，逐批处理并逐批产出结果
+        - 其他情况需要完整的数据，会先物化为列表再按multi处理
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+            left_data (Any): 左侧数据
+
+        Returns:
+            Any: 处理结果
+
+        Raises:
+            StrategyError: 当right_func为空时
+            ProcessingError: 当批处理函数执行失败时
+        """
+        func = element.right_func
+        if func is None:
+            raise StrategyError("right_func 不能为空")
+        if not is_rows(left_data):
+            return self.multi(element, left_data)
+        if self._lazy(element):
+            try:
+                return func(left_data)
+            except AntChainError:
+                # 上游阶段抛出的异常已经带有出错阶段的信息，直接向上抛出
+                raise
+            except Exception as e:
+                raise ProcessingError(f"批处理函数执行失败: {str(e)}") from e
+        stream_size = self._stream_size(element)
+        processes = self._processes(element)
+        if processes > 0 and stream_size > 0:
+            ensure_picklable(func)
+            return self._lazy_pooled(
+                self._process_batches(func, left_data, processes, stream_size),
+                "批处理函数执行失败",
+            )
+        if stream_size > 0:
+            return self._lazy_batches(
+                func, left_data, stream_size, self._stream_concurrency(element)
+            )
+        if isinstance(left_data, Iterator):
+            left_data = list(left_data)
+        return self.multi(element, left_data)
+
+    def _lazy_batches(
+        self,
+        func: Callable[..., Any],
+        rows: Any,
+        stream_size: int,
+        concurrency: int = 0,
+    ) -> Iterator[Any]:
+        """
+        按stream_size切分数据并逐批调用批处理函数，逐条产出各批次的结果，
+        concurrency大于1时同时在途的批次不超过concurrency个
+        """
+        batches = iter_batches(rows, stream_size)
+        if concurrency > 1:
+            # 同时在途的批次不超过concurrency个，结果仍按批次顺序产出
+            results: Iterator[Any] = parallel_map(func, batches, concurrency)
+        else:
+            results = map(func, batches)
+        while True:
+            try:
+                result = next(results)
+            except StopIteration:
+                return
+            except AntChainError:
+                # 上游阶段抛出的异常已经带有出错阶段的信息，直接向上抛出
+                raise
+            except Exception as e:
+                raise ProcessingError(f"批处理函数执行失败: {str(e)}") from e
+            if result is None:
+                continue
+            elif isinstance(result, (list, tuple)):
+                yield from result
+            else:
+                yield result
+
+    async def ainit(self, element: AnyElement, left_data: Any) -> Any:
+        """
+        异步初始化策略
+
+        初始化函数可以是普通函数、协程函数或异步生成器函数，
+        返回协程时会被等待，返回异步迭代器时会被收集为列表。
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+            left_data (Any): 左侧数据
+
+        Returns:
+            Any: 初始化函数的返回值
+
+        Raises:
+            StrategyError: 当right_func为空时
+            ProcessingError: 当初始化函数执行失败时
+        """
+        if element.right_func is None:
+            raise StrategyError("right_func 不能为空")
+        try:
+            return await self._resolve(element.right_func())
+        except Exception as e:
+            raise ProcessingError(f"初始化函数执行失败: {str(e)}") from e
+
+    async def aone(self, element: AnyElement, left_data: Any) -> List[Any]:
+        """
+        异步单条处理策略，多行数据在事件循环中并发处理，结果保持输入顺序
+
+        同时在途的协程数由right_func上的workers限制，未声明时使用DEFAULT_ASYNC_CONCURRENCY。
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+            left_data (Any): 左侧数据
+
+        Returns:
+            List[Any]: 处理结果列表
+
+        Raises:
+            StrategyError: 当right_func为空时
+            ProcessingError: 当处理函数执行失败时
+        """
+        func = element.right_func
+        if func is None:
+            raise StrategyError("right_func 不能为空")
+        workers, _ = self._workers(element)
+        try:
+            if isinstance(left_data, list) or isinstance(left_data, tuple):
+                return await async_map(func, left_data, workers)
+            return [await func(left_data)]
+        except Exception as e:
+            raise ProcessingError(f"单条处理函数执行失败: {str(e)}") from e
+
+    async def amulti(self, element: AnyElement, left_data: Any) -> Any:
+        """
+        异步批处理策略，声明了stream_size时各个切片在事件循环中并发执行
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+            left_data (Any): 左侧数据
+
+        Returns:
+            Any: 处理结果
+
+        Raises:
+            StrategyError: 当right_func为空时
+            ProcessingError: 当批处理函数执行失败时
+        """
+        func = element.right_func
+        if func is None:
+            raise StrategyError("right_func 不能为空")
+        try:
+            if isinstance(left_data, list) or isinstance(left_data, tuple):
+                return await abatch_process_data(
+                    left_data,
+                    func,
+                    wrap_result=False,
+                    **self._batch_options(element),
+                )
+            return await func(left_data)
+        except Exception as e:
+            raise ProcessingError(f"批处理函数执行失败: {str(e)}") from e
+
+    async def afilter(self, element: AnyElement, left_data: Any) -> List[Any]:
+        """
+        异步过滤策略，各条数据的过滤条件在事件循环中并发计算
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+            left_data (Any): 左侧数据
+
+        Returns:
+            List[Any]: 过滤结果
+
+        Raises:
+            StrategyError: 当right_func为空时
+            ProcessingError: 当过滤函数执行失败时
+        """
+        if element.right_func is None:
+            raise StrategyError("right_func 不能为空")
+        if not (isinstance(left_data, list) or isinstance(left_data, tuple)):
+            return []
+        workers, _ = self._workers(element)
+        try:
+            keeps = await async_map(element.right_func, left_data, workers)
+        except Exception as e:
+            raise ProcessingError(f"过滤操作失败: {str(e)}") from e
+        return [data for data, keep in zip(left_data, keeps) if keep]
+
+    async def amerge(self, element: AnyElement, left_data: Any) -> List[Any]:
+        """
+        异步合并策略，合并函数可以是协程函数或异步生成器函数
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+            left_data (Any): 左侧数据
+
+        Returns:
+            List[Any]: 合并结果
+
+        Raises:
+            StrategyError: 当right_func为空时
+            ProcessingError: 当合并函数执行失败时
+        """
+        if element.right_func is None:
+            raise StrategyError("right_func 不能为空")
+        try:
+            data = await self._resolve(element.right_func())
+            return self._merge_rows(left_data, data)
+        except Exception as e:
+            raise ProcessingError(f"合并操作失败: {str(e)}") from e
+
+    async def aleft_join(self, element: AnyElement, left_data: Any) -> List[Any]:
+        """
+        异步左连接策略，右侧数据的各个切片在事件循环中并发获取
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+            left_data (Any): 左侧数据
+
+        Returns:
+            List[Any]: 连接结果
+
+        Raises:
+            JoinError: 当连接函数或条件不满足时
+        """
+        if element.join_func is None:
+            raise JoinError("* 运算符的右边不能为空")
+        try:
+            right_range = self._right_range(element)
+            if right_range is not None:
+                # 范围连接：left_key的值落在right_range返回的区间内即视为匹配
+                condition = self._range_check(element, right_range)
+                if left_data is None or len(left_data) == 0:
+                    return []
+                right_data = await self._afetch_right(element, left_data, condition[0])
+                return self._range_join_rows(
+                    left_data, right_data, condition, self._row_view(element)
+                )
+            left_key, right_key, left_property, one_to_many = self._join_check(
+                element, left_data
+            )
+            if left_data is None or len(left_data) == 0:
+                return []
+            if self._join_algorithm(element) == "merge":
+                # 异步获取的右侧数据已经物化，这里只按排序合并的方式连接
+                self._check_merge_cache(element)
+                right_data = await self._afetch_right(element, left_data, left_key)
+                return list(
+                    self._merge_join_rows(
+                        left_data,
+                        right_data,
+                        left_key,
+                        right_key,
+                        left_property,
+                        one_to_many,
+                        self._row_view(element),
+                    )
+                )
+            right_data = await self._ajoin_right(
+                element, left_data, left_key, right_key
+            )
+            return self._left_join_rows(
+                left_data,
+                right_data,
+                left_key,
+                right_key,
+                left_property,
+                one_to_many,
+                self._row_view(element),
+            )
+        except Exception as e:
+            raise JoinError(f"左连接操作失败: {str(e)}") from e
+
+    async def ainner_join(self, element: AnyElement, left_data: Any) -> List[Any]:
+        """
+        异步内连接策略，只保留在右侧有匹配的左侧数据，右侧数据的各个切片在事件循环中并发获取
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+            left_data (Any): 左侧数据
+
+        Returns:
+            List[Any]: 连接结果
+
+        Raises:
+            JoinError: 当连接函数或条件不满足时
+        """
+        if element.join_func is None:
+            raise JoinError("@ 运算符的右边不能为空")
+        try:
+            right_range = self._right_range(element)
+            if right_range is not None:
+                # 范围连接：left_key的值落在right_range返回的区间内即视为匹配
+                condition = self._range_check(element, right_range)
+                if left_data is None or len(left_data) == 0:
+                    return []
+                right_data = await self._afetch_right(element, left_data, condition[0])
+                return self._range_join_rows(
+                    left_data,
+                    right_data,
+                    condition,
+                    self._row_view(element),
+                    inner=True,
+                )
+            left_key, right_key, left_property, one_to_many = self._join_check(
+                element, left_data
+            )
+            if left_data is None or len(left_data) == 0:
+                return []
+            if self._join_algorithm(element) == "merge":
+                # 异步获取的右侧数据已经物化，这里只按排序合并的方式连接
+                self._check_merge_cache(element)
+                right_data = await self._afetch_right(element, left_data, left_key)
+                return list(
+                    self._merge_join_rows(
+                        left_data,
+                        right_data,
+                        left_key,
+                        right_key,
+                        left_property,
+                        one_to_many,
+                        self._row_view(element),
+                        inner=True,
+                    )
+                )
+            right_data = await self._ajoin_right(
+                element, left_data, left_key, right_key
+            )
+            return self._inner_join_rows(
+                left_data,
+                right_data,
+                left_key,
+                right_key,
+                left_property,
+                one_to_many,
+                self._row_view(element),
+            )
+        except Exception as e:
+            raise JoinError(f"内连接操作失败: {str(e)}") from e
+
+    async def asemi_join(self, element: AnyElement, left_data: Any) -> List[Any]:
+        """
+        异步半连接策略，只保留在右侧存在匹配键的左侧数据，右侧数据的各个切片在事件循环中并发获取
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+            left_data (Any): 左侧数据
+
+        Returns:
+            List[Any]: 原样保留的左侧数据
+
+        Raises:
+            JoinError: 当连接函数或条件不满足时
+        """
+        if element.join_func is None:
+            raise JoinError("% 运算符的右边不能为空")
+        try:
+            left_key, right_key = self._join_keys(element)
+            if left_data is None or len(left_data) == 0:
+                return []
+            right_data = await self._ajoin_right(
+                element, left_data, left_key, right_key
+            )
+            return self._semi_join_rows(left_data, right_data, left_key, right_key)
+        except Exception as e:
+            raise JoinError(f"半连接操作失败: {str(e)}") from e
+
+    async def aanti_join(self, element: AnyElement, left_data: Any) -> List[Any]:
+        """
+        异步反连接策略，只保留在右侧不存在匹配键的左侧数据，右侧数据的各个切片在事件循环中并发获取
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+            left_data (Any): 左侧数据
+
+        Returns:
+            List[Any]: 原样保留的左侧数据
+
+        Raises:
+            JoinError: 当连接函数或条件不满足时
+        """
+        if element.join_func is None:
+            raise JoinError("^ 运算符的右边不能为空")
+        try:
+            left_key, right_key = self._join_keys(element)
+            if left_data is None or len(left_data) == 0:
+                return []
+            right_data = await self._ajoin_right(
+                element, left_data, left_key, right_key
+            )
+            return self._semi_join_rows(
+                left_data, right_data, left_key, right_key, anti=True
+            )
+        except Exception as e:
+            raise JoinError(f"反连接操作失败: {str(e)}") from e
+
+    async def _ajoin_right(
+        self,
+        element: AnyElement,
+        left_data: Any,
+        left_key: Callable[..., Any],
+        right_key: Callable[..., Any],
+    ) -> List[Any]:
+        """
+        异步获取以左侧数据驱动的连接（左连接、内连接、半连接、反连接）的右侧数据，
+        连接函数声明了cache时只获取缓存中没有的键
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+            left_data (Any): 左侧数据
+            left_key (Callable): 左侧键函数
+            right_key (Callable): 右侧键函数
+
+        Returns:
+            List[Any]: 右侧数据
+        """
+        cache = self._join_cache(element)
+        if cache is None:
+            return await self._afetch_right(element, left_data, left_key)
+        rows, missing, cached = self._cache_lookup(cache, left_data, left_key)
+        fresh = await self._afetch_right(element, rows, left_key) if rows else []
+        return self._cache_fill(cache, missing, fresh, right_key, cached)
+
+    async def aall_join(self, element: AnyElement, left_data: Any) -> List[Any]:
+        """
+        异步全连接策略，右侧数据的各个切片在事件循环中并发获取
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+            left_data (Any): 左侧数据
+
+        Returns:
+            List[Any]: 连接结果
+
+        Raises:
+            JoinError: 当连接函数或条件不满足时
+        """
+        if element.join_func is None:
+            raise JoinError("** 运算符的右边不能为空")
+        try:
+            left_key, right_key, left_property, one_to_many = self._join_check(
+                element, left_data
+            )
+            self._check_all_join_cache(element)
+            right_data = await self._afetch_right(element, left_data, left_key)
+            return self._all_join_rows(
+                left_data,
+                right_data,
+                left_key,
+                right_key,
+                left_property,
+                one_to_many,
+                self._row_view(element),
+            )
+        except Exception as e:
+            raise JoinError(f"全连接操作失败: {str(e)}") from e
+
+    async def _afetch_right(
+        self, element: AnyElement, left_data: Any, left_key: Callable[..., Any]
+    ) -> List[Any]:
+        """
+        等待&右侧的协程函数，按批次获取连接的右侧数据，各个切片在事件循环中并发执行
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+            left_data (Any): 左侧数据
+            left_key (Callable): 左侧键函数，右侧函数声明了distinct_keys=True时使用
+
+        Returns:
+            List[Any]: 右侧数据
+        """
+        return await abatch_process_data(
+            self._fetch_payload(element, left_data, left_key),
+            element.right_func,  # type: ignore
+            **self._batch_options(element),
+        )
+
+    async def _resolve(self, data: Any) -> Any:
+        """
+        等待协程，或把异步迭代器收集为列表，其他数据原样返回
+        """
+        if inspect.isawaitable(data):
+            return await data
+        if isinstance(data, AsyncIterator):
+            return [item async for item in data]
+        return data
+
+    def lazy_left_join(self, element: AnyElement, left_data: Any) -> Any:
+        """
+        惰性左连接策略，排序合并连接时两侧数据都以迭代器流式合并，
+        哈希连接需要完整的左侧数据，会先物化再按left_join处理
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+            left_data (Any): 左侧数据
+
+        Returns:
+            Any: 连接结果
+        """
+        return self._lazy_join(element, left_data)
+
+    def lazy_inner_join(self, element: AnyElement, left_data: Any) -> Any:
+        """
+        惰性内连接策略，规则与lazy_left_join相同
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+            left_data (Any): 左侧数据
+
+        Returns:
+            Any: 连接结果
+        """
+        return self._lazy_join(element, left_data, inner=True)
+
+    def _lazy_join(
+        self, element: AnyElement, left_data: Any, inner: bool = False
+    ) -> Any:
+        if (
+            element.join_func is None
+            or not is_rows(left_data)
+            or self._right_range(element) is not None
+            or self._broadcast(element) is not None
+        ):
+            return self.lazy_materialize(element, left_data)
+        algorithm = self._join_algorithm(element)
+        if algorithm != "merge" and not self._memory_budget(element):
+            return self.lazy_materialize(element, left_data)
+        try:
+            left_key, right_key, left_property, one_to_many = self._join_check(
+                element, left_data
+            )
+            join = self._merge_join if algorithm == "merge" else self._grace_join
+            return join(
+                element,
+                left_data,
+                left_key,
+                right_key,
+                left_property,
+                one_to_many,
+                inner,
+            )
+        except AntChainError:
+            raise
+        except Exception as e:
+            raise JoinError(f"连接失败: {str(e)}") from e
+
+    def lazy_materialize(self, element: AnyElement, left_data: Any) -> Any:
+        """
+        没有惰性实现的策略（如连接）先把迭代器物化为列表，再交给普通处理器
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+            left_data (Any): 左侧数据
+
+        Returns:
+            Any: 处理结果
+        """
+        if isinstance(left_data, Iterator):
+            left_data = list(left_data)
+        if isinstance(element, CompiledStage):
+            return element.processor(element, left_data)
+        return self.processor[element.element_type](element, left_data)
+
+    def _right_options(self, element: AnyElement) -> Dict[str, Any]:
+        """
+        获取right_func上所有带默认值的参数，结果按函数缓存，每次调用只查找一次
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+
+        Returns:
+            Dict[str, Any]: 参数名到默认值的映射，不能修改
+        """
+        if isinstance(element, CompiledStage):
+            return element.options
+        if element.right_func is None:
+            return {}
+        return get_default_values(element.right_func)
+
+    def _lazy(self, element: AnyElement) -> bool:
+        """
+        判断right_func是否声明了lazy=True，即可以直接消费迭代器
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+
+        Returns:
+            bool: 是否可以直接消费迭代器
+        """
+        if isinstance(element, CompiledStage):
+            return element.lazy
+        return bool(self._right_options(element).get("lazy"))
+
+    def _workers(self, element: AnyElement) -> Tuple[int, bool]:
+        """
+        获取right_func上声明的并发参数workers和ordered
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+
+        Returns:
+            Tuple[int, bool]: (workers, ordered)，未声明workers时为0
+        """
+        if isinstance(element, CompiledStage):
+            return element.workers, element.ordered
+        options = self._right_options(element)
+        return options.get("workers") or 0, options.get("ordered", True)
+
+    def _processes(self, element: AnyElement) -> int:
+        """
+        获取right_func上声明的进程并发数processes
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+
+        Returns:
+            int: processes的值，未声明时为0
+        """
+        if isinstance(element, CompiledStage):
+            return element.processes
+        return self._right_options(element).get("processes") or 0
+
+    def _stream_concurrency(self, element: AnyElement) -> int:
+        """
+        获取right_func上声明的切片并发数stream_concurrency
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+
+        Returns:
+            int: stream_concurrency的值，未声明时为0
+        """
+        if isinstance(element, CompiledStage):
+            return element.stream_concurrency
+        return self._right_options(element).get("stream_concurrency") or 0
+
+    def _distinct_keys(self, element: AnyElement) -> bool:
+        """
+        判断连接右侧函数是否声明了distinct_keys=True
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+
+        Returns:
+            bool: 是否只传入去重后的left_key值
+        """
+        if isinstance(element, CompiledStage):
+            return element.distinct_keys
+        return bool(self._right_options(element).get("distinct_keys"))
+
+    def _batch_options(self, element: AnyElement) -> Dict[str, Any]:
+        """
+        获取传给batch_process_data的批处理参数
+
+        预编译阶段直接使用已解析的stream_size和stream_concurrency；
+        原始Element返回空字典，由batch_process_data一次性从函数签名中读取。
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+
+        Returns:
+            Dict[str, Any]: batch_process_data的关键字参数
+        """
+        if isinstance(element, CompiledStage):
+            return {
+                "stream_size": element.stream_size,
+                "concurrency": element.stream_concurrency,
+            }
+        return {}
+
+    def _stream_size(self, element: AnyElement) -> int:
+        """
+        获取元素的批次大小，预编译阶段直接使用已解析的值
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+
+        Returns:
+            int: stream_size的值
+        """
+        if isinstance(element, CompiledStage):
+            return element.stream_size
+        return get_stream_size(element.right_func) if element.right_func else 0
+
+    def _join_cache(self, element: AnyElement) -> Any:
+        """
+        获取join_func上声明的右侧数据缓存
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+
+        Returns:
+            Any: 连接缓存，未声明时为None
+
+        Raises:
+            ValidationError: 当cache不合法时
+        """
+        if isinstance(element, CompiledStage):
+            return element.cache
+        if element.join_func is None:
+            return None
+        cache = get_default_values(element.join_func).get("cache")
+        validate_join_cache(cache)
+        return cache
+
+    def _row_view(self, element: AnyElement) -> bool:
+        """
+        判断join_func是否声明了row_view=True
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+
+        Returns:
+            bool: 没有left_property时是否输出MergedRow视图
+        """
+        if isinstance(element, CompiledStage):
+            return bool(element.join_options.get("row_view"))
+        if element.join_func is None:
+            return False
+        return bool(get_default_values(element.join_func).get("row_view"))
+
+    def _join_options(self, element: AnyElement) -> Dict[str, Any]:
+        """
+        获取join_func上所有带默认值的参数
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+
+        Returns:
+            Dict[str, Any]: 参数名到默认值的映射
+        """
+        if isinstance(element, CompiledStage):
+            return element.join_options
+        if element.join_func is None:
+            return {}
+        return get_default_values(element.join_func)
+
+    def _broadcast(self, element: AnyElement) -> Optional[BroadcastTable]:
+        """
+        获取&右侧的BroadcastTable，右侧为普通函数时返回None
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+
+        Returns:
+            Optional[BroadcastTable]: 广播连接的右侧数据表
+        """
+        table = element.right_func
+        return table if isinstance(table, BroadcastTable) else None
+
+    def _memory_budget(self, element: AnyElement) -> Optional[int]:
+        """
+        获取join_func上声明的memory_budget，即哈希连接在内存中最多保存的右侧数据条数
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+
+        Returns:
+            Optional[int]: 未声明时为None
+        """
+        return self._join_options(element).get("memory_budget")
+
+    def _right_range(self, element: AnyElement) -> Any:
+        """
+        获取join_func上声明的区间函数right_range，声明了right_range时为范围连接
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+
+        Returns:
+            Any: 区间函数，未声明时为None
+        """
+        return self._join_options(element).get("right_range")
+
+    def _join_algorithm(self, element: AnyElement) -> str:
+        """
+        获取join_func上声明的连接算法
+
+        声明了algorithm时直接使用；否则同时声明了left_sorted=True和right_sorted=True时
+        使用排序合并连接，其余情况使用哈希连接。
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+
+        Returns:
+            str: "hash"或"merge"
+
+        Raises:
+            ValidationError: 当algorithm不合法时
+        """
+        if isinstance(element, CompiledStage):
+            options = element.join_options
+        elif element.join_func is not None:
+            options = get_default_values(element.join_func)
+        else:
+            return "hash"
+        algorithm = options.get("algorithm")
+        validate_join_algorithm(algorithm)
+        if algorithm is not None:
+            return str(algorithm)
+        if options.get("left_sorted") and options.get("right_sorted"):
+            return "merge"
+        return "hash"
+
+    def _check_merge_cache(self, element: AnyElement) -> None:
+        """
+        排序合并连接按顺序流式读取右侧数据，不能按键读取缓存
+
+        Raises:
+            JoinError: 当排序合并连接的join_func上声明了cache时
+        """
+        if self._join_cache(element) is not None:
+            raise JoinError('排序合并连接(algorithm="merge")不支持cache')
+
+    def _check_all_join_cache(self, element: AnyElement) -> None:
+        """
+        全连接需要右侧的全部数据（包括没有匹配左侧的数据），不能只按左侧的键读取缓存
+
+        Raises:
+            JoinError: 当全连接的join_func上声明了cache时
+        """
+        if self._join_cache(element) is not None:
+            raise JoinError("全连接(**)不支持cache，请使用左连接(*)")
+
+    def _join_check(
+        self, element: AnyElement, left_data: Any
+    ) -> Tuple[Any, Any, Any, Any]:
+        """
+        连接条件检查
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+            left_data (Any): 左侧数据
+
+        Returns:
+            tuple: (left_key, right_key, left_property, one_to_many)
+
+        Raises:
+            JoinError: 当连接条件不满足时
+        """
+        if isinstance(element, CompiledStage) and element.join_condition is not None:
+            left_key, right_key, left_property, one_to_many = element.join_condition
+            validate_join_conditions(element, left_key, right_key, one_to_many)
+            return left_key, right_key, left_property, one_to_many
+        if element.join_func is not None:
+            left_key, right_key, left_property, one_to_many = get_join_condition(
+                element.join_func
+            )
+            validate_join_conditions(element, left_key, right_key, one_to_many)
+            return left_key, right_key, left_property, one_to_many
+        else:
+            from .exceptions import JoinError
+
+            raise JoinError("join_func 不能为空")
+
+    def _join_keys(self, element: AnyElement) -> Tuple[Any, Any]:
+        """
+        半连接/反连接的连接条件检查，只需要left_key和right_key
+
+        Args:
+            element (AnyElement): 元素或预编译阶段
+
+        Returns:
+            tuple: (left_key, right_key)
+
+        Raises:
+            JoinError: 当连接条件不满足时
+        """
+        if isinstance(element, CompiledStage) and element.join_condition is not None:
+            left_key, right_key, _, _ = element.join_condition
+        elif element.join_func is not None:
+            left_key, right_key, _, _ = get_join_condition(element.join_func)
+        else:
+            raise JoinError("join_func 不能为空")
+        # left_property和one_to_many对半连接没有意义，不要求声明
+        validate_join_conditions(element, left_key, right_key, False)
+        return left_key, right_key
+
+    def _left_join_merge(
+        self,
+        left_data: Union[List[Any], Tuple[Any, ...]],
+        one_to_many: bool,
+        right_data: Any,
+        left_key: Callable[..., Any],
+        right_key: Callable[..., Any],
+        left_property: Optional[str],
+        row_view: bool = False,
+    ) -> List[Any]:
+        """
+        左连接合并操作
+
+        Args:
+            left_data (Union[List[Any], Tuple[Any, ...]]): 左侧数据
+            one_to_many (bool): 是否一对多连接
+            right_data (Any): 右侧数据
+            left_key (Callable): 左侧键函数
+            right_key (Callable): 右侧键函数
+            left_property (Optional[str]): 左侧属性名
+            row_view (bool): 没有left_property时是否输出引用两侧数据的MergedRow，
+                而不是复制为新的dict，默认为False
+
+        Returns:
+            List[Any]: 合并结果
+        """
+        # 如果有一边为空,那么都返回左边,因为是左连接
+        if right_data is None or len(right_data) == 0:
+            return list(left_data) if isinstance(left_data, tuple) else left_data
+        right_data_dict = self._join_index(right_data, right_key, one_to_many)
+        return self._join_probe(
+            left_data, right_data_dict, left_key, left_property, row_view
+        )
+
+    def _join_index(
+        self, right_data: Any, right_key: Callable[..., Any], one_to_many: bool
+    ) -> Dict[Any, Any]:
+        """
+        为右侧数据建立连接索引
+
+        Args:
+            right_data (Any): 右侧数据
+            right_key (Callable): 右侧键函数
+            one_to_many (bool): 是否一对多连接
+
+        Returns:
+            Dict[Any, Any]: 一对多时为dict[key, list]，一对一时为dict[key, dict]
+        """
+        if one_to_many:
+            return group_by(right_data, right_key)
+        return mapping(right_data, right_key)
+
+    def _join_probe(
+        self,
+        left_data: Union[List[Any], Tuple[Any, ...]],
+        right_data_dict: Dict[Any, Any],
+        left_key: Callable[..., Any],
+        left_property: Optional[str],
+        row_view: bool = False,
+        matched: Optional[Set[Any]] = None,
+        inner: bool = False,
+    ) -> List[Any]:
+        """
+        用左侧数据探测右侧索引，生成左连接（或内连接）的结果
+
+        Args:
+            left_data (Union[List[Any], Tuple[Any, ...]]): 左侧数据
+            right_data_dict (Dict[Any, Any]): _join_index建立的右侧索引
+            left_key (Callable): 左侧键函数
+            left_property (Optional[str]): 左侧属性名
+            row_view (bool): 没有left_property时是否输出MergedRow视图
+            matched (Optional[Set[Any]]): 不为None时记录匹配到的右侧键，供全连接使用
+            inner (bool): 为True时丢弃没有匹配的左侧数据（内连接）
+
+        Returns:
+            List[Any]: 合并结果
+
+        Raises:
+            JoinError: 当合并过程中出现错误时
+        """
+        # 最终处理结果
+        result: List[Any] = list()
+        get = right_data_dict.get
+        # 遍历左边
+        for item in left_data:
+            try:
+                # 左边key
+                l_k = left_key(item)
+                # 根据左边key获取右边数据，使用更高效的get方法
+                right_item = get(l_k)
+                # 右边数据为空,那么只把左边数据加入到结果集中(内连接时丢弃)
+                if right_item is None:
+                    if not inner:
+                        result.append(item)
+                    continue
+                if matched is not None:
+                    matched.add(l_k)
+                # 有left_property时,那么把右边数据加入到左边的一个属性字段中
+                if left_property is not None:
+                    item[left_property] = right_item
+                    result.append(item)
+                elif row_view:
+                    # 只引用两侧数据,写入时才复制
+                    if isinstance(right_item, list):
+                        for r_item in right_item:
+                            result.append(MergedRow(item, r_item))
+                    elif isinstance(right_item, tuple):
+                        result.append(MergedRow(item, dict(right_item)))
+                    else:
+                        result.append(MergedRow(item, right_item))
                 else:
                     # 没有left_property时,那么右边有多少条,就生成左边的数据.保证数据对齐.
                     if isinstance(right_item, list):
@@ -3,199 +3,527 @@ Stream模块
 
 该模块定义了数据流的核心类，包括Stream和Start类，以及各种常用的收集器函数。
 Stream类支持链式调用，通过|操作符连接不同的处理步骤。
+Stream.compile可以把整条链预编译为ExecutionPlan，用于高频重复执行；
+Stream.stream以惰性迭代器的方式执行整条链，多行数据在阶段之间逐条或逐批流动；
+Stream.acall在当前事件循环中执行整条链，协程处理函数在阶段内并发执行。
+Stream.fork把多个收集器或下游链挂在同一个前缀上，公共阶段只执行一次。
+
+收集器函数声明了默认参数lazy=True，流式执行时会直接消费上游的迭代器。
+AGG在一次遍历中同时计算多个字段的聚合，结果为字典；GROUP按分组键计算同样的聚合，
+每个分组键只保存累加器，结果为分组键到聚合结果的字典。
+TOPK使用大小为n的堆取前n条数据，UNIQUE按首次出现的顺序去重，SORT按键排序。
+DISTINCT、QUANTILES、HEAVY_HITTERS使用固定内存的概率数据结构估计基数、分位数和热点值。
+BATCH把字典数据转换为列式的Batch，ROWS转换回字典数据；SUM、AVG、MIN、MAX、COUNT
+在NumPy数组上直接计算，AGG和GROUP按列计算Batch，其他收集器把Batch视为它的字典数据。
 """
 
-from typing import Any, Callable, Dict, List, Tuple, Union
+import heapq
+from collections import deque
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
 from .strategy import StrategyFactory
 from .element import Element
-from .exceptions import ProcessingError
+from .plan import ExecutionPlan, ForkPlan
+from .aggregate import AggregatePlan, collect_aggregates, collect_groups, group_key
+from .sketch import CountMinSketch, HyperLogLog, KLLSketch
+from .columnar import Batch, is_array, numeric_column
+from .exceptions import ElementError, ProcessingError, StrategyError, ValidationError
 
 
-def collect_list(rows: Any) -> Any:
+def _columnar(rows: Any) -> Any:
+    """
+    把Batch转换为字典数据，把NumPy数组转换为列表，其他数据保持不变
+    """
+    if isinstance(rows, Batch):
+        return rows.to_rows()
+    if is_array(rows):
+        return rows.tolist()
+    return rows
+
+
+def collect_list(rows: Any, lazy: bool = True) -> Any:
     """
     收集数据为列表
 
     Args:
         rows (Any): 数据
+        lazy (bool): 声明可以直接消费迭代器，流式执行时不会先物化上游数据
 
     Returns:
         list: 数据列表
     """
-    return list(rows) if isinstance(rows, (list, tuple)) else [rows]
+    rows = _columnar(rows)
+    return list(rows) if isinstance(rows, (list, tuple, Iterator)) else [rows]
 
 
-def collect_set(rows: Any) -> set:
+def collect_set(rows: Any, lazy: bool = True) -> set:
     """
     收集数据为集合
 
     Args:
         rows (Any): 数据
+        lazy (bool): 声明可以直接消费迭代器，流式执行时不会先物化上游数据
 
     Returns:
         set: 数据集合
     """
-    if isinstance(rows, (list, tuple)):
+    rows = _columnar(rows)
+    if isinstance(rows, (list, tuple, Iterator)):
         return set(rows)
     else:
         return {rows}
 
 
-def collect_count(rows: Any) -> int:
+def collect_count(rows: Any, lazy: bool = True) -> int:
     """
     计算数据数量
 
     Args:
         rows (Any): 数据
+        lazy (bool): 声明可以直接消费迭代器，流式执行时不会先物化上游数据
 
     Returns:
         int: 数据数量
     """
-    if isinstance(rows, (list, tuple)):
+    if isinstance(rows, (list, tuple, Batch)) or is_array(rows):
         return len(rows)
+    elif isinstance(rows, Iterator):
+        return sum(1 for _ in rows)
     else:
         return 1 if rows is not None else 0
 
 
-def collect_tuple(rows: Any) -> tuple:
+def collect_tuple(rows: Any, lazy: bool = True) -> tuple:
     """
     收集数据为元组
 
     Args:
         rows (Any): 数据
+        lazy (bool): 声明可以直接消费迭代器，流式执行时不会先物化上游数据
 
     Returns:
         tuple: 数据元组
     """
-    if isinstance(rows, (list, tuple)):
+    rows = _columnar(rows)
+    if isinstance(rows, (list, tuple, Iterator)):
         return tuple(rows)
     else:
         return (rows,)
 
 
-def collect_first(rows: Any) -> Any:
+def collect_first(rows: Any, lazy: bool = True) -> Any:
     """
     获取第一个数据
 
     Args:
         rows (Any): 数据列表
+        lazy (bool): 声明可以直接消费迭代器，流式执行时只会拉取第一条数据
 
     Returns:
         Any: 第一个数据，如果列表为空则返回None
     """
+    if isinstance(rows, Batch) or is_array(rows):
+        rows = _columnar(rows[:1])
     if isinstance(rows, (list, tuple)) and len(rows) > 0:
         return rows[0]
     elif isinstance(rows, (list, tuple)) and len(rows) == 0:
         return None
+    elif isinstance(rows, Iterator):
+        return next(rows, None)
     elif rows is not None:
         return rows
     else:
         return None
 
 
-def collect_last(rows: Any) -> Any:
+def collect_last(rows: Any, lazy: bool = True) -> Any:
     """
     获取最后一个数据
 
     Args:
         rows (Any): 数据列表
+        lazy (bool): 声明可以直接消费迭代器，流式执行时不会先物化上游数据
 
     Returns:
         Any: 最后一个数据，如果列表为空则返回None
     """
+    if isinstance(rows, Batch) or is_array(rows):
+        rows = _columnar(rows[-1:])
     if isinstance(rows, (list, tuple)) and len(rows) > 0:
         return rows[-1]
     elif isinstance(rows, (list, tuple)) and len(rows) == 0:
         return None
+    elif isinstance(rows, Iterator):
+        last = deque(rows, maxlen=1)
+        return last[0] if last else None
     elif rows is not None:
         return rows
     else:
         return None
 
 
-def collect_max(rows: Any) -> Any:
+def collect_max(rows: Any, lazy: bool = True) -> Any:
     """
     获取数据中的最大值
 
     Args:
         rows (Any): 数据列表
+        lazy (bool): 声明可以直接消费迭代器，流式执行时不会先物化上游数据
 
     Returns:
         Any: 最大值，如果列表为空则返回None
     """
+    if numeric_column(rows):
+        return rows.max().item() if len(rows) > 0 else None
+    rows = _columnar(rows)
     if isinstance(rows, (list, tuple)) and len(rows) > 0:
         return max(rows)
     elif isinstance(rows, (list, tuple)) and len(rows) == 0:
         return None
+    elif isinstance(rows, Iterator):
+        return max(rows, default=None)
     elif rows is not None:
         return rows
     else:
         return None
 
 
-def collect_min(rows: Any) -> Any:
+def collect_min(rows: Any, lazy: bool = True) -> Any:
     """
     获取数据中的最小值
 
     Args:
         rows (Any): 数据列表
+        lazy (bool): 声明可以直接消费迭代器，流式执行时不会先物化上游数据
 
     Returns:
         Any: 最小值，如果列表为空则返回None
     """
+    if numeric_column(rows):
+        return rows.min().item() if len(rows) > 0 else None
+    rows = _columnar(rows)
     if isinstance(rows, (list, tuple)) and len(rows) > 0:
         return min(rows)
     elif isinstance(rows, (list, tuple)) and len(rows) == 0:
         return None
+    elif isinstance(rows, Iterator):
+        return min(rows, default=None)
     elif rows is not None:
         return rows
     else:
         return None
 
 
-def collect_sum(rows: Any) -> Union[int, float]:
+def collect_sum(rows: Any, lazy: bool = True) -> Union[int, float]:
     """
     计算数据的总和
 
     Args:
         rows (Any): 数字列表
+        lazy (bool): 声明可以直接消费迭代器，流式执行时不会先物化上游数据
 
     Returns:
         Any: 总和，如果列表为空则返回0
     """
+    if numeric_column(rows):
+        total: Union[int, float] = rows.sum().item()
+        return total
+    rows = _columnar(rows)
     if isinstance(rows, (list, tuple)) and len(rows) > 0:
         return sum(rows)
+    elif isinstance(rows, Iterator):
+        return sum(rows)
     elif isinstance(rows, (int, float)):
         return rows
     else:
         return 0
 
 
-def collect_avg(rows: Any) -> float:
+def collect_avg(rows: Any, lazy: bool = True) -> float:
     """
     计算数据的平均值
 
     Args:
         rows (Any): 数字列表
+        lazy (bool): 声明可以直接消费迭代器，流式执行时一次遍历同时累计总和与数量
 
     Returns:
         float: 平均值，如果列表为空则返回0
     """
+    if numeric_column(rows):
+        return float(rows.mean()) if len(rows) > 0 else 0.0
+    rows = _columnar(rows)
     if isinstance(rows, (list, tuple)) and len(rows) > 0:
         return sum(rows) / len(rows)
+    elif isinstance(rows, Iterator):
+        total: Union[int, float] = 0
+        count = 0
+        for value in rows:
+            total += value
+            count += 1
+        return total / count if count > 0 else 0.0
     elif isinstance(rows, (int, float)):
         return float(rows)
     else:
         return 0.0
 
 
+def _as_rows(rows: Any) -> Any:
+    rows = _columnar(rows)
+    if isinstance(rows, (list, tuple, Iterator)):
+        return rows
+    return [] if rows is None else [rows]
+
+
+def collect_reverse(rows: Any, lazy: bool = True) -> list:
+    """
+    反转数据的顺序
+
+    Args:
+        rows (Any): 数据
+        lazy (bool): 声明可以直接消费迭代器，流式执行时不会先物化上游数据
+
+    Returns:
+        list: 反转后的数据列表
+    """
+    result = list(_as_rows(rows))
+    result.reverse()
+    return result
+
+
+def _freeze(value: Any) -> Any:
+    """
+    把字典、列表、集合转换为可哈希的等价形式，内容相同的数据得到相等的结果
+    """
+    if isinstance(value, Mapping):
+        return (dict, frozenset((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, list):
+        return (list, tuple(map(_freeze, value)))
+    if isinstance(value, tuple):
+        return tuple(map(_freeze, value))
+    if isinstance(value, (set, frozenset)):
+        return frozenset(map(_freeze, value))
+    return value
+
+
+def collect_unique(
+    rows: Any, key: Optional[Callable[[Any], Any]] = None, lazy: bool = True
+) -> list:
+    """
+    保持首次出现顺序的去重
+
+    字典等不可哈希的数据（或键）按内容比较，例如两条内容相同的字典只保留第一条。
+
+    Args:
+        rows (Any): 数据
+        key (Callable | None): 去重键函数，默认为None即按数据本身去重
+        lazy (bool): 声明可以直接消费迭代器，流式执行时只保存已出现的键
+
+    Returns:
+        list: 去重后的数据列表，相同键保留第一次出现的数据
+    """
+    rows = _as_rows(rows)
+    if key is None and not isinstance(rows, Iterator):
+        try:
+            return list(dict.fromkeys(rows))
+        except TypeError:
+            # 数据不可哈希（如字典），逐条按内容去重
+            pass
+    seen: set = set()
+    result = []
+    for row in rows:
+        k = row if key is None else key(row)
+        try:
+            if k in seen:
+                continue
+        except TypeError:
+            k = _freeze(k)
+            if k in seen:
+                continue
+        seen.add(k)
+        result.append(row)
+    return result
+
+
+def collect_sort(
+    rows: Any,
+    key: Optional[Callable[[Any], Any]] = None,
+    reverse: bool = False,
+    lazy: bool = True,
+) -> list:
+    """
+    排序，与sorted相同是稳定排序
+
+    Args:
+        rows (Any): 数据
+        key (Callable | None): 排序键函数，默认为None即按数据本身排序
+        reverse (bool): 是否降序
+        lazy (bool): 声明可以直接消费迭代器，流式执行时直接对迭代器排序，不生成中间列表
+
+    Returns:
+        list: 排序后的数据列表
+    """
+    return sorted(_as_rows(rows), key=key, reverse=reverse)
+
+
+def collect_topk(
+    rows: Any,
+    n: int,
+    key: Optional[Callable[[Any], Any]] = None,
+    reverse: bool = True,
+    lazy: bool = True,
+) -> list:
+    """
+    使用大小为n的堆取前n条数据，时间复杂度O(m log n)，流式执行时只保存n条数据
+
+    结果与sorted(rows, key=key, reverse=reverse)[:n]相同。
+
+    Args:
+        rows (Any): 数据
+        n (int): 条数
+        key (Callable | None): 排序键函数，默认为None即按数据本身比较
+        reverse (bool): 默认为True即取最大的n条并降序排列，为False时取最小的n条并升序排列
+        lazy (bool): 声明可以直接消费迭代器，流式执行时不会先物化上游数据
+
+    Returns:
+        list: 前n条数据
+    """
+    rows = _as_rows(rows)
+    if reverse:
+        return heapq.nlargest(n, rows, key=key)
+    return heapq.nsmallest(n, rows, key=key)
+
+
+def _sketch_values(rows: Any, key: Optional[Callable[[Any], Any]]) -> Any:
+    rows = _as_rows(rows)
+    return rows if key is None else map(key, rows)
+
+
+def collect_distinct(
+    rows: Any,
+    key: Optional[Callable[[Any], Any]] = None,
+    precision: int = 14,
+    lazy: bool = True,
+) -> HyperLogLog:
+    """
+    使用HyperLogLog估计不同值的数量，内存固定为2**precision字节
+
+    Args:
+        rows (Any): 数据
+        key (Callable | None): 取值函数，默认为None即数据本身
+        precision (int): HyperLogLog的精度，默认为14（误差约0.8%）
+        lazy (bool): 声明可以直接消费迭代器，流式执行时不会先物化上游数据
+
+    Returns:
+        HyperLogLog: 添加了全部值的HyperLogLog，count()为估计的基数
+    """
+    sketch = HyperLogLog(precision)
+    sketch.update(_sketch_values(rows, key))
+    return sketch
+
+
+def collect_quantiles(
+    rows: Any,
+    key: Optional[Callable[[Any], Any]] = None,
+    k: int = 200,
+    lazy: bool = True,
+) -> KLLSketch:
+    """
+    使用KLL估计分位数，只保存O(k log(n / k))个样本
+
+    Args:
+        rows (Any): 数据
+        key (Callable | None): 取值函数，默认为None即数据本身
+        k (int): KLL的精度，默认为200（排名误差约1%）
+        lazy (bool): 声明可以直接消费迭代器，流式执行时不会先物化上游数据
+
+    Returns:
+        KLLSketch: 添加了全部值的KLLSketch，quantiles()为估计的分位数
+    """
+    sketch = KLLSketch(k)
+    sketch.update(_sketch_values(rows, key))
+    return sketch
+
+
+def collect_heavy_hitters(
+    rows: Any,
+    key: Optional[Callable[[Any], Any]] = None,
+    top: int = 10,
+    width: int = 2048,
+    depth: int = 5,
+    lazy: bool = True,
+) -> CountMinSketch:
+    """
+    使用Count-Min估计出现次数最多的值，内存固定为width * depth个计数器加上top * 2个候选值
+
+    Args:
+        rows (Any): 数据
+        key (Callable | None): 取值函数，默认为None即数据本身
+        top (int): 热点值的数量，默认为10
+        width (int): 每一行的计数器数量，默认为2048
+        depth (int): 行数，默认为5
+        lazy (bool): 声明可以直接消费迭代器，流式执行时不会先物化上游数据
+
+    Returns:
+        CountMinSketch: 添加了全部值的CountMinSketch，heavy_hitters()为估计的热点值
+    """
+    sketch = CountMinSketch(width, depth, top)
+    sketch.update(_sketch_values(rows, key))
+    return sketch
+
+
+def collect_batch(rows: Any, lazy: bool = True) -> Batch:
+    """
+    把字典数据转换为列式的Batch
+
+    Args:
+        rows (Any): 字典数据
+        lazy (bool): 声明可以直接消费迭代器，流式执行时逐条读取上游数据填充各列
+
+    Returns:
+        Batch: 批数据，已经是Batch时原样返回
+    """
+    if isinstance(rows, Batch):
+        return rows
+    return Batch.from_rows(_as_rows(rows))
+
+
+def collect_rows(rows: Any, lazy: bool = True) -> Any:
+    """
+    把Batch转换为字典数据
+
+    Args:
+        rows (Any): 数据
+        lazy (bool): 声明可以直接消费迭代器，流式执行时不是Batch的数据直接向下游传递
+
+    Returns:
+        Any: Batch的字典数据列表，其他数据原样返回
+    """
+    return rows.to_rows() if isinstance(rows, Batch) else rows
+
+
 class Stream:
     """
     数据流核心类
 
     该类表示数据流处理管道中的一个节点，支持链式调用。
     通过|操作符可以连接不同的处理步骤，形成完整的数据处理管道。
+
+    后续阶段保存在一个不可变的持久化链表中，每个节点为(元素, 前一个节点)：
+    每次|只创建一个新节点，时间和内存都是O(1)，从同一条链延伸出的多条链共享公共前缀。
+
+    Stream在创建后不可修改，执行时数据只保存在每次调用的局部变量中，
+    因此同一条链可以被多个线程同时执行。
     """
 
+    __slots__ = ("mode", "element", "_tail", "_size", "_next_elements")
+
+    mode: str
+    element: Element
+    _tail: Optional[Tuple[Element, Any]]
+    _size: int
+    _next_elements: Optional[List[Element]]
+
     def __init__(self, mode: str, element: Element) -> None:
         """
         初始化Stream实例
@@ -204,10 +532,37 @@ class Stream:
             mode (str): 模式
             element (Element): 元素
         """
-        self.mode = mode
-        self.element = element
-        self.child_nodes: List[Stream] = list()
-        pass
+        self._init(mode, element, None, 0)
+
+    def _init(
+        self,
+        mode: str,
+        element: Element,
+        tail: Optional[Tuple[Element, Any]],
+        size: int,
+    ) -> None:
+        """
+        设置Stream的属性，只在创建时调用
+        """
+        object.__setattr__(self, "mode", mode)
+        object.__setattr__(self, "element", element)
+        # 最后一个阶段所在的链表节点，没有后续阶段时为None
+        object.__setattr__(self, "_tail", tail)
+        object.__setattr__(self, "_size", size)
+        # 按执行顺序展开的后续元素，第一次使用时生成
+        object.__setattr__(self, "_next_elements", None)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """
+        禁止修改Stream的属性
+
+        Raises:
+            ElementError: 总是抛出，Stream创建后不可修改
+        """
+        raise ElementError(f"Stream创建后不可修改，不能设置属性 {name}")
+
+    def __delattr__(self, name: str) -> None:
+        raise ElementError(f"Stream创建后不可修改，不能删除属性 {name}")
 
     def __or__(self, other: Element) -> "Stream":
         """
@@ -219,23 +574,55 @@ class Stream:
         Returns:
             Stream: 新的Stream实例
         """
-        # 创建新的Stream对象，而不是修改当前对象
-        new_stream = Stream(self.mode, self.element)
-        # 复制现有的child_nodes
-        new_stream.child_nodes = self.child_nodes.copy()
-        # 创建下一个处理步骤的Stream对象
-        next_stream = Stream("next", other)
-        # 将下一个处理步骤添加到新Stream的child_nodes中
-        new_stream.child_nodes.append(next_stream)
+        # 创建新的Stream对象，而不是修改当前对象；新节点指向当前链的最后一个节点
+        new_stream = Stream.__new__(Stream)
+        new_stream._init(self.mode, self.element, (other, self._tail), self._size + 1)
         return new_stream
 
+    def __len__(self) -> int:
+        """
+        链上的阶段数，包括第一个阶段
+        """
+        return self._size + 1
+
+    @property
+    def child_nodes(self) -> List["Stream"]:
+        """
+        后续处理步骤，每次访问都会按执行顺序生成新的列表
+
+        Returns:
+            List[Stream]: 后续处理步骤的Stream对象
+        """
+        return [Stream("next", element) for element in self._children()]
+
+    def _children(self) -> List[Element]:
+        """
+        按执行顺序返回后续阶段的元素，结果会被缓存（链本身不可变）
+        """
+        if self._next_elements is None:
+            elements: List[Element] = list()
+            node = self._tail
+            while node is not None:
+                elements.append(node[0])
+                node = node[1]
+            elements.reverse()
+            # 只是缓存展开结果，不改变链本身，多个线程重复生成也得到相同的结果
+            object.__setattr__(self, "_next_elements", elements)
+            return elements
+        return self._next_elements
+
     def __call__(self, *args: Any, **kwds: Any) -> Any:
         """
         调用操作符重载，执行整个数据流处理管道
 
+        Args:
+            mode (str): 执行模式，传入"lazy"时等价于调用stream()
+
         Returns:
             Any: 处理结果
         """
+        if kwds.get("mode") == "lazy":
+            return self.stream()
         return self.process(self)
 
     def process(self, stream: "Stream") -> Any:
@@ -252,15 +639,112 @@ class Stream:
             ProcessingError: 当数据流处理过程中出现异常时
         """
         try:
+            # 数据只保存在本次调用的局部变量中，多个线程可以同时执行同一条链
             data = StrategyFactory.process(stream.element)
-            if self.child_nodes is not None and len(self.child_nodes) > 0:
-                for node in self.child_nodes:
-                    node.element.left_data = data
-                    data = StrategyFactory.process(node.element)
+            for element in stream._children():
+                data = StrategyFactory.process(element, data)
             return data
         except Exception as e:
             raise ProcessingError(f"数据流处理过程中出现错误: {str(e)}") from e
 
+    def compile(self, fuse: bool = True) -> ExecutionPlan:
+        """
+        预编译整条数据流
+
+        每个阶段的处理器、stream_size和连接条件只解析一次，返回的执行计划可以被反复调用。
+        编译之后再修改链中的处理函数不会影响已经生成的执行计划。
+
+        相邻的单条处理(>)和过滤(-)阶段默认会被融合为一个阶段，每条数据只遍历一次。
+        融合后同一条数据会先依次经过所有函数，再处理下一条数据。
+
+        Args:
+            fuse (bool): 是否融合相邻的>和-阶段，默认为True
+
+        Returns:
+            ExecutionPlan: 可执行的预编译计划
+
+        Raises:
+            StrategyError: 当链中存在空元素或不支持的element_type时
+        """
+        factory = StrategyFactory()
+        stages = [factory.compile(element) for element in self._elements()]
+        if fuse:
+            stages = factory.fuse(stages)
+        return ExecutionPlan(stages)
+
+    def stream(self) -> Any:
+        """
+        以流式（惰性）模式执行数据流
+
+        >、-、+以及声明了stream_size的>>阶段之间以迭代器传递数据，每个阶段只持有一条或一批数据；
+        声明了lazy=True的收集器（COUNT、SUM、FIRST、MAX等）直接消费迭代器；
+        其他阶段（如连接）会在该阶段把上游数据物化为列表。
+
+        Returns:
+            Any: 最后一个阶段为收集器时返回收集结果，否则返回结果迭代器
+
+        Raises:
+            ProcessingError: 当数据流处理过程中出现异常时
+        """
+        return self.compile().stream()
+
+    async def acall(self) -> Any:
+        """
+        在当前事件循环中异步执行数据流
+
+        >、>>、-、+以及连接(&)右侧的函数可以是协程函数：单条处理和过滤在阶段内并发执行，
+        同时在途的协程数由workers限制；批处理和连接右侧的获取按stream_size切片后并发执行，
+        同时在途的切片数由stream_concurrency限制，未声明时都使用DEFAULT_ASYNC_CONCURRENCY。
+        Start的初始化函数还可以是异步生成器函数，产出的数据会被收集为列表。
+
+        Returns:
+            Any: 处理结果
+
+        Raises:
+            ProcessingError: 当数据流处理过程中出现异常时
+        """
+        return await self.compile().acall()
+
+    def fork(self, **branches: Union[Element, "Stream"]) -> ForkPlan:
+        """
+        把多个分支挂在当前链上，生成共享前缀的分支执行计划
+
+        分支可以是一个元素（如COUNT、MAX，追加在当前链之后），也可以是一条完整的链
+        （如 amount_list | MAX）。各分支中相同的前缀阶段只执行一次，其输出同时交给每一个分支，
+        例如数据源只会被读取一次。注意各分支拿到的是同一份数据，分支中的函数不应修改共享的数据。
+
+        使用示例:
+            sales = Start() | generate_sales_data
+            amounts = sales | (DATA > (lambda x: x["amount"]))
+            result = sales.fork(COUNT=COUNT, MAX=amounts | MAX, AVG=amounts | AVG)()
+            # {"COUNT": 10, "MAX": 500, "AVG": 250.0}
+
+        Args:
+            **branches (Element | Stream): 分支名到分支的映射
+
+        Returns:
+            ForkPlan: 分支执行计划，调用后返回分支名到结果的字典，也支持acall
+
+        Raises:
+            StrategyError: 当分支不是Element或Stream，或链中存在不支持的element_type时
+        """
+        prefix = self._elements()
+        paths: Dict[str, List[Element]] = dict()
+        for name, branch in branches.items():
+            if isinstance(branch, Stream):
+                paths[name] = branch._elements()
+            elif isinstance(branch, Element):
+                paths[name] = prefix + [branch]
+            else:
+                raise StrategyError(f"分支 {name} 必须是Element或Stream")
+        return ForkPlan(paths)
+
+    def _elements(self) -> List[Element]:
+        """
+        按执行顺序返回整条链上的元素
+        """
+        return [self.element] + self._children()
+
 
 class Start:
     """
@@ -348,3 +832,244 @@ MIN = DATA >> collect_min
 SUM = DATA >> collect_sum
 # 求平均值
 AVG = DATA >> collect_avg
+# 反转
+REVERSE = DATA >> collect_reverse
+# 转成为列式的Batch
+BATCH = DATA >> collect_batch
+# Batch转回字典数据
+ROWS = DATA >> collect_rows
+
+
+def AGG(**aggregates: Any) -> Element:
+    """
+    单次遍历的多聚合收集器，替代对同一份数据分别执行COUNT、SUM、MIN、MAX、AVG
+
+    使用示例:
+        chain = Start() | load_orders | AGG(
+            count=True, sum="amount", avg={"amount": "amount", "qty": "qty"}
+        )
+        chain()  # {"count": 3, "sum": 60, "avg": {"amount": 20.0, "qty": 2.0}}
+
+    Args:
+        **aggregates: 聚合名称（count、sum、min、max、avg、first、last、reduce）到字段的映射，
+            字段可以是字段名、键函数、True（数据本身），或者{结果名: 字段}的字典
+
+    Returns:
+        Element: 收集器元素，结果为聚合名称到聚合结果的字典
+
+    Raises:
+        ValidationError: 当聚合名称或字段不合法时
+    """
+    # 提前校验，使错误在构建链时暴露
+    plan = AggregatePlan(aggregates)
+
+    def collect_agg(rows: Any, lazy: bool = True) -> Dict[str, Any]:
+        return collect_aggregates(rows, plan)
+
+    return DATA >> collect_agg
+
+
+def GROUP(key: Any, **aggregates: Any) -> Element:
+    """
+    哈希分组聚合收集器，每个分组键只保存累加器，内存占用与不同键的数量成正比
+
+    使用示例:
+        chain = Start() | load_orders | GROUP("city", count=True, sum="amount")
+        chain()  # {"hz": {"count": 2, "sum": 30}, "sh": {"count": 1, "sum": 30}}
+
+    Args:
+        key (Any): 字段名、字段名的元组/列表（分组键为元组）或键函数
+        **aggregates: 与AGG相同的聚合名称到字段的映射
+
+    Returns:
+        Element: 收集器元素，结果为分组键到聚合结果的字典，按分组键首次出现的顺序排列
+
+    Raises:
+        ValidationError: 当分组键、聚合名称或字段不合法时
+    """
+    # 提前校验，使错误在构建链时暴露；执行时传入原始的分组键，Batch可以直接使用对应的列
+    group_key(key)
+    plan = AggregatePlan(aggregates)
+
+    def collect_group(rows: Any, lazy: bool = True) -> Dict[Any, Dict[str, Any]]:
+        return collect_groups(rows, key, plan)
+
+    return DATA >> collect_group
+
+
+def _order_key(key: Any) -> Optional[Callable[[Any], Any]]:
+    return None if key is None else group_key(key)
+
+
+def UNIQUE(key: Any = None) -> Element:
+    """
+    保持首次出现顺序的去重收集器，与SET不同，结果为列表并保留原有的顺序
+
+    Args:
+        key (Any): 字段名、字段名的元组/列表或键函数，默认为None即按数据本身去重
+
+    Returns:
+        Element: 收集器元素
+
+    Raises:
+        ValidationError: 当key不合法时
+    """
+    key_func = _order_key(key)
+
+    def collect_unique_rows(rows: Any, lazy: bool = True) -> list:
+        return collect_unique(rows, key_func)
+
+    return DATA >> collect_unique_rows
+
+
+def SORT(key: Any = None, reverse: bool = False) -> Element:
+    """
+    排序收集器
+
+    Args:
+        key (Any): 字段名、字段名的元组/列表或键函数，默认为None即按数据本身排序
+        reverse (bool): 是否降序
+
+    Returns:
+        Element: 收集器元素
+
+    Raises:
+        ValidationError: 当key不合法时
+    """
+    key_func = _order_key(key)
+
+    def collect_sorted_rows(rows: Any, lazy: bool = True) -> list:
+        return collect_sort(rows, key_func, reverse)
+
+    return DATA >> collect_sorted_rows
+
+
+def TOPK(n: int, key: Any = None, reverse: bool = True) -> Element:
+    """
+    取前n条数据的收集器，使用大小为n的堆，不对全部数据排序
+
+    使用示例:
+        leaderboard = Start() | load_scores | TOPK(100, "score")
+        leaderboard.stream()  # 分数最高的100条，按分数降序
+
+    Args:
+        n (int): 条数，不能为负数
+        key (Any): 字段名、字段名的元组/列表或键函数，默认为None即按数据本身比较
+        reverse (bool): 默认为True即取最大的n条，为False时取最小的n条
+
+    Returns:
+        Element: 收集器元素，结果与SORT(key, reverse)之后取前n条相同
+
+    Raises:
+        ValidationError: 当n或key不合法时
+    """
+    if not isinstance(n, int) or isinstance(n, bool) or n < 0:
+        raise ValidationError(f"TOPK的条数必须是非负整数，收到了: {n!r}")
+    key_func = _order_key(key)
+
+    def collect_top_rows(rows: Any, lazy: bool = True) -> list:
+        return collect_topk(rows, n, key_func, reverse)
+
+    return DATA >> collect_top_rows
+
+
+def DISTINCT(key: Any = None, precision: int = 14, sketch: bool = False) -> Element:
+    """
+    近似去重计数收集器，替代SET之后COUNT，内存固定为2**precision字节
+
+    Args:
+        key (Any): 字段名、字段名的元组/列表或键函数，默认为None即数据本身
+        precision (int): HyperLogLog的精度，取值范围为4到18，默认为14（误差约0.8%）
+        sketch (bool): 为True时返回HyperLogLog本身，用于分批或多个进程之间merge
+
+    Returns:
+        Element: 收集器元素，结果为估计的不同值数量
+
+    Raises:
+        ValidationError: 当key或precision不合法时
+    """
+    key_func = _order_key(key)
+    if not isinstance(precision, int) or not 4 <= precision <= 18:
+        raise ValidationError(f"precision必须在4到18之间，收到了: {precision!r}")
+
+    def collect_distinct_count(rows: Any, lazy: bool = True) -> Any:
+        result = collect_distinct(rows, key_func, precision)
+        return result if sketch else result.count()
+
+    return DATA >> collect_distinct_count
+
+
+def QUANTILES(
+    quantiles: Any = (0.5, 0.95, 0.99),
+    key: Any = None,
+    k: int = 200,
+    sketch: bool = False,
+) -> Element:
+    """
+    近似分位数收集器
+
+    使用示例:
+        latency = Start() | load_events | QUANTILES(key="latency_ms")
+        latency.stream()  # {0.5: 12.0, 0.95: 48.5, 0.99: 120.3}
+
+    Args:
+        quantiles (Any): 0到1之间的分位点，默认为(0.5, 0.95, 0.99)
+        key (Any): 字段名、字段名的元组/列表或键函数，默认为None即数据本身
+        k (int): KLL的精度，默认为200（排名误差约1%）
+        sketch (bool): 为True时返回KLLSketch本身，用于分批或多个进程之间merge
+
+    Returns:
+        Element: 收集器元素，结果为分位点到估计值的字典，没有数据时估计值为None
+
+    Raises:
+        ValidationError: 当分位点、key或k不合法时
+    """
+    points = tuple(quantiles)
+    if not points or any(
+        not isinstance(q, (int, float)) or not 0 <= q <= 1 for q in points
+    ):
+        raise ValidationError(f"分位点必须在0到1之间，收到了: {quantiles!r}")
+    if not isinstance(k, int) or k < 8:
+        raise ValidationError(f"k必须是不小于8的整数，收到了: {k!r}")
+    key_func = _order_key(key)
+
+    def collect_quantile_values(rows: Any, lazy: bool = True) -> Any:
+        result = collect_quantiles(rows, key_func, k)
+        return result if sketch else dict(zip(points, result.quantiles(points)))
+
+    return DATA >> collect_quantile_values
+
+
+def HEAVY_HITTERS(
+    top: int = 10,
+    key: Any = None,
+    width: int = 2048,
+    depth: int = 5,
+    sketch: bool = False,
+) -> Element:
+    """
+    近似热点值收集器
+
+    Args:
+        top (int): 热点值的数量，默认为10
+        key (Any): 字段名、字段名的元组/列表或键函数，默认为None即数据本身
+        width (int): 每一行的计数器数量，默认为2048
+        depth (int): 行数，默认为5
+        sketch (bool): 为True时返回CountMinSketch本身，用于分批或多个进程之间merge
+
+    Returns:
+        Element: 收集器元素，结果为(值, 估计次数)的列表，按估计次数降序
+
+    Raises:
+        ValidationError: 当参数不合法时
+    """
+    for name, value in (("top", top), ("width", width), ("depth", depth)):
+        if not isinstance(value, int) or value <= 0:
+            raise ValidationError(f"{name}必须是正整数，收到了: {value!r}")
+    key_func = _order_key(key)
+
+    def collect_heavy_values(rows: Any, lazy: bool = True) -> Any:
+        result = collect_heavy_hitters(rows, key_func, top, width, depth)
+        return result if sketch else result.heavy_hitters()
+
+    return DATA >> collect_heavy_values
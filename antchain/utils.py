@@ -6,7 +6,10 @@ Utils模块
 """
 
 import inspect
-from typing import Callable, Any, Dict, List, Tuple, Union, Optional
+import weakref
+from itertools import islice
+from typing import Callable, Any, Dict, Iterable, Iterator, List, Tuple, Union, Optional
+from .concurrency import async_map, parallel_map
 
 
 def get_function_args_count(func: Callable[..., Any]) -> int:
@@ -38,9 +41,7 @@ def get_stream_size(func: Callable[..., Any]) -> int:
     Returns:
         int: stream_size的值，如果拿不到返回0
     """
-    sig = inspect.signature(func)
-    stream_size = get_parameter_default_value(sig, "stream_size")
-    return stream_size if stream_size else 0
+    return get_default_values(func).get("stream_size") or 0
 
 
 def get_parameter_default_value(sig: inspect.Signature, parameter_name: str) -> Any:
@@ -61,21 +62,66 @@ def get_parameter_default_value(sig: inspect.Signature, parameter_name: str) ->
     return None
 
 
+# 函数到(__defaults__, __kwdefaults__, 带默认值参数)的缓存，函数被回收时自动删除
+_default_values: "weakref.WeakKeyDictionary[Any, Tuple[Any, Any, Dict[str, Any]]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_default_values(func: Callable[..., Any]) -> Dict[str, Any]:
+    """
+    一次性获取函数上所有带默认值的参数
+
+    结果按函数缓存，未预编译的链每次执行时读取workers、processes等参数不会重复调用
+    inspect.signature；返回的字典被所有调用方共享，不能修改。
+    缓存同时记录函数的__defaults__和__kwdefaults__，给它们重新赋值后会重新读取签名；
+    没有这两个属性的可调用对象（如定义了__call__的实例）修改默认值后需要重新创建对象。
+
+    Args:
+        func (Callable[..., Any]): 要检查的函数
+
+    Returns:
+        Dict[str, Any]: 参数名到默认值的映射
+    """
+    defaults = getattr(func, "__defaults__", None)
+    kwdefaults = getattr(func, "__kwdefaults__", None)
+    try:
+        cached = _default_values[func]
+        if cached[0] is defaults and cached[1] is kwdefaults:
+            return cached[2]
+    except (KeyError, TypeError):
+        # TypeError: 函数不支持弱引用或不可哈希（如内置函数），不缓存
+        pass
+    sig = inspect.signature(func)
+    values = {
+        name: param.default
+        for name, param in sig.parameters.items()
+        if param.default is not inspect.Parameter.empty
+    }
+    try:
+        _default_values[func] = (defaults, kwdefaults, values)
+    except TypeError:
+        pass
+    return values
+
+
 def get_join_condition(func: Callable[..., Any]) -> Tuple[Any, Any, Any, Any]:
     """
     获取函数上join_condition的值
 
+    与get_default_values共用缓存，重复调用不会再次读取函数签名。
+
     Args:
         func (Callable[..., Any]): 要检查的函数
 
     Returns:
         tuple: (left_key, right_key, left_property, one_to_many)的值，如果拿不到返回None
     """
-    sig = inspect.signature(func)
-    left_key = get_parameter_default_value(sig, "left_key")
-    right_key = get_parameter_default_value(sig, "right_key")
-    left_property = get_parameter_default_value(sig, "left_property")
-    one_to_many = get_parameter_default_value(sig, "one_to_many")
+    options = get_default_values(func)
+    left_key = options.get("left_key")
+    right_key = options.get("right_key")
+    left_property = options.get("left_property")
+    one_to_many = options.get("one_to_many")
     return (left_key, right_key, left_property, one_to_many)
 
 
@@ -83,51 +129,182 @@ def batch_process_data(
     data: Union[List[Any], Tuple[Any, ...]],
     func: Callable[..., Any],
     wrap_result: bool = True,
+    stream_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
 ) -> List[Any]:
     """
     批处理数据
 
+    函数声明了stream_concurrency默认参数(大于1)时，各个切片会被并发地提交到共享线程池，
+    同时在途的切片不超过stream_concurrency个，结果仍按切片顺序拼接。
+
     Args:
         data (Union[List[Any], Tuple[Any, ...]]): 要处理的数据
         func (Callable[..., Any]): 处理函数
         wrap_result (bool): 是否将结果包装成列表，默认为True
+        stream_size (Optional[int]): 预先解析好的批次大小，为None时从函数签名中读取
+        concurrency (Optional[int]): 预先解析好的切片并发数，为None时从函数签名中读取
 
     Returns:
         List[Any]: 处理结果
     """
-    stream_size = get_stream_size(func)
+    if stream_size is None or concurrency is None:
+        options = get_default_values(func)
+        if stream_size is None:
+            stream_size = options.get("stream_size") or 0
+        if concurrency is None:
+            concurrency = options.get("stream_concurrency") or 0
     if stream_size <= 0:
-        result_data = func(data)
-        if isinstance(result_data, list):
-            return result_data
-        elif result_data is not None:
-            return [result_data] if wrap_result else result_data
-        else:
-            return [] if wrap_result else []
+        return _wrap_batch_result(func(data), wrap_result)
+    slices = _slice_data(data, stream_size)
+    if concurrency > 1:
+        # 并发调用各个切片，结果按切片顺序返回
+        results: Iterable[Any] = parallel_map(func, slices, concurrency)
     else:
-        # 使用更高效的切片方式
-        data_len = len(data)
-        total_slices = (data_len + stream_size - 1) // stream_size
-        result: List[Any] = list()
-        # 循环处理每个切片
-        for i in range(total_slices):
-            # 计算当前切片的起始和结束索引
-            start = i * stream_size
-            # 优化结束索引计算，避免超出范围
-            end = min(start + stream_size, data_len)
-            slice_data = data[start:end]  # 截取切片
-            # 当切片为空时直接跳出循环
-            if len(slice_data) == 0:
-                break
-            func_data = func(slice_data)
-            if func_data is None:
-                continue
-            elif isinstance(func_data, (list, tuple)):
-                # 使用extend方法提高性能
-                result.extend(func_data)
-            else:
-                result.append(func_data)
-        return result
+        results = map(func, slices)
+    return _concat_batch_results(results)
+
+
+async def abatch_process_data(
+    data: Union[List[Any], Tuple[Any, ...]],
+    func: Callable[..., Any],
+    wrap_result: bool = True,
+    stream_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+) -> List[Any]:
+    """
+    批处理数据的异步版本，func为协程函数
+
+    声明了stream_size时各个切片在当前事件循环中并发执行，同时在途的切片不超过
+    stream_concurrency个（未声明时使用DEFAULT_ASYNC_CONCURRENCY），结果仍按切片顺序拼接。
+
+    Args:
+        data (Union[List[Any], Tuple[Any, ...]]): 要处理的数据
+        func (Callable[..., Any]): 协程处理函数
+        wrap_result (bool): 是否将结果包装成列表，默认为True
+        stream_size (Optional[int]): 预先解析好的批次大小，为None时从函数签名中读取
+        concurrency (Optional[int]): 预先解析好的切片并发数，为None时从函数签名中读取
+
+    Returns:
+        List[Any]: 处理结果
+    """
+    if stream_size is None or concurrency is None:
+        options = get_default_values(func)
+        if stream_size is None:
+            stream_size = options.get("stream_size") or 0
+        if concurrency is None:
+            concurrency = options.get("stream_concurrency") or 0
+    if stream_size <= 0:
+        return _wrap_batch_result(await func(data), wrap_result)
+    results = await async_map(func, _slice_data(data, stream_size), concurrency)
+    return _concat_batch_results(results)
+
+
+def _wrap_batch_result(result_data: Any, wrap_result: bool) -> List[Any]:
+    """
+    整体调用批处理函数时，按wrap_result整理返回值
+    """
+    if isinstance(result_data, list):
+        return result_data
+    elif result_data is not None:
+        return [result_data] if wrap_result else result_data
+    else:
+        return []
+
+
+def _slice_data(
+    data: Union[List[Any], Tuple[Any, ...]], stream_size: int
+) -> Iterator[Any]:
+    """
+    按stream_size把已知长度的数据切分为切片
+    """
+    # 使用更高效的切片方式
+    data_len = len(data)
+    total_slices = (data_len + stream_size - 1) // stream_size
+    # 计算每个切片的起始和结束索引，优化结束索引计算，避免超出范围
+    bounds = (
+        (i * stream_size, min((i + 1) * stream_size, data_len))
+        for i in range(total_slices)
+    )
+    return (data[start:end] for start, end in bounds)
+
+
+def _concat_batch_results(results: Iterable[Any]) -> List[Any]:
+    """
+    按切片顺序拼接各个切片的处理结果，None会被忽略
+    """
+    result: List[Any] = list()
+    # 循环处理每个切片
+    for func_data in results:
+        if func_data is None:
+            continue
+        elif isinstance(func_data, (list, tuple)):
+            # 使用extend方法提高性能
+            result.extend(func_data)
+        else:
+            result.append(func_data)
+    return result
+
+
+def is_rows(data: Any) -> bool:
+    """
+    判断数据是否为多行数据（列表、元组或迭代器）
+
+    Args:
+        data (Any): 要判断的数据
+
+    Returns:
+        bool: 是否为多行数据
+    """
+    return isinstance(data, (list, tuple, Iterator))
+
+
+def iter_batches(rows: Iterable[Any], stream_size: int) -> Iterator[List[Any]]:
+    """
+    按stream_size把行数据切分为批次，按需逐批生成，不会一次性物化全部数据
+
+    Args:
+        rows (Iterable[Any]): 行数据，可以是列表、元组或迭代器
+        stream_size (int): 批次大小，必须大于0
+
+    Returns:
+        Iterator[List[Any]]: 批次迭代器
+    """
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, stream_size))
+        if not batch:
+            return
+        yield batch
+
+
+def iter_key_batches(
+    rows: Iterable[Any], key_func: Callable[[Any], Any], stream_size: int
+) -> Iterator[List[Any]]:
+    """
+    按stream_size切分已按键排序的行数据，键相同的连续行不会被拆到两个批次中
+
+    批次在达到stream_size后，会继续读入与最后一行键相同的行，因此批次可能略大于stream_size。
+
+    Args:
+        rows (Iterable[Any]): 已按key_func排序的行数据，可以是列表、元组或迭代器
+        key_func (Callable[[Any], Any]): 键函数
+        stream_size (int): 批次大小，必须大于0
+
+    Returns:
+        Iterator[List[Any]]: 批次迭代器
+    """
+    batch: List[Any] = []
+    last_key: Any = None
+    for row in rows:
+        key = key_func(row)
+        if len(batch) >= stream_size and key != last_key:
+            yield batch
+            batch = []
+        batch.append(row)
+        last_key = key
+    if batch:
+        yield batch
 
 
 def get_function_return_type(func: Callable[..., Any]) -> Any:
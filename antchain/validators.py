@@ -92,3 +92,43 @@ def validate_join_conditions(
         raise JoinError("right_key 不能为空")
     if one_to_many is None:
         raise JoinError("one_to_many 不能为空")
+
+
+def validate_join_cache(cache: Any) -> None:
+    """
+    验证连接函数上声明的cache
+
+    Args:
+        cache (Any): 连接函数上cache参数的默认值
+
+    Raises:
+        ValidationError: 当cache没有实现get_many和put_many方法时
+    """
+    if cache is None:
+        return
+    if not (hasattr(cache, "get_many") and hasattr(cache, "put_many")):
+        from .exceptions import ValidationError
+
+        raise ValidationError(
+            "连接函数上的cache必须实现get_many和put_many方法（如JoinCache），"
+            + f"当前类型: {type(cache).__name__}"
+        )
+
+
+def validate_join_algorithm(algorithm: Any) -> None:
+    """
+    验证连接函数上声明的algorithm
+
+    Args:
+        algorithm (Any): 连接函数上algorithm参数的默认值
+
+    Raises:
+        ValidationError: 当algorithm不是None、"hash"或"merge"时
+    """
+    if algorithm is None or algorithm in ("hash", "merge"):
+        return
+    from .exceptions import ValidationError
+
+    raise ValidationError(
+        f'连接函数上的algorithm只能是"hash"或"merge"，当前值: {algorithm!r}'
+    )
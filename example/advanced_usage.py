@@ -79,6 +79,18 @@ def main():
     print(f"   第一笔销售金额: {first_sale_amount()}")
     print(f"   最后一笔销售金额: {last_sale_amount()}")
 
+    # 多个统计共享同一个数据源，数据源只读取一次
+    print("\n4. 分支执行（共享前缀）:")
+    dashboard = sales_data.fork(
+        COUNT=COUNT,
+        MAX=amount_list | MAX,
+        MIN=amount_list | MIN,
+        AVG=amount_list | AVG,
+        SUM=amount_list | SUM,
+    )
+    for name, value in dashboard().items():
+        print(f"   {name}: {value}")
+
     print("\n=== 示例完成 ===")
 
 
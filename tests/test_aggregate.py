@@ -0,0 +1,163 @@
+import random
+import unittest
+from functools import reduce
+from antchain import Start, AGG, GROUP
+from antchain.aggregate import (
+    AGG_CHUNK_SIZE,
+    AggregatePlan,
+    collect_aggregates,
+    collect_groups,
+)
+from antchain.exceptions import ValidationError
+from antchain.utils import group_by
+
+
+def init_orders(size=3000):
+    rng = random.Random(5)
+    return [
+        {
+            "city": rng.choice("abcdefg"),
+            "shop": rng.randrange(3),
+            "amount": rng.randrange(1000),
+            "qty": rng.choice([None, 1, 2, 3]),
+        }
+        for _ in range(size)
+    ]
+
+
+class TestAggregatePlan(unittest.TestCase):
+
+    def test_first_last_and_reduce(self):
+        """测试first、last以及带初始值和不带初始值的reduce"""
+        rows = [{"v": 3}, {"v": None}, {"v": 5}, {"v": 2}]
+        result = collect_aggregates(
+            rows,
+            {
+                "first": "v",
+                "last": "v",
+                "reduce": {
+                    "product": (lambda a, b: a * b, "v"),
+                    "joined": (lambda a, b: a + str(b), "v", ""),
+                },
+            },
+        )
+        self.assertEqual(
+            result,
+            {"first": 3, "last": 2, "reduce": {"product": 30, "joined": "352"}},
+        )
+        empty = collect_aggregates([], {"first": "v", "reduce": (max, "v")})
+        self.assertEqual(empty, {"first": None, "reduce": None})
+
+    def test_fields_are_shared(self):
+        """测试同一个字段上的多个聚合只取值一次"""
+        calls = []
+
+        def amount(row):
+            calls.append(row)
+            return row["amount"]
+
+        rows = init_orders(100)
+        plan = AggregatePlan({"sum": amount, "max": amount, "avg": amount})
+        result = collect_aggregates(iter(rows), plan)
+        self.assertEqual(len(calls), 100)
+        self.assertEqual(result["sum"], sum(row["amount"] for row in rows))
+
+    def test_invalid_aggregates(self):
+        """测试不合法的聚合和reduce"""
+        for aggregates in (
+            {},
+            {"median": "amount"},
+            {"sum": 1},
+            {"reduce": "amount"},
+            {"reduce": ("amount", max)},
+        ):
+            with self.subTest(aggregates=aggregates):
+                with self.assertRaises(ValidationError):
+                    AggregatePlan(aggregates)
+
+
+class TestGroup(unittest.TestCase):
+
+    def setUp(self):
+        self.orders = init_orders()
+        self.aggregates = {
+            "count": {"rows": True, "qty": "qty"},
+            "sum": "amount",
+            "min": "amount",
+            "max": "amount",
+            "avg": "qty",
+            "first": "amount",
+            "last": "amount",
+            "reduce": (lambda a, b: a | b, lambda row: 1 << row["shop"], 0),
+        }
+
+    def expected(self, key_func):
+        result = {}
+        for key, rows in group_by(self.orders, key_func).items():
+            qty = [row["qty"] for row in rows if row["qty"] is not None]
+            amounts = [row["amount"] for row in rows]
+            result[key] = {
+                "count": {"rows": len(rows), "qty": len(qty)},
+                "sum": sum(amounts),
+                "min": min(amounts),
+                "max": max(amounts),
+                "avg": sum(qty) / len(qty) if qty else 0.0,
+                "first": amounts[0],
+                "last": amounts[-1],
+                "reduce": reduce(lambda a, b: a | (1 << b["shop"]), rows, 0),
+            }
+        return result
+
+    def test_same_as_group_by(self):
+        """测试分组聚合的结果与先分组再聚合一致"""
+        self.assertGreater(len(self.orders), AGG_CHUNK_SIZE * 2)
+        expected = self.expected(lambda row: row["city"])
+        for rows in (self.orders, iter(self.orders)):
+            result = collect_groups(rows, "city", self.aggregates)
+            self.assertEqual(result, expected)
+            self.assertEqual(list(result), list(expected))
+
+    def test_tuple_and_function_keys(self):
+        """测试多个字段的分组键和键函数"""
+        expected = self.expected(lambda row: (row["city"], row["shop"]))
+        self.assertEqual(
+            collect_groups(self.orders, ("city", "shop"), self.aggregates), expected
+        )
+        expected = self.expected(lambda row: row["amount"] % 3)
+        result = collect_groups(
+            self.orders, lambda row: row["amount"] % 3, self.aggregates
+        )
+        self.assertEqual(result, expected)
+        single = collect_groups(self.orders, ["city"], {"count": True})
+        self.assertIn(("a",), single)
+
+    def test_group_in_chain(self):
+        """测试GROUP在普通执行和流式执行中的结果一致"""
+        pulled = []
+
+        def source():
+            for row in self.orders:
+                pulled.append(row)
+                yield row
+
+        element = GROUP("city", count=True, sum="amount")
+        eager = (Start() | (lambda: self.orders) | element)()
+        streamed = (Start() | source | element).stream()
+        self.assertEqual(eager, streamed)
+        self.assertEqual(len(pulled), len(self.orders))
+        self.assertEqual(sum(group["count"] for group in eager.values()), 3000)
+        total = (Start() | (lambda: self.orders) | AGG(count=True))()
+        self.assertEqual(total, {"count": 3000})
+
+    def test_invalid_group(self):
+        """测试不合法的分组键和聚合在构建时报错"""
+        with self.assertRaises(ValidationError):
+            GROUP(1, count=True)
+        with self.assertRaises(ValidationError):
+            GROUP("city")
+        with self.assertRaises(ValidationError):
+            GROUP("city", median="amount")
+
+
+if __name__ == "__main__":
+    unittest.main()
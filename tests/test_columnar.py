@@ -0,0 +1,189 @@
+import pickle
+import random
+import unittest
+from unittest import mock
+from antchain import Start, DATA, BATCH, ROWS, COUNT, SUM, AVG, MIN, MAX
+from antchain import FIRST, LAST, LIST, AGG, GROUP, TOPK
+from antchain import columnar, aggregate
+from antchain.columnar import Batch, is_array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def init_orders(size=2000):
+    rng = random.Random(7)
+    return [
+        {
+            "city": rng.choice("abcde"),
+            "shop": rng.randrange(3),
+            "amount": rng.randrange(1000),
+            "price": rng.randrange(100) / 4,
+            "qty": rng.choice([None, 1, 2, 3]),
+        }
+        for _ in range(size)
+    ]
+
+
+AGGREGATES = {
+    "count": {"rows": True, "qty": "qty"},
+    "sum": {"amount": "amount", "price": "price"},
+    "min": "price",
+    "max": "amount",
+    "avg": {"amount": "amount", "qty": "qty"},
+    "first": "amount",
+    "last": {"price": "price", "qty": "qty"},
+    "reduce": (lambda a, b: a ^ b, "amount", 0),
+}
+
+
+class TestBatch(unittest.TestCase):
+
+    def test_round_trip(self):
+        """测试字典数据与Batch的相互转换"""
+        rows = init_orders(100)
+        rows[3] = {"city": "z", "amount": 2**70}
+        batch = Batch.from_rows(iter(rows))
+        self.assertEqual(len(batch), 100)
+        self.assertEqual(batch.columns, ["city", "shop", "amount", "price", "qty"])
+        expected = [{name: row.get(name) for name in batch.columns} for row in rows]
+        self.assertEqual(batch.to_rows(), expected)
+        self.assertEqual(list(batch), expected)
+        self.assertEqual(pickle.loads(pickle.dumps(batch)).to_rows(), expected)
+        self.assertIsInstance(batch["city"], list)
+        self.assertIsInstance(batch["qty"], list)
+        self.assertEqual(Batch.from_rows([]).to_rows(), [])
+        only = Batch.from_rows(rows, columns=["city"])
+        self.assertEqual(only.columns, ["city"])
+
+    @unittest.skipIf(numpy is None, "需要NumPy")
+    def test_numeric_columns(self):
+        """测试数值列保存为NumPy数组并支持向量化运算"""
+        batch = Batch.from_rows(init_orders(100))
+        self.assertEqual(batch["shop"].dtype, numpy.int64)
+        self.assertEqual(batch["price"].dtype, numpy.float64)
+        total = batch["amount"] * batch["shop"]
+        batch = batch.with_column("total", total)
+        self.assertTrue(is_array(batch["total"]))
+        self.assertEqual(
+            batch.to_rows()[5]["total"], batch["amount"][5] * batch["shop"][5]
+        )
+        self.assertIsInstance(batch.to_rows()[0]["total"], int)
+
+    def test_slice_select_and_filter(self):
+        """测试切片、选择字段和按掩码过滤"""
+        rows = init_orders(50)
+        batch = Batch.from_rows(rows)
+        self.assertEqual(batch[10:20].to_rows(), batch.to_rows()[10:20])
+        self.assertEqual(len(batch[-5:]), 5)
+        selected = batch.select("city", "amount")
+        self.assertEqual(
+            selected.to_rows()[0],
+            {"city": rows[0]["city"], "amount": rows[0]["amount"]},
+        )
+        mask = [row["amount"] > 500 for row in rows]
+        filtered = batch.filter(mask)
+        self.assertEqual(
+            filtered.to_rows(), [row for row in batch.to_rows() if row["amount"] > 500]
+        )
+
+    def test_invalid_batch(self):
+        """测试长度不一致的列和不支持的取值方式"""
+        with self.assertRaises(ValueError):
+            Batch({"a": [1, 2], "b": [1]})
+        batch = Batch({"a": [1, 2, 3]})
+        with self.assertRaises(ValueError):
+            batch.with_column("b", [1])
+        with self.assertRaises(ValueError):
+            batch.filter([True])
+        with self.assertRaises(TypeError):
+            batch[0]
+        with self.assertRaises(KeyError):
+            batch["b"]
+
+
+class TestColumnarCollectors(unittest.TestCase):
+
+    def setUp(self):
+        self.orders = init_orders()
+        self.batch = Batch.from_rows(self.orders)
+
+    def test_numeric_collectors(self):
+        """测试SUM、AVG、MIN、MAX、COUNT在列上的结果与在列表上一致"""
+        amounts = [row["amount"] for row in self.orders]
+        for collector in (SUM, AVG, MIN, MAX, COUNT, FIRST, LAST, LIST):
+            with self.subTest(collector=collector):
+                expected = (Start() | (lambda: amounts) | collector)()
+                result = (
+                    Start() | (lambda: self.batch) | (DATA >> (lambda b: b["amount"]))
+                )
+                result = (result | collector)()
+                self.assertEqual(result, expected)
+                self.assertEqual(type(result), type(expected))
+        empty = self.batch.filter([False] * len(self.batch))
+        for collector, expected in ((SUM, 0), (AVG, 0.0), (COUNT, 0)):
+            chain = Start() | (lambda: empty) | (DATA >> (lambda b: b["amount"]))
+            self.assertEqual((chain | collector)(), expected)
+
+    def test_row_collectors(self):
+        """测试其他收集器把Batch视为字典数据"""
+        rows = self.batch.to_rows()
+        self.assertEqual((Start() | (lambda: self.batch) | COUNT)(), len(rows))
+        self.assertEqual((Start() | (lambda: self.batch) | FIRST)(), rows[0])
+        self.assertEqual((Start() | (lambda: self.batch) | LAST)(), rows[-1])
+        self.assertEqual((Start() | (lambda: self.batch) | LIST)(), rows)
+        top = (Start() | (lambda: self.batch) | TOPK(3, "amount"))()
+        self.assertEqual(
+            top, sorted(rows, key=lambda row: row["amount"], reverse=True)[:3]
+        )
+
+    def test_agg_and_group(self):
+        """测试AGG和GROUP按列计算的结果与按行计算一致"""
+        self.assertEqual(
+            (Start() | (lambda: self.batch) | AGG(**AGGREGATES))(),
+            (Start() | (lambda: self.orders) | AGG(**AGGREGATES))(),
+        )
+        for key in ("city", ("city", "shop"), ["shop"], lambda row: row["amount"] % 7):
+            with self.subTest(key=key):
+                expected = (
+                    Start() | (lambda: self.orders) | GROUP(key, **AGGREGATES)
+                )()
+                result = (Start() | (lambda: self.batch) | GROUP(key, **AGGREGATES))()
+                self.assertEqual(result, expected)
+                self.assertEqual(list(result), list(expected))
+        expected = (Start() | (lambda: []) | AGG(**AGGREGATES))()
+        self.assertEqual(
+            (Start() | (lambda: Batch.from_rows([])) | AGG(**AGGREGATES))(), expected
+        )
+
+    def test_convert_in_chain(self):
+        """测试BATCH和ROWS在普通执行和流式执行中转换数据"""
+        chain = Start() | (lambda: iter(self.orders)) | BATCH
+        self.assertEqual(chain.stream().to_rows(), self.batch.to_rows())
+        self.assertEqual((chain | ROWS)(), self.batch.to_rows())
+        passed = (Start() | (lambda: iter(self.orders)) | ROWS).stream()
+        self.assertEqual(list(passed), self.orders)
+        grouped = (chain | GROUP("city", sum="amount")).stream()
+        expected = (Start() | (lambda: self.orders) | GROUP("city", sum="amount"))()
+        self.assertEqual(grouped, expected)
+
+    def test_without_numpy(self):
+        """测试没有安装NumPy时所有列保存为列表，结果不变"""
+        expected = (Start() | (lambda: self.orders) | GROUP("city", **AGGREGATES))()
+        with (
+            mock.patch.object(columnar, "numpy", None),
+            mock.patch.object(aggregate, "numpy", None),
+        ):
+            batch = Batch.from_rows(self.orders)
+            self.assertIsInstance(batch["amount"], list)
+            result = (Start() | (lambda: batch) | GROUP("city", **AGGREGATES))()
+            self.assertEqual(result, expected)
+            total = Start() | (lambda: batch) | (DATA >> (lambda b: b["amount"]))
+            self.assertEqual((total | SUM)(), sum(row["amount"] for row in self.orders))
+            self.assertEqual(len(batch.filter([True, False] * 1000)), 1000)
+
+
+if __name__ == "__main__":
+    unittest.main()
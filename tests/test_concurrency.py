@@ -0,0 +1,314 @@
+import asyncio
+import os
+import threading
+import time
+import unittest
+from antchain import Start, DATA
+from antchain.concurrency import (
+    DEFAULT_THREAD_POOL_SIZE,
+    async_map,
+    ensure_picklable,
+    get_process_pool,
+    parallel_map,
+    process_map,
+    set_thread_pool_size,
+)
+from antchain.exceptions import ProcessingError, ValidationError
+
+
+# 进程池只能执行可以被pickle序列化的模块级函数
+def score(row, processes=2):
+    return {"id": row["id"], "score": row["id"] * row["id"], "pid": os.getpid()}
+
+
+def score_batch(rows, stream_size=3, processes=2):
+    return [{"id": row["id"], "score": row["id"] * 2} for row in rows]
+
+
+def total(rows, processes=2):
+    return sum(row["id"] for row in rows)
+
+
+def broken_score(row, processes=2):
+    if row["id"] == 7:
+        raise ValueError("评分失败")
+    return row
+
+
+def make_rows():
+    return [{"id": i} for i in range(20)]
+
+
+class TestParallelMap(unittest.TestCase):
+
+    def test_ordered_results(self):
+        """测试按输入顺序返回结果"""
+
+        def slow_square(x):
+            time.sleep(0.001 * (10 - x))
+            return x * x
+
+        result = list(parallel_map(slow_square, range(10), workers=4))
+        self.assertEqual(result, [x * x for x in range(10)])
+
+    def test_unordered_results(self):
+        """测试按完成顺序返回结果"""
+        result = list(parallel_map(lambda x: x + 1, range(20), 4, ordered=False))
+        self.assertEqual(sorted(result), list(range(1, 21)))
+
+    def test_bounded_in_flight(self):
+        """测试同时在途的任务不超过workers个"""
+        lock = threading.Lock()
+        state = {"running": 0, "peak": 0}
+
+        def work(x):
+            with lock:
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+            time.sleep(0.002)
+            with lock:
+                state["running"] -= 1
+            return x
+
+        for ordered in (True, False):
+            state["peak"] = 0
+            list(parallel_map(work, range(30), workers=3, ordered=ordered))
+            self.assertLessEqual(state["peak"], 3)
+
+    def test_exception_is_raised(self):
+        """测试任务中的异常在取结果时抛出"""
+
+        def fail_on_three(x):
+            if x == 3:
+                raise ValueError("第三条失败")
+            return x
+
+        with self.assertRaises(ValueError):
+            list(parallel_map(fail_on_three, range(10), workers=2))
+
+    def test_set_thread_pool_size(self):
+        """测试设置线程池大小"""
+        with self.assertRaises(ValueError):
+            set_thread_pool_size(0)
+        set_thread_pool_size(8)
+        self.assertEqual(list(parallel_map(str, range(3), workers=2)), ["0", "1", "2"])
+        set_thread_pool_size(DEFAULT_THREAD_POOL_SIZE)
+
+
+class TestAsyncMap(unittest.TestCase):
+
+    def test_results_keep_order_and_limit(self):
+        """测试异步映射保持顺序且同时在途的协程不超过limit个"""
+        state = {"running": 0, "peak": 0}
+
+        async def work(x):
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+            await asyncio.sleep(0.001 * (10 - x))
+            state["running"] -= 1
+            return x * x
+
+        result = asyncio.run(async_map(work, range(10), 3))
+        self.assertEqual(result, [x * x for x in range(10)])
+        self.assertEqual(state["peak"], 3)
+
+    def test_exception_cancels_pending(self):
+        """测试任一协程失败时其余协程被取消"""
+        finished = []
+
+        async def work(x):
+            if x == 0:
+                raise ValueError("第一条失败")
+            await asyncio.sleep(0.05)
+            finished.append(x)
+            return x
+
+        async def run():
+            with self.assertRaises(ValueError):
+                await async_map(work, range(5), 5)
+            await asyncio.sleep(0.1)
+
+        asyncio.run(run())
+        self.assertEqual(finished, [])
+
+
+class TestParallelOneStage(unittest.TestCase):
+
+    def test_workers_run_concurrently(self):
+        """测试声明workers的>阶段并发执行"""
+
+        def lookup(row, workers=8):
+            time.sleep(0.02)
+            return {**row, "looked_up": True}
+
+        chain = Start() | (lambda: [{"id": i} for i in range(16)]) | (DATA > lookup)
+        start_time = time.perf_counter()
+        result = chain()
+        elapsed = time.perf_counter() - start_time
+        self.assertEqual([row["id"] for row in result], list(range(16)))
+        self.assertTrue(all(row["looked_up"] for row in result))
+        # 串行需要0.32秒，8路并发约0.04秒
+        self.assertLess(elapsed, 0.25)
+        self.assertEqual(chain.compile()(), result)
+        self.assertEqual(list(chain.stream()), result)
+
+    def test_unordered_mode(self):
+        """测试ordered=False时按完成顺序返回"""
+
+        def lookup(row, workers=4, ordered=False):
+            return row * 2
+
+        chain = Start() | (lambda: list(range(10))) | (DATA > lookup)
+        self.assertEqual(sorted(chain()), [x * 2 for x in range(10)])
+
+    def test_row_exception_is_processing_error(self):
+        """测试并发执行时单条数据的异常被包装为ProcessingError"""
+
+        def lookup(row, workers=4):
+            if row == 5:
+                raise ValueError("查询失败")
+            return row
+
+        chain = Start() | (lambda: list(range(10))) | (DATA > lookup)
+        for run in (chain, chain.compile(), lambda: list(chain.stream())):
+            with self.assertRaises(ProcessingError) as context:
+                run()
+            self.assertIn("单条处理函数执行失败", str(context.exception))
+            self.assertIn("查询失败", str(context.exception))
+
+    def test_parallel_stage_is_not_fused(self):
+        """测试并发阶段不参与融合"""
+
+        def lookup(row, workers=4):
+            return row
+
+        chain = (
+            Start()
+            | (lambda: [1, 2])
+            | (DATA > lookup)
+            | (DATA > (lambda x: x + 1))
+            | (DATA - (lambda x: x > 2))
+        )
+        plan = chain.compile()
+        self.assertEqual(len(plan), 3)
+        self.assertEqual(plan(), [3])
+
+
+class TestStreamConcurrency(unittest.TestCase):
+
+    def test_join_fetch_slices_run_concurrently(self):
+        """测试连接右侧数据的切片被并发获取"""
+
+        def fetch(rows, stream_size=2, stream_concurrency=5):
+            time.sleep(0.02)
+            return [{"user_id": row["id"], "score": row["id"]} for row in rows]
+
+        def join(
+            left_key=lambda x: x["id"],
+            right_key=lambda x: x["user_id"],
+            left_property="score",
+            one_to_many=False,
+        ):
+            pass
+
+        chain = (
+            Start() | (lambda: [{"id": i} for i in range(10)]) | ((DATA & fetch) * join)
+        )
+        start_time = time.perf_counter()
+        result = chain()
+        elapsed = time.perf_counter() - start_time
+        self.assertEqual([row["score"]["score"] for row in result], list(range(10)))
+        # 串行需要5次往返约0.1秒，并发约0.02秒
+        self.assertLess(elapsed, 0.08)
+        self.assertEqual(chain.compile()(), result)
+
+    def test_multi_slices_keep_order(self):
+        """测试>>阶段并发处理切片并保持顺序"""
+
+        def lookup(rows, stream_size=3, stream_concurrency=3):
+            time.sleep(0.001 * (20 - rows[0]))
+            return [row * 2 for row in rows]
+
+        chain = Start() | (lambda: list(range(20))) | (DATA >> lookup)
+        expected = [x * 2 for x in range(20)]
+        self.assertEqual(chain(), expected)
+        self.assertEqual(chain.compile()(), expected)
+        self.assertEqual(list(chain.stream()), expected)
+
+
+class TestProcessPoolStage(unittest.TestCase):
+
+    def test_process_map_keeps_order(self):
+        """测试进程池按数据块顺序返回结果"""
+        chunks = [[1, 2], [3], [4, 5, 6]]
+        result = list(process_map(abs, chunks, processes=2))
+        self.assertEqual(result, [[1, 2], [3], [4, 5, 6]])
+
+    def test_one_stage_in_process_pool(self):
+        """测试声明processes的>阶段在工作进程中执行并保持顺序"""
+        chain = Start() | make_rows | (DATA > score)
+        result = chain()
+        self.assertEqual([row["id"] for row in result], list(range(20)))
+        self.assertEqual([row["score"] for row in result], [i * i for i in range(20)])
+        self.assertNotIn(os.getpid(), {row["pid"] for row in result})
+        self.assertEqual(
+            [row["score"] for row in chain.compile()()],
+            [row["score"] for row in result],
+        )
+        self.assertEqual(
+            [row["score"] for row in chain.stream()],
+            [row["score"] for row in result],
+        )
+
+    def test_multi_stage_in_process_pool(self):
+        """测试声明processes的>>阶段按stream_size切块执行"""
+        chain = Start() | make_rows | (DATA >> score_batch)
+        expected = [{"id": i, "score": i * 2} for i in range(20)]
+        self.assertEqual(chain(), expected)
+        self.assertEqual(list(chain.stream()), expected)
+        # 没有stream_size时作为一个整体在工作进程中执行
+        self.assertEqual((Start() | make_rows | (DATA >> total))(), 190)
+
+    def test_workers_are_not_forked(self):
+        """测试共享线程池已经有活动线程时，工作进程不使用fork启动"""
+        list(parallel_map(abs, range(-8, 0), 4))
+        context = get_process_pool()._mp_context
+        self.assertIn(context.get_start_method(), ("forkserver", "spawn"))
+        chain = Start() | make_rows | (DATA > score)
+        self.assertEqual([row["id"] for row in chain()], list(range(20)))
+
+    def test_worker_processes_are_reused(self):
+        """测试工作进程在多次调用之间被复用"""
+        chain = Start() | make_rows | (DATA > score)
+        pids = set()
+        for _ in range(5):
+            pids.update(row["pid"] for row in chain())
+        self.assertLessEqual(len(pids), os.cpu_count() or 1)
+
+    def test_row_exception_is_processing_error(self):
+        """测试工作进程中的异常被包装为ProcessingError"""
+        chain = Start() | make_rows | (DATA > broken_score)
+        with self.assertRaises(ProcessingError) as context:
+            chain()
+        self.assertIn("评分失败", str(context.exception))
+
+    def test_unpicklable_function_fails_clearly(self):
+        """测试无法序列化的函数明确报错"""
+
+        def nested(row, processes=2):
+            return row
+
+        with self.assertRaises(ValidationError) as context:
+            ensure_picklable(lambda row: row)
+        self.assertIn("无法被pickle序列化", str(context.exception))
+
+        chain = Start() | make_rows | (DATA > nested)
+        with self.assertRaises(ValidationError):
+            chain.compile()
+        with self.assertRaises(ProcessingError) as context:
+            chain()
+        self.assertIn("无法被pickle序列化", str(context.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
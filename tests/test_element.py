@@ -1,5 +1,8 @@
+import gc
 import unittest
+from antchain import Start, DATA
 from antchain.element import Element
+from antchain.exceptions import ElementError
 
 
 class TestElement(unittest.TestCase):
@@ -128,6 +131,111 @@ class TestElement(unittest.TestCase):
         self.assertIn("批处理函数", str(context.exception))
         self.assertIn("必须且只能有1个参数", str(context.exception))
 
+    def test_join_operators_return_new_element(self):
+        """测试*和**返回新的Element，不修改原有的Element"""
+
+        def fetch(rows):
+            return rows
+
+        def join_func():
+            pass
+
+        base = Element() & fetch
+        left = base * join_func
+        full = base**join_func
+        self.assertEqual(base.element_type, "and")
+        self.assertIsNone(base.join_func)
+        self.assertIsNot(left, base)
+        self.assertEqual(left.element_type, "left_join")
+        self.assertEqual(left.right_func, fetch)
+        self.assertEqual(full.element_type, "all_join")
+        self.assertEqual(full.join_func, join_func)
+        self.assertEqual((base @ join_func).element_type, "inner_join")
+        self.assertEqual((base % join_func).element_type, "semi_join")
+        self.assertEqual((base ^ join_func).element_type, "anti_join")
+        self.assertEqual((base ^ join_func).right_func, fetch)
+
+    def test_element_is_immutable(self):
+        """测试Element创建后不可修改"""
+        element = Element(element_type="one", left_data=[1])
+        self.assertEqual(element.left_data, [1])
+        with self.assertRaises(ElementError):
+            element.element_type = "multi"
+        with self.assertRaises(ElementError):
+            element.left_data = None
+        with self.assertRaises(ElementError):
+            del element.right_func
+
+    def test_identical_elements_are_shared(self):
+        """测试同一个函数使用同一个操作符得到同一个Element"""
+
+        def process_func(item):
+            return item
+
+        def join_func():
+            pass
+
+        element = Element()
+        self.assertIs(element > process_func, element > process_func)
+        self.assertIs(element >> process_func, element >> process_func)
+        self.assertIsNot(element > process_func, element >> process_func)
+        self.assertIs(
+            (element & process_func) * join_func, (element & process_func) * join_func
+        )
+        self.assertFalse(hasattr(element, "__dict__"))
+
+    def test_invalid_function_is_not_cached(self):
+        """测试校验失败的函数每次都会重新校验"""
+
+        def invalid_process_func(item1, item2):
+            return item1
+
+        element = Element()
+        for _ in range(2):
+            with self.assertRaises(Exception) as context:
+                element > invalid_process_func
+            self.assertIn("必须且只能有1个参数", str(context.exception))
+
+    def test_cached_element_is_released(self):
+        """测试不再被引用的Element会从缓存中回收"""
+        from antchain.element import _interned
+
+        def process_func(item):
+            return item
+
+        element = Element() > process_func
+        self.assertIn(("one", id(process_func), id(None)), _interned)
+        del element
+        gc.collect()
+        self.assertNotIn(("one", id(process_func), id(None)), _interned)
+
+    def test_equal_callables_are_not_merged(self):
+        """测试定义了__eq__的可调用对象和它们的绑定方法不会被合并为同一个Element"""
+
+        class Scale:
+            def __init__(self, factor):
+                self.factor = factor
+
+            def __eq__(self, other):
+                return isinstance(other, Scale)
+
+            def __hash__(self):
+                return 0
+
+            def __call__(self, item):
+                return item * self.factor
+
+            def apply(self, item):
+                return item * self.factor
+
+        double, triple = Scale(2), Scale(3)
+        self.assertIsNot(DATA > double, DATA > triple)
+        self.assertIs((DATA > triple).right_func, triple)
+        self.assertIsNot(DATA > double.apply, DATA > triple.apply)
+        self.assertIs(DATA > double.apply, DATA > double.apply)
+        chain = Start() | (lambda: [1]) | (DATA > double) | (DATA > triple.apply)
+        self.assertEqual(chain(), [6])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,916 @@
+import asyncio
+import pickle
+import random
+import threading
+import time
+import unittest
+from antchain import Start, DATA
+from antchain.join import (
+    BroadcastTable,
+    JoinCache,
+    MergedRow,
+    RangeIndex,
+    SpillBuffer,
+)
+from antchain.exceptions import JoinError, ProcessingError, ValidationError
+from antchain.strategy import MERGE_JOIN_BATCH_SIZE
+from antchain.utils import get_default_values
+
+
+def init_orders():
+    return [
+        {"id": 1, "user_id": 1},
+        {"id": 2, "user_id": 2},
+        {"id": 3, "user_id": 1},
+        {"id": 4, "user_id": 9},
+    ]
+
+
+USERS = {1: {"uid": 1, "name": "Alice"}, 2: {"uid": 2, "name": "Bob"}}
+
+
+class TestJoinCache(unittest.TestCase):
+
+    def test_get_and_put(self):
+        """测试批量读写与命中统计"""
+        cache = JoinCache()
+        found, missing = cache.get_many([1, 2, 1])
+        self.assertEqual(found, {})
+        self.assertEqual(missing, [1, 2])
+        cache.put_many({1: [{"uid": 1}], 2: []})
+        found, missing = cache.get_many([1, 2, 3])
+        self.assertEqual(found, {1: [{"uid": 1}], 2: []})
+        self.assertEqual(missing, [3])
+        self.assertEqual(cache.hits, 2)
+        self.assertEqual(cache.misses, 3)
+        # 读写的都是浅拷贝
+        found[1][0]["uid"] = 7
+        self.assertEqual(cache.get_many([1])[0], {1: [{"uid": 1}]})
+
+    def test_lru_eviction(self):
+        """测试超过maxsize时淘汰最久未使用的键"""
+        cache = JoinCache(maxsize=2)
+        cache.put_many({1: [1], 2: [2]})
+        cache.get_many([1])
+        cache.put_many({3: [3]})
+        self.assertEqual(len(cache), 2)
+        found, missing = cache.get_many([1, 2, 3])
+        self.assertEqual(set(found), {1, 3})
+        self.assertEqual(missing, [2])
+
+    def test_ttl_expiry(self):
+        """测试过期的键被视为未命中"""
+        cache = JoinCache(ttl=0.01)
+        cache.put_many({1: [1]})
+        time.sleep(0.02)
+        self.assertEqual(cache.get_many([1]), ({}, [1]))
+        self.assertEqual(len(cache), 0)
+
+    def test_negative_caching_can_be_disabled(self):
+        """测试关闭负缓存时空结果不会被缓存"""
+        cache = JoinCache(negative=False)
+        cache.put_many({1: [], 2: [2]})
+        self.assertEqual(cache.get_many([1, 2]), ({2: [2]}, [1]))
+
+    def test_invalid_arguments(self):
+        """测试非法参数"""
+        with self.assertRaises(ValueError):
+            JoinCache(maxsize=0)
+        with self.assertRaises(ValueError):
+            JoinCache(ttl=0)
+
+
+class TestCachedJoin(unittest.TestCase):
+
+    def make_chain(self, cache, requested):
+        def fetch_users(rows):
+            requested.append(sorted({row["user_id"] for row in rows}))
+            return [USERS[row["user_id"]] for row in rows if row["user_id"] in USERS]
+
+        def join_user(
+            left_key=lambda x: x["user_id"],
+            right_key=lambda x: x["uid"],
+            left_property="user",
+            one_to_many=False,
+            cache=cache,
+        ):
+            pass
+
+        return Start() | init_orders | ((DATA & fetch_users) * join_user)
+
+    def test_only_missing_keys_are_fetched(self):
+        """测试只有缓存中没有的键才会交给右侧函数"""
+        cache = JoinCache()
+        requested = []
+        chain = self.make_chain(cache, requested)
+        first = chain()
+        self.assertEqual(requested, [[1, 2, 9]])
+        self.assertEqual(
+            [row.get("user") for row in first], [USERS[1], USERS[2], USERS[1], None]
+        )
+        # 第二次执行全部命中，包括没有匹配的键9（负缓存）
+        self.assertEqual(chain(), first)
+        self.assertEqual(chain.compile()(), first)
+        self.assertEqual(requested, [[1, 2, 9]])
+        cache.invalidate(2)
+        chain()
+        self.assertEqual(requested, [[1, 2, 9], [2]])
+
+    def test_mutating_result_keeps_cache(self):
+        """测试修改连接结果中的右侧数据不会影响缓存"""
+        cache = JoinCache()
+
+        def fetch_users(rows):
+            ids = {row["user_id"] for row in rows}
+            return [dict(user) for uid, user in USERS.items() if uid in ids]
+
+        def join_user(
+            left_key=lambda x: x["user_id"],
+            right_key=lambda x: x["uid"],
+            left_property="user",
+            one_to_many=False,
+            cache=cache,
+        ):
+            pass
+
+        chain = Start() | init_orders | ((DATA & fetch_users) * join_user)
+        # 第一次执行写入缓存，第二次执行从缓存读取，两次的结果都被修改
+        for _ in range(2):
+            result = chain()
+            result[0]["user"]["name"] = "Mallory"
+            result[1]["user"].pop("name")
+            self.assertEqual(
+                [row.get("user") for row in chain()],
+                [USERS[1], USERS[2], USERS[1], None],
+            )
+        self.assertEqual(cache.misses, 3)
+
+    def test_cached_join_async(self):
+        """测试异步执行时连接缓存同样生效"""
+        cache = JoinCache()
+        requested = []
+
+        async def fetch_users(rows):
+            requested.append(len(rows))
+            return [USERS[row["user_id"]] for row in rows if row["user_id"] in USERS]
+
+        def join_user(
+            left_key=lambda x: x["user_id"],
+            right_key=lambda x: x["uid"],
+            left_property="user",
+            one_to_many=False,
+            cache=cache,
+        ):
+            pass
+
+        chain = Start() | init_orders | ((DATA & fetch_users) * join_user)
+        first = asyncio.run(chain.acall())
+        self.assertEqual(asyncio.run(chain.acall()), first)
+        self.assertEqual(requested, [4])
+
+    def test_all_join_rejects_cache(self):
+        """测试全连接不支持cache"""
+
+        def join_user(
+            left_key=lambda x: x["user_id"],
+            right_key=lambda x: x["uid"],
+            left_property=None,
+            one_to_many=False,
+            cache=JoinCache(),
+        ):
+            pass
+
+        chain = Start() | init_orders | ((DATA & (lambda rows: [])) ** join_user)
+        with self.assertRaises(ProcessingError) as context:
+            chain()
+        self.assertIsInstance(context.exception.__cause__, JoinError)
+        self.assertIn("不支持cache", str(context.exception))
+
+    def test_invalid_cache(self):
+        """测试cache没有实现get_many和put_many时报错"""
+
+        def join_user(
+            left_key=lambda x: x["user_id"],
+            right_key=lambda x: x["uid"],
+            left_property=None,
+            one_to_many=False,
+            cache={},
+        ):
+            pass
+
+        chain = Start() | init_orders | ((DATA & (lambda rows: [])) * join_user)
+        with self.assertRaises(ValidationError):
+            chain.compile()
+        with self.assertRaises(ProcessingError):
+            chain()
+
+
+class TestDistinctKeys(unittest.TestCase):
+
+    def test_fetch_receives_distinct_keys(self):
+        """测试声明distinct_keys的右侧函数只收到去重后的键，并按stream_size切分"""
+        batches = []
+
+        def fetch_users(user_ids, stream_size=2, distinct_keys=True):
+            batches.append(list(user_ids))
+            return [USERS[uid] for uid in user_ids if uid in USERS]
+
+        def join_user(
+            left_key=lambda x: x["user_id"],
+            right_key=lambda x: x["uid"],
+            left_property="user",
+            one_to_many=False,
+        ):
+            pass
+
+        def orders():
+            return init_orders() + [{"id": 5, "user_id": 2}, {"id": 6, "user_id": 1}]
+
+        chain = Start() | orders | ((DATA & fetch_users) * join_user)
+        result = chain()
+        self.assertEqual(batches, [[1, 2], [9]])
+        self.assertEqual(
+            [row.get("user", {}).get("name") for row in result],
+            ["Alice", "Bob", "Alice", None, "Bob", "Alice"],
+        )
+        batches.clear()
+        self.assertEqual(chain.compile()(), result)
+        self.assertEqual(batches, [[1, 2], [9]])
+
+    def test_distinct_keys_with_all_join_and_cache(self):
+        """测试distinct_keys与全连接、连接缓存一起使用"""
+        batches = []
+
+        def fetch_users(user_ids, distinct_keys=True):
+            batches.append(list(user_ids))
+            return list(USERS.values())
+
+        def join_all(
+            left_key=lambda x: x["user_id"],
+            right_key=lambda x: x["uid"],
+            left_property="user",
+            one_to_many=False,
+        ):
+            pass
+
+        chain = Start() | init_orders | ((DATA & fetch_users) ** join_all)
+        self.assertEqual(len(chain()), 4)
+        self.assertEqual(batches, [[1, 2, 9]])
+
+        cache = JoinCache()
+
+        def join_cached(
+            left_key=lambda x: x["user_id"],
+            right_key=lambda x: x["uid"],
+            left_property="user",
+            one_to_many=False,
+            cache=cache,
+        ):
+            pass
+
+        batches.clear()
+        cache.put_many({1: [USERS[1]]})
+        chain = Start() | init_orders | ((DATA & fetch_users) * join_cached)
+        self.assertEqual(chain()[1]["user"], USERS[2])
+        self.assertEqual(batches, [[2, 9]])
+
+
+class TestMergedRow(unittest.TestCase):
+
+    def test_reads_prefer_right_side(self):
+        """测试读取时右侧字段优先，键顺序与dict合并一致"""
+        left = {"id": 1, "name": "Alice", "score": 0}
+        right = {"score": 90, "level": "A"}
+        row = MergedRow(left, right)
+        expected = {**left, **right}
+        self.assertEqual(row, expected)
+        self.assertEqual(expected, row)
+        self.assertEqual(list(row), list(expected))
+        self.assertEqual(len(row), 4)
+        self.assertEqual(row["score"], 90)
+        self.assertEqual(row.get("missing"), None)
+        self.assertIn("level", row)
+        self.assertEqual({**row, "x": 1}, {**expected, "x": 1})
+        with self.assertRaises(KeyError):
+            row["missing"]
+
+    def test_write_materializes_copy(self):
+        """测试写入时才复制，不影响两侧的原始数据"""
+        left = {"id": 1, "name": "Alice"}
+        right = {"score": 90}
+        row = MergedRow(left, right)
+        row["name"] = "Bob"
+        del row["score"]
+        self.assertEqual(row, {"id": 1, "name": "Bob"})
+        self.assertEqual(left, {"id": 1, "name": "Alice"})
+        self.assertEqual(right, {"score": 90})
+
+    def test_pickle_as_dict(self):
+        """测试序列化后得到普通dict"""
+        row = pickle.loads(pickle.dumps(MergedRow({"id": 1}, {"score": 2})))
+        self.assertIs(type(row), dict)
+        self.assertEqual(row, {"id": 1, "score": 2})
+
+    def test_join_outputs_views(self):
+        """测试连接函数声明row_view=True时输出合并行视图"""
+        left = [{"id": 1, "wide": "x" * 100}, {"id": 2, "wide": "y"}]
+
+        def fetch(rows):
+            return [{"uid": 1, "tag": i} for i in range(3)] + [{"uid": 3, "tag": 9}]
+
+        def join_tags(
+            left_key=lambda x: x["id"],
+            right_key=lambda x: x["uid"],
+            left_property=None,
+            one_to_many=True,
+            row_view=True,
+        ):
+            pass
+
+        chain = Start() | (lambda: left) | ((DATA & fetch) * join_tags)
+        result = chain()
+        self.assertEqual(len(result), 4)
+        self.assertIsInstance(result[0], MergedRow)
+        self.assertIs(result[0].left, left[0])
+        self.assertEqual([row.get("tag") for row in result], [0, 1, 2, None])
+        self.assertEqual(chain.compile()(), result)
+
+        full = Start() | (lambda: left) | ((DATA & fetch) ** join_tags)
+        self.assertEqual(full()[-1], {"uid": 3, "tag": 9})
+
+
+class TestFilteringJoins(unittest.TestCase):
+
+    def fetch_users(self, rows):
+        return [USERS[row["user_id"]] for row in rows if row["user_id"] in USERS]
+
+    def test_inner_join(self):
+        """测试内连接丢弃没有匹配的左侧数据"""
+
+        def join_user(
+            left_key=lambda x: x["user_id"],
+            right_key=lambda x: x["uid"],
+            left_property="user",
+            one_to_many=False,
+        ):
+            pass
+
+        chain = Start() | init_orders | ((DATA & self.fetch_users) @ join_user)
+        result = chain()
+        self.assertEqual([row["id"] for row in result], [1, 2, 3])
+        self.assertEqual(result[1]["user"], USERS[2])
+        self.assertEqual(chain.compile()(), result)
+        self.assertEqual(asyncio.run(chain.acall()), result)
+        empty = Start() | init_orders | ((DATA & (lambda rows: [])) @ join_user)
+        self.assertEqual(empty(), [])
+
+    def test_semi_and_anti_join(self):
+        """测试半连接和反连接只需要left_key和right_key，原样返回左侧数据"""
+
+        def has_user(left_key=lambda x: x["user_id"], right_key=lambda x: x["uid"]):
+            pass
+
+        orders = init_orders()
+        semi = Start() | (lambda: orders) | ((DATA & self.fetch_users) % has_user)
+        anti = Start() | (lambda: orders) | ((DATA & self.fetch_users) ^ has_user)
+        self.assertEqual([row["id"] for row in semi()], [1, 2, 3])
+        self.assertEqual(anti(), [{"id": 4, "user_id": 9}])
+        self.assertIs(semi()[0], orders[0])
+        self.assertIs(anti.compile()()[0], orders[3])
+        self.assertEqual(asyncio.run(semi.acall()), semi())
+        self.assertEqual(orders, init_orders())
+
+        nothing = Start() | (lambda: orders) | ((DATA & (lambda rows: [])) ^ has_user)
+        self.assertEqual(nothing(), orders)
+
+    def test_semi_join_with_cache(self):
+        """测试半连接使用连接缓存，没有匹配的键同样被负缓存"""
+        cache = JoinCache()
+        requested = []
+
+        def fetch_users(rows):
+            requested.append(len(rows))
+            return self.fetch_users(rows)
+
+        def has_user(
+            left_key=lambda x: x["user_id"], right_key=lambda x: x["uid"], cache=cache
+        ):
+            pass
+
+        chain = Start() | init_orders | ((DATA & fetch_users) ^ has_user)
+        self.assertEqual(chain(), [{"id": 4, "user_id": 9}])
+        self.assertEqual(chain(), [{"id": 4, "user_id": 9}])
+        self.assertEqual(requested, [4])
+
+    def test_semi_join_requires_keys(self):
+        """测试半连接缺少right_key时报错"""
+
+        def has_user(left_key=lambda x: x["user_id"]):
+            pass
+
+        chain = Start() | init_orders | ((DATA & self.fetch_users) % has_user)
+        with self.assertRaises(ProcessingError) as context:
+            chain()
+        self.assertIsInstance(context.exception.__cause__, JoinError)
+        self.assertIn("right_key", str(context.exception))
+
+
+def make_join(**options):
+    """生成带有指定默认参数的连接函数"""
+
+    def join_func(
+        left_key=lambda x: x["id"],
+        right_key=lambda x: x["uid"],
+        left_property=options.get("left_property"),
+        one_to_many=options.get("one_to_many", False),
+        algorithm=options.get("algorithm"),
+        left_sorted=options.get("left_sorted", False),
+        right_sorted=options.get("right_sorted", False),
+        row_view=options.get("row_view", False),
+        cache=options.get("cache"),
+        memory_budget=options.get("memory_budget"),
+        spill_partitions=options.get("spill_partitions", 16),
+    ):
+        pass
+
+    return join_func
+
+
+class TestMergeJoin(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(7)
+        self.left = [{"id": i // 2, "side": "l"} for i in range(0, 60, 1)]
+        self.right = sorted(
+            ({"uid": rng.randrange(0, 40), "tag": i} for i in range(50)),
+            key=lambda x: x["uid"],
+        )
+
+    def run_join(self, operator, **options):
+        left = [dict(row) for row in self.left]
+
+        def fetch(ids, stream_size=7, distinct_keys=True):
+            keys = set(ids)
+            return [row for row in self.right if row["uid"] in keys]
+
+        stage = DATA & fetch
+        join_func = make_join(**options)
+        element = stage * join_func if operator == "*" else stage @ join_func
+        return (Start() | (lambda: left) | element)()
+
+    def test_same_result_as_hash_join(self):
+        """测试排序合并连接与哈希连接的结果一致"""
+        for operator in ("*", "@"):
+            for options in (
+                {"one_to_many": False},
+                {"one_to_many": True},
+                {"one_to_many": True, "left_property": "tags"},
+                {"one_to_many": False, "left_property": "tag"},
+                {"one_to_many": True, "row_view": True},
+            ):
+                with self.subTest(operator=operator, **options):
+                    expected = self.run_join(operator, **options)
+                    result = self.run_join(operator, algorithm="merge", **options)
+                    self.assertEqual(result, expected)
+
+    def test_sorted_declaration_selects_merge(self):
+        """测试同时声明left_sorted和right_sorted时使用排序合并连接"""
+
+        def fetch(rows):
+            return [{"uid": 2}, {"uid": 1}]
+
+        left = [{"id": 1}, {"id": 2}]
+        join_hash = make_join(left_sorted=True)
+        join_merge = make_join(left_sorted=True, right_sorted=True)
+        self.assertEqual(
+            len((Start() | (lambda: left) | ((DATA & fetch) * join_hash))()), 2
+        )
+        chain = Start() | (lambda: left) | ((DATA & fetch) * join_merge)
+        with self.assertRaises(ProcessingError) as context:
+            chain()
+        self.assertIn("right_key升序", str(context.exception))
+
+    def test_streams_both_sides(self):
+        """测试流式执行时两侧数据都只被按需读取"""
+        consumed = {"left": 0, "right": 0}
+
+        def source():
+            for i in range(1000):
+                consumed["left"] += 1
+                yield {"id": i}
+
+        def fetch(ids, stream_size=10, distinct_keys=True):
+            for uid in ids:
+                consumed["right"] += 1
+                yield {"uid": uid, "score": uid * 2}
+
+        join_func = make_join(algorithm="merge", left_property="score_info")
+        chain = (
+            Start() | source | ((DATA & fetch) * join_func) | (DATA > (lambda row: row))
+        )
+        rows = chain.stream()
+        first = [next(rows) for _ in range(15)]
+        self.assertEqual(first[14]["score_info"], {"uid": 14, "score": 28})
+        self.assertLessEqual(consumed["left"], 21)
+        self.assertLessEqual(consumed["right"], 20)
+        self.assertEqual(len(list(rows)), 985)
+
+    def test_default_batch_size(self):
+        """测试没有声明stream_size时右侧函数按MERGE_JOIN_BATCH_SIZE分批调用"""
+        sizes = []
+
+        def fetch(rows):
+            sizes.append(len(rows))
+            return [{"uid": row["id"]} for row in rows[::2]]
+
+        left = [{"id": i // 2 * 2} for i in range(3000)]
+        join_func = make_join(algorithm="merge", left_property="info")
+        chain = Start() | (lambda: iter(left)) | ((DATA & fetch) * join_func)
+        rows = list(chain.stream())
+        self.assertEqual(len(rows), 3000)
+        self.assertEqual(len(sizes), 3)
+        self.assertLessEqual(max(sizes), MERGE_JOIN_BATCH_SIZE + 1)
+        self.assertEqual(rows[5]["info"], {"uid": 4})
+
+    def test_async_merge_join(self):
+        """测试异步执行时的排序合并连接"""
+
+        async def fetch(rows):
+            return [{"uid": row["id"], "x": row["id"]} for row in rows if row["id"] % 2]
+
+        left = [{"id": i} for i in range(6)]
+        chain = (
+            Start() | (lambda: left) | ((DATA & fetch) @ make_join(algorithm="merge"))
+        )
+        self.assertEqual([row["id"] for row in asyncio.run(chain.acall())], [1, 3, 5])
+
+    def test_invalid_options(self):
+        """测试非法的algorithm以及与cache一起使用时报错"""
+        bad = Start() | init_orders | ((DATA & list) * make_join(algorithm="nested"))
+        with self.assertRaises(ValidationError):
+            bad.compile()
+        cached = make_join(algorithm="merge", cache=JoinCache())
+        self.assertIsNotNone(get_default_values(cached)["cache"])
+        chain = Start() | init_orders | ((DATA & list) * cached)
+        with self.assertRaises(ProcessingError) as context:
+            chain()
+        self.assertIn("不支持cache", str(context.exception))
+
+
+class TestRangeIndex(unittest.TestCase):
+
+    def test_matches_brute_force(self):
+        """测试各种闭合方式下的查询结果与逐个比较一致"""
+        rng = random.Random(3)
+        rows = []
+        for i in range(200):
+            start = rng.randrange(0, 100)
+            rows.append({"id": i, "start": start, "end": start + rng.randrange(0, 15)})
+        contains = {
+            "left": lambda r, v: r["start"] <= v < r["end"],
+            "right": lambda r, v: r["start"] < v <= r["end"],
+            "both": lambda r, v: r["start"] <= v <= r["end"],
+            "neither": lambda r, v: r["start"] < v < r["end"],
+        }
+        for closed, check in contains.items():
+            index = RangeIndex(rows, lambda r: (r["start"], r["end"]), closed)
+            for value in range(-2, 120):
+                expected = sorted(
+                    (r for r in rows if check(r, value)), key=lambda r: r["start"]
+                )
+                found = index.find(value)
+                self.assertEqual(
+                    sorted(r["id"] for r in found), sorted(r["id"] for r in expected)
+                )
+                self.assertEqual(
+                    [r["start"] for r in found], [r["start"] for r in expected]
+                )
+                one = index.find_one(value)
+                if expected:
+                    self.assertEqual(one["start"], expected[-1]["start"])
+                else:
+                    self.assertIsNone(one)
+
+    def test_invalid_closed(self):
+        """测试非法的closed"""
+        with self.assertRaises(ValueError):
+            RangeIndex([], lambda r: r, closed="open")
+
+
+class TestRangeJoin(unittest.TestCase):
+
+    SESSIONS = [
+        {"session": "a", "start": 0, "end": 10},
+        {"session": "b", "start": 10, "end": 20},
+        {"session": "c", "start": 30, "end": 40},
+    ]
+
+    def events(self):
+        return [{"ts": 5}, {"ts": 10}, {"ts": 25}, {"ts": 39}]
+
+    def fetch(self, rows):
+        return self.SESSIONS
+
+    def test_left_property(self):
+        """测试范围连接把匹配的区间挂到left_property上"""
+
+        def in_session(
+            left_key=lambda e: e["ts"],
+            right_range=lambda s: (s["start"], s["end"]),
+            left_property="session",
+            one_to_many=False,
+        ):
+            pass
+
+        chain = Start() | self.events | ((DATA & self.fetch) * in_session)
+        result = chain()
+        self.assertEqual(
+            [row.get("session", {}).get("session") for row in result],
+            ["a", "b", None, "c"],
+        )
+        self.assertEqual(chain.compile()(), result)
+
+    def test_inner_one_to_many_merge(self):
+        """测试范围内连接在一对多、没有left_property时的合并结果"""
+
+        def fetch_bands(rows):
+            return [
+                {"band": "low", "low": 0, "high": 50},
+                {"band": "mid", "low": 20, "high": 80},
+            ]
+
+        def in_band(
+            left_key=lambda x: x["price"],
+            right_range=lambda b: (b["low"], b["high"]),
+            left_property=None,
+            one_to_many=True,
+            closed="both",
+        ):
+            pass
+
+        prices = [{"price": 10}, {"price": 50}, {"price": 90}]
+        chain = Start() | (lambda: prices) | ((DATA & fetch_bands) @ in_band)
+        self.assertEqual(
+            [(row["price"], row["band"]) for row in chain()],
+            [(10, "low"), (50, "low"), (50, "mid")],
+        )
+        self.assertEqual(asyncio.run(chain.acall()), chain())
+
+    def test_range_join_rejects_cache(self):
+        """测试范围连接不支持cache"""
+
+        def in_session(
+            left_key=lambda e: e["ts"],
+            right_range=lambda s: (s["start"], s["end"]),
+            left_property="session",
+            one_to_many=False,
+            cache=JoinCache(),
+        ):
+            pass
+
+        chain = Start() | self.events | ((DATA & self.fetch) * in_session)
+        with self.assertRaises(ProcessingError) as context:
+            chain()
+        self.assertIn("不支持cache", str(context.exception))
+
+
+class TestBroadcastTable(unittest.TestCase):
+
+    def setUp(self):
+        self.key_calls = 0
+
+        def right_key(row):
+            self.key_calls += 1
+            return row["uid"]
+
+        self.right_key = right_key
+        self.table = BroadcastTable(lambda: list(USERS.values()))
+
+    def join_func(self, left_property="user"):
+        def join_user(
+            left_key=lambda x: x["user_id"],
+            right_key=self.right_key,
+            left_property=left_property,
+            one_to_many=False,
+        ):
+            pass
+
+        return join_user
+
+    def test_loaded_and_indexed_once(self):
+        """测试右侧数据只加载一次，索引只建立一次，并被多个线程共享"""
+        chain = Start() | init_orders | ((DATA & self.table) * self.join_func())
+        plan = chain.compile()
+        first = chain()
+        self.assertEqual(
+            [row.get("user") for row in first], [USERS[1], USERS[2], USERS[1], None]
+        )
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(plan())) for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [first] * 8)
+        self.assertEqual(self.table.loads, 1)
+        self.assertEqual(self.key_calls, len(USERS))
+
+    def test_same_result_as_fetch(self):
+        """测试各种连接使用广播表与每次获取右侧数据的结果一致"""
+
+        def fetch(rows):
+            return list(USERS.values())
+
+        join_user = self.join_func(left_property=None)
+        for operator in ("*", "@", "%", "^", "**"):
+            with self.subTest(operator=operator):
+                results = []
+                for right in (fetch, self.table):
+                    stage = DATA & right
+                    element = {
+                        "*": lambda: stage * join_user,
+                        "@": lambda: stage @ join_user,
+                        "%": lambda: stage % join_user,
+                        "^": lambda: stage ^ join_user,
+                        "**": lambda: stage**join_user,
+                    }[operator]()
+                    results.append((Start() | init_orders | element)())
+                self.assertEqual(results[0], results[1])
+
+    def test_ttl_version_and_invalidate(self):
+        """测试TTL过期、版本号变化以及主动失效时重新加载"""
+        version = [1]
+        table = BroadcastTable(lambda: [], ttl=0.01, version=lambda: version[0])
+        table.index(self.right_key, False)
+        table.index(self.right_key, False)
+        self.assertEqual(table.loads, 1)
+        time.sleep(0.02)
+        table()
+        self.assertEqual(table.loads, 2)
+        version[0] = 2
+        table()
+        self.assertEqual(table.loads, 3)
+        table.invalidate()
+        table()
+        self.assertEqual(table.loads, 4)
+        with self.assertRaises(ValueError):
+            BroadcastTable(list, ttl=0)
+
+
+class TestSpillBuffer(unittest.TestCase):
+
+    def test_spills_after_budget(self):
+        """测试右侧数据超过memory_budget后两侧数据都按分区写入临时文件"""
+        buffer = SpillBuffer(
+            lambda x: x["id"], lambda x: x["uid"], memory_budget=3, partitions=4
+        )
+        try:
+            for i in range(10):
+                buffer.add_left({"id": i})
+            for i in range(3):
+                buffer.add_right({"uid": i})
+            self.assertFalse(buffer.spilled)
+            buffer.add_right({"uid": 3})
+            buffer.add_left({"id": 10})
+            self.assertTrue(buffer.spilled)
+            self.assertEqual(buffer.left_rows, [])
+            self.assertEqual(buffer.right_rows, [])
+            left = [item for p in range(4) for item in buffer.left(p)]
+            right = [item for p in range(4) for item in buffer.right(p)]
+            self.assertEqual(sorted(index for index, _ in left), list(range(11)))
+            self.assertEqual(sorted(index for index, _ in right), list(range(4)))
+            for p in range(4):
+                indexes = [index for index, _ in buffer.left(p)]
+                self.assertEqual(indexes, sorted(indexes))
+                for _, row in buffer.left(p):
+                    self.assertEqual(hash(row["id"]) % 4, p)
+        finally:
+            buffer.close()
+
+    def test_invalid_arguments(self):
+        """测试非法的memory_budget和partitions"""
+        with self.assertRaises(ValueError):
+            SpillBuffer(str, str, memory_budget=0)
+        with self.assertRaises(ValueError):
+            SpillBuffer(str, str, memory_budget=10, partitions=0)
+
+
+class TestGraceHashJoin(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(11)
+        self.left = [{"id": rng.randrange(0, 50), "seq": i} for i in range(80)]
+        self.right = [{"uid": rng.randrange(0, 70), "tag": i} for i in range(60)]
+
+    def run_join(self, operator, fetch=None, **options):
+        left = [dict(row) for row in self.left]
+
+        def default_fetch(ids, stream_size=9, distinct_keys=True):
+            keys = set(ids)
+            return [row for row in self.right if row["uid"] in keys]
+
+        stage = DATA & (fetch or default_fetch)
+        join_func = make_join(**options)
+        element = {
+            "*": lambda: stage * join_func,
+            "@": lambda: stage @ join_func,
+            "**": lambda: stage**join_func,
+        }[operator]()
+        return left, (Start() | (lambda: left) | element)()
+
+    def test_same_result_as_hash_join(self):
+        """测试溢写到磁盘后的结果与内存中的哈希连接一致"""
+        for operator in ("*", "@", "**"):
+            for options in (
+                {"one_to_many": False},
+                {"one_to_many": True},
+                {"one_to_many": True, "left_property": "tags"},
+                {"one_to_many": False, "left_property": "tag"},
+                {"one_to_many": True, "row_view": True},
+            ):
+                with self.subTest(operator=operator, **options):
+                    _, expected = self.run_join(operator, **options)
+                    left, result = self.run_join(
+                        operator, memory_budget=5, spill_partitions=3, **options
+                    )
+                    self.assertEqual(result, expected)
+                    # 溢写后输出的是副本，原有的左侧数据不会被修改
+                    self.assertEqual(left, self.left)
+                    self.assertNotIn(id(result[0]), {id(row) for row in left})
+
+    def test_fetch_slices_unchanged(self):
+        """测试溢写时右侧函数收到的切片与内存中的连接一致"""
+        for stream_size in (0, 7):
+            calls = {"hash": [], "grace": []}
+            for mode, options in (("hash", {}), ("grace", {"memory_budget": 4})):
+
+                def fetch(rows, stream_size=stream_size, calls=calls[mode]):
+                    calls.append([row["seq"] for row in rows])
+                    ids = {row["id"] for row in rows}
+                    return [row for row in self.right if row["uid"] in ids]
+
+                self.run_join("*", fetch=fetch, one_to_many=True, **options)
+            with self.subTest(stream_size=stream_size):
+                self.assertEqual(calls["grace"], calls["hash"])
+
+    def test_fetch_concurrency(self):
+        """测试溢写时按stream_concurrency并发获取右侧数据"""
+        lock = threading.Lock()
+        state = {"running": 0, "peak": 0}
+
+        def fetch(ids, stream_size=5, stream_concurrency=3, distinct_keys=True):
+            with lock:
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+            time.sleep(0.01)
+            with lock:
+                state["running"] -= 1
+            keys = set(ids)
+            return [row for row in self.right if row["uid"] in keys]
+
+        _, expected = self.run_join("*", one_to_many=True)
+        _, result = self.run_join(
+            "*", fetch=fetch, memory_budget=5, spill_partitions=3, one_to_many=True
+        )
+        self.assertEqual(result, expected)
+        self.assertGreater(state["peak"], 1)
+        self.assertLessEqual(state["peak"], 3)
+
+    def test_within_budget_keeps_rows(self):
+        """测试右侧数据没有超过memory_budget时直接在内存中连接"""
+        left, result = self.run_join(
+            "*", memory_budget=1000, one_to_many=True, left_property="tags"
+        )
+        self.assertIs(result[0], left[0])
+        _, expected = self.run_join("*", one_to_many=True, left_property="tags")
+        self.assertEqual(result, expected)
+
+    def test_stream(self):
+        """测试流式执行时按左侧数据的顺序输出"""
+        left = [dict(row) for row in self.left]
+
+        def fetch(ids, stream_size=9, distinct_keys=True):
+            keys = set(ids)
+            return [row for row in self.right if row["uid"] in keys]
+
+        join_func = make_join(memory_budget=5, one_to_many=True, left_property="tags")
+        chain = Start() | (lambda: iter(left)) | ((DATA & fetch) * join_func)
+        _, expected = self.run_join("*", one_to_many=True, left_property="tags")
+        self.assertEqual(list(chain.stream()), expected)
+
+    def test_invalid_options(self):
+        """测试非法的memory_budget以及与cache一起使用时报错"""
+        for options in (
+            {"memory_budget": -1},
+            {"memory_budget": 5, "spill_partitions": -2},
+            {"memory_budget": 5, "cache": JoinCache()},
+        ):
+            with self.subTest(**{k: str(v) for k, v in options.items()}):
+                with self.assertRaises(ProcessingError):
+                    self.run_join("*", **options)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,17 @@
+import gc
+import inspect
 import time
+import tracemalloc
 import random
-from antchain import Start, DATA, COUNT
+import unittest
+from unittest import mock
+from antchain import Start, DATA, COUNT, SUM, MIN, MAX, AVG, AGG, GROUP, SORT, TOPK
+from antchain import DISTINCT, QUANTILES
+from antchain import strategy, utils
+from antchain.columnar import Batch, numpy
+from antchain.join import BroadcastTable
+from antchain.strategy import StrategyFactory
+from antchain.utils import group_by
 
 
 def generate_large_dataset(size=10000):
@@ -111,9 +122,710 @@ def test_large_batch_processing():
     print("✓ 大批次处理性能测试通过")
 
 
+def test_compiled_plan_overhead():
+    """测试预编译执行计划的单次调用开销"""
+    print("\n=== 预编译执行计划开销测试 ===")
+    small_data = [{"id": i, "value": i * 300} for i in range(5)]
+    right_data = [{"user_id": i, "score": i} for i in range(5)]
+
+    def get_right_data(rows, stream_size=100):
+        return right_data
+
+    def join_func(
+        left_key=lambda x: x["id"],
+        right_key=lambda x: x["user_id"],
+        left_property="score_info",
+        one_to_many=False,
+    ):
+        pass
+
+    def double(rows, stream_size=10):
+        return [{**row, "value": row["value"] * 2} for row in rows]
+
+    start = Start()
+    chain = (
+        start
+        | (lambda: [dict(row) for row in small_data])
+        | (DATA >> double)
+        | (DATA - filter_items)
+        | ((DATA & get_right_data) * join_func)
+        | COUNT
+    )
+    plan = chain.compile()
+    rounds = 5000
+
+    start_time = time.perf_counter()
+    for _ in range(rounds):
+        expected = chain()
+    stream_cost = (time.perf_counter() - start_time) / rounds
+
+    # 预编译计划执行时不再查找处理策略，也不再读取函数的默认参数和连接条件
+    with (
+        mock.patch.object(
+            StrategyFactory,
+            "get_processor",
+            autospec=True,
+            side_effect=StrategyFactory.get_processor,
+        ) as lookups,
+        mock.patch.object(
+            strategy, "get_default_values", wraps=strategy.get_default_values
+        ) as defaults,
+        mock.patch.object(
+            utils, "get_default_values", wraps=utils.get_default_values
+        ) as batch_defaults,
+        mock.patch.object(
+            strategy, "get_join_condition", wraps=strategy.get_join_condition
+        ) as conditions,
+    ):
+        start_time = time.perf_counter()
+        for _ in range(rounds):
+            result = plan()
+        plan_cost = (time.perf_counter() - start_time) / rounds
+
+    print(f"逐次分发单次调用耗时: {stream_cost * 1e6:.2f}微秒")
+    print(f"预编译计划单次调用耗时: {plan_cost * 1e6:.2f}微秒")
+
+    assert result == expected
+    assert lookups.call_count == 0
+    assert defaults.call_count == 0
+    assert batch_defaults.call_count == 0
+    assert conditions.call_count == 0
+    print("✓ 预编译执行计划开销测试通过")
+
+
+def test_uncompiled_call_overhead():
+    """测试未预编译的链每次执行时不会重复读取函数签名"""
+    print("\n=== 未预编译链单次调用开销测试 ===")
+
+    def increase(value, workers=0, ordered=True):
+        return value + 1
+
+    def double(values, stream_size=0, processes=0):
+        return [value * 2 for value in values]
+
+    def load():
+        return [1, 2, 3, 4, 5]
+
+    one_chain = Start() | load
+    multi_chain = Start() | load
+    for _ in range(5):
+        one_chain = one_chain | (DATA > increase)
+        multi_chain = multi_chain | (DATA >> double)
+    rounds = 5000
+
+    for chain in (one_chain, multi_chain):
+        plan = chain.compile()
+        expected = chain()
+        signature = inspect.signature
+        with mock.patch.object(inspect, "signature", wraps=signature) as calls:
+            start_time = time.perf_counter()
+            for _ in range(rounds):
+                result = chain()
+            chain_cost = (time.perf_counter() - start_time) / rounds
+        start_time = time.perf_counter()
+        for _ in range(rounds):
+            plan()
+        plan_cost = (time.perf_counter() - start_time) / rounds
+        print(f"未预编译单次调用耗时: {chain_cost * 1e6:.2f}微秒")
+        print(f"预编译计划单次调用耗时: {plan_cost * 1e6:.2f}微秒")
+
+        assert result == expected
+        assert calls.call_count == 0
+    print("✓ 未预编译链单次调用开销测试通过")
+
+
+def test_chain_building_scaling():
+    """测试构建长链时追加阶段不会复制已有的阶段"""
+    print("\n=== 长链构建性能测试 ===")
+    element = DATA > (lambda x: x)
+
+    def build(stages):
+        best = float("inf")
+        for _ in range(3):
+            start_time = time.perf_counter()
+            chain = Start() | (lambda: [1])
+            for _ in range(stages):
+                chain = chain | element
+            best = min(best, time.perf_counter() - start_time)
+        return chain, best
+
+    # 关闭垃圾回收，避免分代回收的耗时干扰测量
+    gc.disable()
+    try:
+        _, small_cost = build(2000)
+        chain, large_cost = build(8000)
+    finally:
+        gc.enable()
+    print(f"构建2000个阶段耗时: {small_cost * 1000:.2f}毫秒")
+    print(f"构建8000个阶段耗时: {large_cost * 1000:.2f}毫秒")
+
+    assert len(chain) == 8001
+    # 追加阶段只新建一个节点并引用原有的阶段，不会复制已有的阶段
+    longer = chain | element
+    assert len(longer) == 8002
+    assert longer._tail[0] is element
+    assert longer._tail[1] is chain._tail
+    print("✓ 长链构建性能测试通过")
+
+
+def test_large_pipeline_memory():
+    """测试大规模管道图的构建耗时和内存占用"""
+    print("\n=== 大规模管道内存测试 ===")
+    stages = 5000
+
+    def identity(row):
+        return row
+
+    def passthrough(rows):
+        return rows
+
+    def build(make_element):
+        gc.collect()
+        tracemalloc.start()
+        start_time = time.perf_counter()
+        chain = Start() | (lambda: [1])
+        for i in range(stages):
+            chain = chain | make_element(i)
+        cost = time.perf_counter() - start_time
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return chain, cost, size
+
+    # 同一个函数反复使用：Element被缓存复用，只增加链表节点
+    chain, shared_cost, shared_size = build(
+        lambda i: (DATA > identity) if i % 2 else (DATA >> passthrough)
+    )
+    # 每个阶段都是不同的函数：每个阶段都会创建新的Element
+    functions = [lambda row, i=i: row for i in range(stages)]
+    _, distinct_cost, distinct_size = build(lambda i: DATA > functions[i])
+
+    print(
+        f"复用函数构建{stages}个阶段: {shared_cost * 1000:.2f}毫秒, "
+        f"每个阶段{shared_size / stages:.0f}字节"
+    )
+    print(
+        f"不同函数构建{stages}个阶段: {distinct_cost * 1000:.2f}毫秒, "
+        f"每个阶段{distinct_size / stages:.0f}字节"
+    )
+
+    assert len(chain) == stages + 1
+    assert not hasattr(DATA, "__dict__")
+    assert not hasattr(chain, "__dict__")
+    # 复用的Element不会随阶段数增长
+    assert shared_size < distinct_size
+    print("✓ 大规模管道内存测试通过")
+
+
+def test_join_row_view_memory():
+    """测试一对多连接使用合并行视图时的内存占用"""
+    print("\n=== 合并行视图内存测试 ===")
+    left = [{"id": i, **{f"col{c}": c for c in range(50)}} for i in range(200)]
+    right = [{"uid": i, "tag": t} for i in range(200) for t in range(50)]
+
+    def fetch(rows):
+        return right
+
+    def make_join(row_view):
+        def join_tags(
+            left_key=lambda x: x["id"],
+            right_key=lambda x: x["uid"],
+            left_property=None,
+            one_to_many=True,
+            row_view=row_view,
+        ):
+            pass
+
+        return Start() | (lambda: left) | ((DATA & fetch) * join_tags)
+
+    def measure(chain):
+        gc.collect()
+        tracemalloc.start()
+        start_time = time.perf_counter()
+        result = chain()
+        cost = time.perf_counter() - start_time
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return result, cost, size
+
+    copied, copy_cost, copy_size = measure(make_join(False))
+    viewed, view_cost, view_size = measure(make_join(True))
+    print(f"复制为dict: {copy_cost * 1000:.2f}毫秒, {copy_size / 1024 / 1024:.2f}MB")
+    print(f"合并行视图: {view_cost * 1000:.2f}毫秒, {view_size / 1024 / 1024:.2f}MB")
+
+    assert len(viewed) == len(copied) == 10000
+    assert viewed[123] == copied[123]
+    assert view_size < copy_size / 4
+    print("✓ 合并行视图内存测试通过")
+
+
+def test_full_join_performance(size=200000):
+    """测试全连接只建一次右侧索引（直接运行本文件时使用100万条数据）"""
+    print(f"\n=== 全连接性能测试（{size}条） ===")
+    left = [{"id": i, "name": f"User{i}"} for i in range(size)]
+    # 右侧一半匹配左侧，一半只在右侧
+    right = [{"user_id": i, "score": i % 100} for i in range(size // 2, size * 3 // 2)]
+
+    def fetch(rows):
+        return right
+
+    key_calls = {"left": 0, "right": 0}
+
+    def left_id(row):
+        key_calls["left"] += 1
+        return row["id"]
+
+    def right_id(row):
+        key_calls["right"] += 1
+        return row["user_id"]
+
+    def join_score(
+        left_key=left_id,
+        right_key=right_id,
+        left_property="score_info",
+        one_to_many=False,
+    ):
+        pass
+
+    def best_of(chain, rounds=5):
+        costs = []
+        for _ in range(rounds):
+            gc.collect()
+            start_time = time.perf_counter()
+            result = chain()
+            costs.append(time.perf_counter() - start_time)
+        return result, min(costs)
+
+    left_chain = Start() | (lambda: left) | ((DATA & fetch) * join_score) | COUNT
+    full_chain = Start() | (lambda: left) | ((DATA & fetch) ** join_score) | COUNT
+    left_count, left_cost = best_of(left_chain)
+    full_count, full_cost = best_of(full_chain)
+    print(f"左连接: {left_cost:.4f}秒, 结果数量: {left_count}")
+    print(f"全连接: {full_cost:.4f}秒, 结果数量: {full_count}")
+    print(f"全连接/左连接: {full_cost / left_cost:.2f}")
+
+    assert left_count == size
+    assert full_count == size + size // 2
+    # 右侧只建一次索引，左侧只探测一次：每条数据的键只计算一次
+    key_calls.update(left=0, right=0)
+    full_chain()
+    assert key_calls == {"left": size, "right": len(right)}
+    print("✓ 全连接性能测试通过")
+
+
+def test_merge_join_memory(size=100000):
+    """测试排序合并连接流式执行时的峰值内存"""
+    print(f"\n=== 排序合并连接内存测试（{size}条） ===")
+
+    def source():
+        return ({"id": i} for i in range(size))
+
+    def fetch(ids, stream_size=1000, distinct_keys=True):
+        return [{"uid": uid, "score": uid % 100} for uid in ids if uid % 3]
+
+    def fetch_rows(rows):
+        # 没有声明stream_size，合并连接按MERGE_JOIN_BATCH_SIZE分批调用
+        return [{"uid": row["id"], "score": 1} for row in rows if row["id"] % 3]
+
+    def make_chain(algorithm, fetch=fetch):
+        def join_score(
+            left_key=lambda x: x["id"],
+            right_key=lambda x: x["uid"],
+            left_property="score_info",
+            one_to_many=False,
+            algorithm=algorithm,
+        ):
+            pass
+
+        return Start() | source | ((DATA & fetch) * join_score) | COUNT
+
+    def measure(chain):
+        gc.collect()
+        tracemalloc.start()
+        start_time = time.perf_counter()
+        result = chain.stream()
+        cost = time.perf_counter() - start_time
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return result, cost, peak
+
+    hash_count, hash_cost, hash_peak = measure(make_chain("hash"))
+    merge_count, merge_cost, merge_peak = measure(make_chain("merge"))
+    default_count, default_cost, default_peak = measure(make_chain("merge", fetch_rows))
+    print(f"哈希连接: {hash_cost:.4f}秒, 峰值内存 {hash_peak / 1024 / 1024:.2f}MB")
+    print(f"合并连接: {merge_cost:.4f}秒, 峰值内存 {merge_peak / 1024 / 1024:.2f}MB")
+    print(
+        f"合并连接（未声明stream_size）: {default_cost:.4f}秒, "
+        f"峰值内存 {default_peak / 1024 / 1024:.2f}MB"
+    )
+
+    assert hash_count == merge_count == default_count == size
+    assert merge_peak < hash_peak / 10
+    assert default_peak < hash_peak / 10
+    print("✓ 排序合并连接内存测试通过")
+
+
+def test_grace_join_memory(size=100000):
+    """测试右侧数据超过memory_budget时溢写到磁盘的峰值内存"""
+    print(f"\n=== Grace哈希连接内存测试（{size}条） ===")
+
+    def source():
+        return ({"id": i} for i in range(size))
+
+    def fetch(rows, stream_size=1000):
+        return [{"uid": row["id"], "name": f"User{row['id']}"} for row in rows]
+
+    def make_chain(memory_budget):
+        def join_user(
+            left_key=lambda x: x["id"],
+            right_key=lambda x: x["uid"],
+            left_property="user",
+            one_to_many=False,
+            memory_budget=memory_budget,
+        ):
+            pass
+
+        return Start() | source | ((DATA & fetch) * join_user) | COUNT
+
+    def measure(chain):
+        gc.collect()
+        tracemalloc.start()
+        start_time = time.perf_counter()
+        result = chain.stream()
+        cost = time.perf_counter() - start_time
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return result, cost, peak
+
+    hash_count, hash_cost, hash_peak = measure(make_chain(None))
+    grace_count, grace_cost, grace_peak = measure(make_chain(size // 20))
+    print(f"内存哈希连接: {hash_cost:.4f}秒, 峰值内存 {hash_peak / 1024 / 1024:.2f}MB")
+    print(
+        f"Grace哈希连接: {grace_cost:.4f}秒, 峰值内存 {grace_peak / 1024 / 1024:.2f}MB"
+    )
+
+    assert hash_count == grace_count == size
+    assert grace_peak < hash_peak / 4
+    print("✓ Grace哈希连接内存测试通过")
+
+
+def test_range_join_performance():
+    """测试范围连接与在>阶段中逐个比较区间的耗时"""
+    print("\n=== 范围连接性能测试 ===")
+    sessions = [{"sid": i, "start": i * 10, "end": i * 10 + 8} for i in range(1000)]
+    events = [{"ts": random.randrange(0, 10000)} for _ in range(5000)]
+
+    def fetch_sessions(rows):
+        return sessions
+
+    def in_session(
+        left_key=lambda e: e["ts"],
+        right_range=lambda s: (s["start"], s["end"]),
+        left_property="session",
+        one_to_many=False,
+    ):
+        pass
+
+    def scan_sessions(event):
+        for session in sessions:
+            if session["start"] <= event["ts"] < session["end"]:
+                return {**event, "session": session}
+        return event
+
+    def init_events():
+        return [dict(event) for event in events]
+
+    range_chain = Start() | init_events | ((DATA & fetch_sessions) * in_session)
+    scan_chain = Start() | init_events | (DATA > scan_sessions)
+
+    start_time = time.perf_counter()
+    joined = range_chain()
+    range_cost = time.perf_counter() - start_time
+    start_time = time.perf_counter()
+    scanned = scan_chain()
+    scan_cost = time.perf_counter() - start_time
+    print(f"范围连接: {range_cost * 1000:.2f}毫秒")
+    print(f"逐个比较: {scan_cost * 1000:.2f}毫秒")
+
+    assert [row.get("session") for row in joined] == [
+        row.get("session") for row in scanned
+    ]
+    print("✓ 范围连接性能测试通过")
+
+
+def test_broadcast_join_performance():
+    """测试小批量请求连接静态参考表时，广播连接复用右侧数据和索引的效果"""
+    print("\n=== 广播连接性能测试 ===")
+    reference = [{"code": i, "label": f"L{i}"} for i in range(50000)]
+    requests = [
+        [{"id": j, "code": (i * 31 + j) % 50000} for j in range(20)] for i in range(100)
+    ]
+
+    calls = {"load": 0, "key": 0}
+
+    def load_reference(rows=None):
+        calls["load"] += 1
+        return list(reference)
+
+    def reference_code(row):
+        calls["key"] += 1
+        return row["code"]
+
+    def join_label(
+        left_key=lambda x: x["code"],
+        right_key=reference_code,
+        left_property="label",
+        one_to_many=False,
+    ):
+        pass
+
+    def run(right):
+        plan = (
+            Start() | (lambda: current[0]) | ((DATA & right) * join_label)
+        ).compile()
+        start_time = time.perf_counter()
+        results = []
+        for rows in requests:
+            current[0] = rows
+            results.append(plan())
+        return results, time.perf_counter() - start_time
+
+    current = [None]
+    fetched, fetch_cost = run(load_reference)
+    assert calls == {"load": len(requests), "key": len(reference) * len(requests)}
+    calls.update(load=0, key=0)
+    table = BroadcastTable(load_reference)
+    broadcast, broadcast_cost = run(table)
+    print(f"每次获取并建索引: {fetch_cost * 1000:.2f}毫秒")
+    print(f"广播连接: {broadcast_cost * 1000:.2f}毫秒")
+
+    assert broadcast == fetched
+    # 同一个快照只加载一次右侧数据，也只建一次索引
+    assert table.loads == 1
+    assert calls == {"load": 1, "key": len(reference)}
+    print("✓ 广播连接性能测试通过")
+
+
+def test_aggregate_performance(size=200000):
+    """测试AGG一次遍历完成五个聚合，并与分别执行五个收集器对比耗时"""
+    print(f"\n=== 多聚合收集器性能测试（{size}条） ===")
+    orders = [{"amount": random.randint(1, 1000)} for _ in range(size)]
+
+    pulled = [0]
+
+    def load_orders():
+        for row in orders:
+            pulled[0] += 1
+            yield {"amount": row["amount"] * 1}
+
+    amounts = Start() | load_orders | (DATA > (lambda row: row["amount"]))
+
+    start_time = time.perf_counter()
+    separate = {
+        "count": (Start() | load_orders | COUNT).stream(),
+        "sum": (amounts | SUM).stream(),
+        "min": (amounts | MIN).stream(),
+        "max": (amounts | MAX).stream(),
+        "avg": (amounts | AVG).stream(),
+    }
+    separate_cost = time.perf_counter() - start_time
+    assert pulled[0] == size * 5
+
+    pulled[0] = 0
+    start_time = time.perf_counter()
+    chain = (
+        Start()
+        | load_orders
+        | AGG(count=True, sum="amount", min="amount", max="amount", avg="amount")
+    )
+    combined = chain.stream()
+    combined_cost = time.perf_counter() - start_time
+    print(f"分别执行五条链: {separate_cost:.4f}秒")
+    print(f"AGG执行一次: {combined_cost:.4f}秒")
+
+    assert combined == separate
+    # AGG只遍历一次输入
+    assert pulled[0] == size
+    print("✓ 多聚合收集器性能测试通过")
+
+
+def test_group_memory(size=300000):
+    """测试GROUP流式分组聚合的峰值内存与先分组再聚合的对比"""
+    print(f"\n=== 分组聚合内存测试（{size}条） ===")
+
+    def source():
+        return ({"city": i % 100, "amount": i % 1000} for i in range(size))
+
+    def group_then_aggregate(rows):
+        return {
+            city: {"count": len(group), "sum": sum(row["amount"] for row in group)}
+            for city, group in group_by(rows, lambda row: row["city"]).items()
+        }
+
+    def measure(chain):
+        gc.collect()
+        tracemalloc.start()
+        start_time = time.perf_counter()
+        result = chain.stream()
+        cost = time.perf_counter() - start_time
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return result, cost, peak
+
+    grouped, group_cost, group_peak = measure(
+        Start() | source | (DATA >> group_then_aggregate)
+    )
+    streamed, stream_cost, stream_peak = measure(
+        Start() | source | GROUP("city", count=True, sum="amount")
+    )
+    print(
+        f"先分组再聚合: {group_cost:.4f}秒, 峰值内存 {group_peak / 1024 / 1024:.2f}MB"
+    )
+    print(f"GROUP: {stream_cost:.4f}秒, 峰值内存 {stream_peak / 1024 / 1024:.2f}MB")
+
+    assert grouped == streamed
+    assert stream_peak < group_peak / 10
+    print("✓ 分组聚合内存测试通过")
+
+
+def test_topk_performance(size=500000):
+    """测试TOPK与完整排序后取前100条的耗时"""
+    print(f"\n=== TOPK性能测试（{size}条） ===")
+    scores = [{"uid": i, "score": random.randint(1, 10**6)} for i in range(size)]
+
+    def load_scores():
+        return scores
+
+    def top_by_sort(rows):
+        return rows[:100]
+
+    sort_chain = Start() | load_scores | SORT("score", reverse=True)
+    sort_chain = sort_chain | (DATA >> top_by_sort)
+    topk_chain = Start() | load_scores | TOPK(100, "score")
+
+    start_time = time.perf_counter()
+    sorted_top = sort_chain()
+    sort_cost = time.perf_counter() - start_time
+    start_time = time.perf_counter()
+    heap_top = topk_chain()
+    topk_cost = time.perf_counter() - start_time
+    print(f"完整排序: {sort_cost:.4f}秒")
+    print(f"TOPK: {topk_cost:.4f}秒")
+
+    assert heap_top == sorted_top
+    assert heap_top == sorted(scores, key=lambda row: row["score"], reverse=True)[:100]
+    print("✓ TOPK性能测试通过")
+
+
+def test_sketch_memory(size=200000):
+    """测试DISTINCT、QUANTILES与精确去重、精确分位数的峰值内存对比"""
+    print(f"\n=== 近似统计内存测试（{size}条） ===")
+
+    def source():
+        return ({"user": f"user-{i}", "latency": i % 5000} for i in range(size))
+
+    def exact_stats(rows):
+        users, latencies = set(), []
+        for row in rows:
+            users.add(row["user"])
+            latencies.append(row["latency"])
+        latencies.sort()
+        return len(users), latencies[int(0.99 * (len(latencies) - 1))]
+
+    def measure(chain):
+        gc.collect()
+        tracemalloc.start()
+        start_time = time.perf_counter()
+        result = chain.stream()
+        cost = time.perf_counter() - start_time
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return result, cost, peak
+
+    (users, p99), exact_cost, exact_peak = measure(
+        Start() | source | (DATA >> exact_stats)
+    )
+    distinct, distinct_cost, distinct_peak = measure(
+        Start() | source | DISTINCT("user")
+    )
+    quantiles, quantile_cost, quantile_peak = measure(
+        Start() | source | QUANTILES((0.99,), "latency")
+    )
+    print(f"精确统计: {exact_cost:.4f}秒, 峰值内存 {exact_peak / 1024 / 1024:.2f}MB")
+    print(
+        f"DISTINCT: {distinct_cost:.4f}秒, 峰值内存 {distinct_peak / 1024 / 1024:.2f}MB"
+    )
+    print(
+        f"QUANTILES: {quantile_cost:.4f}秒, "
+        f"峰值内存 {quantile_peak / 1024 / 1024:.2f}MB"
+    )
+
+    assert abs(distinct - users) < users * 0.03
+    assert abs(quantiles[0.99] - p99) < 5000 * 0.02
+    assert distinct_peak < exact_peak / 10
+    assert quantile_peak < exact_peak / 10
+    print("✓ 近似统计内存测试通过")
+
+
+@unittest.skipIf(numpy is None, "需要NumPy")
+def test_columnar_performance(size=500000):
+    """测试Batch按列计算与按行处理字典数据的结果一致并对比耗时"""
+    print(f"\n=== 列式计算性能测试（{size}条） ===")
+    orders = [
+        {"city": i % 50, "amount": random.randint(1, 1000), "qty": i % 5 + 1}
+        for i in range(size)
+    ]
+    batch = Batch.from_rows(orders)
+
+    def extract_total(row):
+        return row["amount"] * row["qty"]
+
+    def total_column(columns):
+        return columns["amount"] * columns["qty"]
+
+    row_chain = Start() | (lambda: orders) | (DATA > extract_total) | SUM
+    column_chain = Start() | (lambda: batch) | (DATA >> total_column) | SUM
+    group = GROUP("city", count=True, sum="amount", avg="qty")
+    row_group = Start() | (lambda: orders) | group
+    column_group = Start() | (lambda: batch) | group
+
+    def measure(chain):
+        start_time = time.perf_counter()
+        result = chain()
+        return result, time.perf_counter() - start_time
+
+    row_total, row_cost = measure(row_chain)
+    column_total, column_cost = measure(column_chain)
+    row_groups, row_group_cost = measure(row_group)
+    column_groups, column_group_cost = measure(column_group)
+    print(f"按行 > 和 SUM: {row_cost:.4f}秒")
+    print(f"按列 >> 和 SUM: {column_cost:.4f}秒")
+    print(f"按行 GROUP: {row_group_cost:.4f}秒")
+    print(f"按列 GROUP: {column_group_cost:.4f}秒")
+
+    assert row_total == column_total
+    assert row_groups == column_groups
+    print("✓ 列式计算性能测试通过")
+
+
 if __name__ == "__main__":
     print("开始性能测试...")
     test_batch_processing_performance()
     test_join_performance()
     test_large_batch_processing()
+    test_compiled_plan_overhead()
+    test_uncompiled_call_overhead()
+    test_chain_building_scaling()
+    test_large_pipeline_memory()
+    test_join_row_view_memory()
+    test_full_join_performance(1000000)
+    test_merge_join_memory(1000000)
+    test_grace_join_memory(1000000)
+    test_range_join_performance()
+    test_broadcast_join_performance()
+    test_aggregate_performance(1000000)
+    test_group_memory(3000000)
+    test_topk_performance(5000000)
+    test_sketch_memory(3000000)
+    if numpy is not None:
+        test_columnar_performance(5000000)
     print("\n所有性能测试完成!")
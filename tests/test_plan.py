@@ -0,0 +1,466 @@
+import asyncio
+import time
+import unittest
+from antchain import Start, DATA, COUNT, SUM, FIRST, MAX, AVG, LIST
+from antchain.plan import ExecutionPlan, ForkPlan
+from antchain.strategy import StrategyFactory, CompiledStage, FusedStage
+from antchain.element import Element
+from antchain.exceptions import ProcessingError, StrategyError
+
+
+def init_user():
+    return [
+        {"id": 1, "name": "Alice"},
+        {"id": 2, "name": "Bob"},
+        {"id": 3, "name": "Charlie"},
+        {"id": 4, "name": "David"},
+    ]
+
+
+def add_flag(row):
+    return {**row, "flag": row["id"] % 2 == 0}
+
+
+def is_flagged(row) -> bool:
+    return row["flag"]
+
+
+def get_score(rows, stream_size=2):
+    return [{"user_id": row["id"], "score": row["id"] * 10} for row in rows]
+
+
+def join_score(
+    left_key=lambda x: x["id"],
+    right_key=lambda x: x["user_id"],
+    left_property=None,
+    one_to_many=False,
+):
+    pass
+
+
+class TestExecutionPlan(unittest.TestCase):
+
+    def test_compile_returns_plan(self):
+        """测试compile返回执行计划"""
+        chain = Start() | init_user | (DATA > add_flag) | COUNT
+        plan = chain.compile()
+        self.assertIsInstance(plan, ExecutionPlan)
+        self.assertEqual(len(plan), 3)
+        for stage in plan.stages:
+            self.assertIsInstance(stage, CompiledStage)
+
+    def test_compiled_result_equals_stream(self):
+        """测试预编译结果与逐次分发一致"""
+        chain = (
+            Start()
+            | init_user
+            | (DATA > add_flag)
+            | (DATA - is_flagged)
+            | ((DATA & get_score) * join_score)
+        )
+        plan = chain.compile()
+        self.assertEqual(plan(), chain())
+        # 计划可以被重复执行
+        self.assertEqual(plan(), chain())
+
+    def test_compile_pre_extracts_options(self):
+        """测试编译时预先解析stream_size和连接条件"""
+        chain = Start() | init_user | ((DATA & get_score) * join_score)
+        stage = chain.compile().stages[1]
+        self.assertEqual(stage.stream_size, 2)
+        self.assertIsNotNone(stage.join_condition)
+        left_key, right_key, left_property, one_to_many = stage.join_condition
+        self.assertEqual(left_key({"id": 7}), 7)
+        self.assertIsNone(left_property)
+        self.assertFalse(one_to_many)
+
+    def test_compile_invalid_element_type(self):
+        """测试编译不支持的元素类型"""
+        with self.assertRaises(StrategyError):
+            StrategyFactory().compile(Element(element_type="invalid"))
+
+    def test_plan_wraps_exception(self):
+        """测试执行计划的异常包装"""
+
+        def broken(row):
+            raise ValueError("坏数据")
+
+        plan = (Start() | init_user | (DATA > broken)).compile()
+        with self.assertRaises(ProcessingError) as context:
+            plan()
+        self.assertIn("数据流处理过程中出现错误", str(context.exception))
+        self.assertIn("坏数据", str(context.exception))
+
+
+class TestLazyExecution(unittest.TestCase):
+
+    def test_stream_returns_iterator(self):
+        """测试流式执行返回迭代器且结果一致"""
+        chain = Start() | init_user | (DATA > add_flag) | (DATA - is_flagged)
+        result = chain.stream()
+        self.assertNotIsInstance(result, list)
+        self.assertEqual(list(result), chain())
+        self.assertEqual(list(chain(mode="lazy")), chain())
+
+    def test_collectors_consume_iterator(self):
+        """测试收集器直接消费迭代器"""
+
+        def numbers():
+            return (i for i in range(1, 101))
+
+        base = Start() | numbers | (DATA > (lambda x: x * 2))
+        self.assertEqual((base | COUNT).stream(), 100)
+        self.assertEqual((base | SUM).stream(), 10100)
+        self.assertEqual((base | MAX).stream(), 200)
+        self.assertEqual((base | AVG).stream(), 101.0)
+        self.assertEqual((base | FIRST).stream(), 2)
+        self.assertEqual((base | LIST).stream(), [i * 2 for i in range(1, 101)])
+
+    def test_rows_flow_one_batch_at_a_time(self):
+        """测试数据按批次在阶段之间流动，不会一次性物化"""
+        pulled = []
+        batch_sizes = []
+
+        def source():
+            for i in range(1000):
+                pulled.append(i)
+                yield {"id": i}
+
+        def batch(rows, stream_size=10):
+            batch_sizes.append(len(rows))
+            return rows
+
+        chain = (
+            Start()
+            | source
+            | (DATA > add_flag)
+            | (DATA - is_flagged)
+            | (DATA >> batch)
+            | FIRST
+        )
+        self.assertEqual(chain.stream(), {"id": 0, "flag": True})
+        # 只拉取了第一批所需的数据
+        self.assertEqual(batch_sizes, [10])
+        self.assertLess(len(pulled), 30)
+
+    def test_stream_merge_and_join(self):
+        """测试流式执行中的合并与连接"""
+
+        def more_users():
+            return [{"id": 5, "name": "Eve"}]
+
+        chain = (
+            Start()
+            | init_user
+            | (DATA + more_users)
+            | ((DATA & get_score) * join_score)
+        )
+        self.assertEqual(list(chain.stream()), chain())
+
+    def test_stream_exception(self):
+        """测试流式执行中的异常"""
+
+        def broken(row):
+            raise ValueError("坏数据")
+
+        result = (Start() | init_user | (DATA > broken)).stream()
+        with self.assertRaises(ProcessingError) as context:
+            list(result)
+        self.assertIn("单条处理函数执行失败", str(context.exception))
+
+        with self.assertRaises(ProcessingError) as context:
+            (Start() | init_user | (DATA > broken) | COUNT).stream()
+        self.assertIn("坏数据", str(context.exception))
+
+
+class TestOperatorFusion(unittest.TestCase):
+
+    def test_adjacent_one_and_filter_are_fused(self):
+        """测试相邻的>和-阶段被融合为一个阶段"""
+        chain = (
+            Start()
+            | init_user
+            | (DATA > add_flag)
+            | (DATA - is_flagged)
+            | (DATA > (lambda row: {**row, "name": row["name"].upper()}))
+            | COUNT
+        )
+        plan = chain.compile()
+        self.assertEqual(len(plan), 3)
+        self.assertIsInstance(plan.stages[1], FusedStage)
+        self.assertEqual(len(plan.stages[1].steps), 3)
+        self.assertEqual(plan(), chain())
+        self.assertEqual(len(chain.compile(fuse=False)), 5)
+
+    def test_fused_result_equals_unfused(self):
+        """测试融合前后结果一致"""
+        chain = (
+            Start()
+            | init_user
+            | (DATA > add_flag)
+            | (DATA - is_flagged)
+            | (DATA > (lambda row: row["id"]))
+        )
+        self.assertEqual(chain.compile()(), [2, 4])
+        self.assertEqual(list(chain.stream()), [2, 4])
+        self.assertEqual(chain.compile(fuse=False)(), chain())
+
+    def test_rows_are_dropped_early(self):
+        """测试被过滤的数据不会再进入后续函数"""
+        seen = []
+
+        def record(row):
+            seen.append(row["id"])
+            return row
+
+        chain = Start() | init_user | (DATA > add_flag) | (DATA - is_flagged)
+        (chain | (DATA > record)).compile()()
+        self.assertEqual(seen, [2, 4])
+
+    def test_fused_single_item_semantics(self):
+        """测试融合阶段对非列表数据的处理与未融合时一致"""
+
+        def single():
+            return {"id": 2, "name": "Bob"}
+
+        chain = Start() | single | (DATA > add_flag) | (DATA - is_flagged)
+        self.assertEqual(chain.compile()(), chain())
+        chain = Start() | single | (DATA - is_flagged) | (DATA > add_flag)
+        self.assertEqual(chain.compile()(), [])
+
+    def test_fused_generator_semantics(self):
+        """测试初始函数返回生成器时融合前后结果一致"""
+
+        def label(item):
+            return "str"
+
+        def numbers():
+            return (i for i in range(3))
+
+        chain = Start() | numbers | (DATA > label) | (DATA > label)
+        self.assertEqual(chain(), ["str"])
+        self.assertEqual(chain.compile()(), chain())
+        chain = Start() | numbers | (DATA - (lambda item: True)) | (DATA > label)
+        self.assertEqual(chain.compile()(), chain())
+        self.assertEqual(list(chain.stream()), ["str", "str", "str"])
+
+    def test_fused_exception_reports_stage(self):
+        """测试融合阶段的异常信息包含出错的阶段"""
+
+        def broken(row):
+            raise ValueError("坏数据")
+
+        chain = Start() | init_user | (DATA > add_flag) | (DATA > broken)
+        with self.assertRaises(ProcessingError) as context:
+            chain.compile()()
+        message = str(context.exception)
+        self.assertIn("单条处理函数执行失败", message)
+        self.assertIn("第3个阶段 broken", message)
+        self.assertIn("坏数据", message)
+
+        def broken_filter(row) -> bool:
+            raise ValueError("坏条件")
+
+        chain = Start() | init_user | (DATA - broken_filter) | (DATA > add_flag)
+        with self.assertRaises(ProcessingError) as context:
+            list(chain.stream())
+        self.assertIn("过滤操作失败(第2个阶段 broken_filter)", str(context.exception))
+
+
+class TestAsyncExecution(unittest.TestCase):
+
+    def test_acall_matches_sync_result(self):
+        """测试只有普通函数的链异步执行结果与同步一致"""
+        chain = (
+            Start()
+            | init_user
+            | (DATA > add_flag)
+            | (DATA - is_flagged)
+            | ((DATA & get_score) * join_score)
+        )
+        self.assertEqual(asyncio.run(chain.acall()), chain())
+
+    def test_async_functions_in_every_operator(self):
+        """测试>、>>、-、+和连接右侧都可以使用协程函数"""
+
+        async def add_flag_async(row):
+            await asyncio.sleep(0)
+            return add_flag(row)
+
+        async def is_flagged_async(row) -> bool:
+            return row["flag"]
+
+        async def more_users():
+            return [{"id": 6, "name": "Frank", "flag": True}]
+
+        async def get_score_async(rows, stream_size=2):
+            await asyncio.sleep(0)
+            return get_score(rows)
+
+        async def rename(rows):
+            return [{**row, "name": row["name"].upper()} for row in rows]
+
+        chain = (
+            Start()
+            | init_user
+            | (DATA > add_flag_async)
+            | (DATA - is_flagged_async)
+            | (DATA + more_users)
+            | ((DATA & get_score_async) * join_score)
+            | (DATA >> rename)
+        )
+        result = asyncio.run(chain.acall())
+        self.assertEqual([row["id"] for row in result], [2, 4, 6])
+        self.assertEqual([row["score"] for row in result], [20, 40, 60])
+        self.assertEqual(result[2]["name"], "FRANK")
+
+    def test_async_generator_source(self):
+        """测试异步生成器函数可以作为Start的数据源"""
+
+        async def source():
+            for i in range(5):
+                await asyncio.sleep(0)
+                yield i
+
+        chain = Start() | source | (DATA > (lambda x: x * 2)) | SUM
+        self.assertEqual(asyncio.run(chain.acall()), 20)
+
+    def test_stage_runs_concurrently_with_limit(self):
+        """测试协程函数在阶段内并发执行，同时在途的协程数受workers限制"""
+        state = {"running": 0, "peak": 0}
+
+        async def lookup(row, workers=4):
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+            await asyncio.sleep(0.02)
+            state["running"] -= 1
+            return row
+
+        chain = Start() | (lambda: list(range(16))) | (DATA > lookup)
+        start_time = time.perf_counter()
+        self.assertEqual(asyncio.run(chain.acall()), list(range(16)))
+        elapsed = time.perf_counter() - start_time
+        self.assertEqual(state["peak"], 4)
+        # 串行需要0.32秒，4路并发约0.08秒
+        self.assertLess(elapsed, 0.25)
+
+    def test_join_fetches_overlap(self):
+        """测试连接右侧的各个切片并发获取"""
+
+        async def fetch(rows, stream_size=1):
+            await asyncio.sleep(0.05)
+            return get_score(rows)
+
+        chain = Start() | init_user | ((DATA & fetch) * join_score)
+        start_time = time.perf_counter()
+        result = asyncio.run(chain.acall())
+        elapsed = time.perf_counter() - start_time
+        self.assertEqual([row["score"] for row in result], [10, 20, 30, 40])
+        # 串行需要0.2秒
+        self.assertLess(elapsed, 0.15)
+
+    def test_async_exception(self):
+        """测试协程函数中的异常被包装为ProcessingError"""
+
+        async def broken(row):
+            if row["id"] == 3:
+                raise ValueError("坏数据")
+            return row
+
+        chain = Start() | init_user | (DATA > broken)
+        with self.assertRaises(ProcessingError) as context:
+            asyncio.run(chain.acall())
+        self.assertIn("单条处理函数执行失败", str(context.exception))
+        self.assertIn("坏数据", str(context.exception))
+
+    def test_async_stage_is_not_fused(self):
+        """测试协程函数的阶段不参与融合"""
+
+        async def double(x):
+            return x * 2
+
+        chain = (
+            Start()
+            | (lambda: [1, 2, 3])
+            | (DATA > double)
+            | (DATA - (lambda x: x > 2))
+            | (DATA > (lambda x: x + 1))
+        )
+        plan = chain.compile()
+        self.assertEqual(len(plan), 3)
+        self.assertTrue(plan.stages[1].is_async)
+        self.assertEqual(asyncio.run(plan.acall()), [5, 7])
+
+
+class TestForkPlan(unittest.TestCase):
+
+    def test_shared_prefix_runs_once(self):
+        """测试多个分支共享的前缀阶段只执行一次"""
+        calls = {"source": 0, "amount": 0}
+
+        def source():
+            calls["source"] += 1
+            return [{"amount": i * 10} for i in range(1, 6)]
+
+        def amount(row):
+            calls["amount"] += 1
+            return row["amount"]
+
+        sales = Start() | source
+        amounts = sales | (DATA > amount)
+        plan = sales.fork(
+            COUNT=COUNT, MAX=amounts | MAX, AVG=amounts | AVG, SUM=amounts | SUM
+        )
+        self.assertIsInstance(plan, ForkPlan)
+        result = plan()
+        self.assertEqual(result, {"COUNT": 5, "MAX": 50, "AVG": 30.0, "SUM": 150})
+        self.assertEqual(list(result), ["COUNT", "MAX", "AVG", "SUM"])
+        self.assertEqual(calls, {"source": 1, "amount": 5})
+
+    def test_tree_structure(self):
+        """测试没有分叉的路径被压缩为一个节点"""
+        amounts = Start() | init_user | (DATA > add_flag) | (DATA - is_flagged)
+        plan = amounts.fork(COUNT=COUNT, FIRST=FIRST, ROWS=amounts)
+        self.assertEqual(len(plan.roots), 1)
+        root = plan.roots[0]
+        self.assertEqual(root.names, ["ROWS"])
+        self.assertEqual(len(root.children), 2)
+        result = plan()
+        self.assertEqual(result["COUNT"], 2)
+        self.assertEqual(result["FIRST"], {"id": 2, "name": "Bob", "flag": True})
+        self.assertEqual(result["ROWS"], amounts())
+
+    def test_iterator_is_shared_between_branches(self):
+        """测试数据源返回迭代器时每个分支都能拿到完整数据"""
+        chain = Start() | (lambda: (i for i in range(1, 5)))
+        result = chain.fork(SUM=SUM, MAX=MAX, COUNT=COUNT)()
+        self.assertEqual(result, {"SUM": 10, "MAX": 4, "COUNT": 4})
+
+    def test_fork_acall(self):
+        """测试分支执行计划的异步执行"""
+
+        async def double(x):
+            return x * 2
+
+        doubled = Start() | (lambda: [1, 2, 3]) | (DATA > double)
+        result = asyncio.run(doubled.fork(SUM=SUM, LIST=LIST).acall())
+        self.assertEqual(result, {"SUM": 12, "LIST": [2, 4, 6]})
+
+    def test_invalid_branch(self):
+        """测试不支持的分支类型"""
+        with self.assertRaises(StrategyError):
+            (Start() | init_user).fork(COUNT=len)
+
+    def test_branch_exception(self):
+        """测试分支中的异常被包装为ProcessingError"""
+
+        def broken(rows):
+            raise ValueError("坏数据")
+
+        with self.assertRaises(ProcessingError) as context:
+            (Start() | init_user).fork(COUNT=COUNT, BAD=DATA >> broken)()
+        self.assertIn("坏数据", str(context.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,196 @@
+import bisect
+import os
+import pickle
+import random
+import subprocess
+import sys
+import unittest
+from collections import Counter
+from antchain import Start, DISTINCT, QUANTILES, HEAVY_HITTERS
+from antchain.sketch import CountMinSketch, HyperLogLog, KLLSketch
+from antchain.exceptions import ValidationError
+
+
+class TestHyperLogLog(unittest.TestCase):
+
+    def test_estimate_error(self):
+        """测试不同基数下的估计误差"""
+        for size in (0, 10, 1000, 50000, 300000):
+            with self.subTest(size=size):
+                sketch = HyperLogLog()
+                sketch.update(f"user-{i}" for i in range(size))
+                sketch.update(range(size))
+                self.assertLessEqual(abs(sketch.count() - size * 2), size * 2 * 0.03)
+
+    def test_merge_equals_union(self):
+        """测试合并的结果与添加到同一个HyperLogLog相同"""
+        left, right, union = HyperLogLog(10), HyperLogLog(10), HyperLogLog(10)
+        left.update(range(0, 6000))
+        right.update(range(4000, 10000))
+        union.update(range(0, 10000))
+        self.assertEqual(left.merge(right).count(), union.count())
+        with self.assertRaises(ValueError):
+            left.merge(HyperLogLog(12))
+        with self.assertRaises(ValueError):
+            HyperLogLog(3)
+
+    def test_hash_is_stable_across_processes(self):
+        """测试不同PYTHONHASHSEED的进程中得到的HyperLogLog可以合并"""
+        code = (
+            "import pickle, sys\n"
+            "from antchain.sketch import HyperLogLog\n"
+            "sketch = HyperLogLog(8)\n"
+            "sketch.update(['a', 'b', 'c', 1, 2, (3, 4)])\n"
+            "sys.stdout.buffer.write(pickle.dumps(sketch))\n"
+        )
+        env = dict(os.environ, PYTHONHASHSEED="12345")
+        output = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, env=env, check=True
+        ).stdout
+        local = HyperLogLog(8)
+        local.update(["a", "b", "c", 1, 2, (3, 4)])
+        remote = pickle.loads(output)
+        self.assertEqual(remote._registers, local._registers)
+
+
+class TestKLLSketch(unittest.TestCase):
+
+    def test_small_input_is_exact(self):
+        """测试数据条数较少时结果是精确的"""
+        sketch = KLLSketch()
+        sketch.update([5, 1, None, 4, 2, 3])
+        self.assertEqual(sketch.count, 5)
+        self.assertEqual(sketch.quantiles([0, 0.2, 0.5, 1]), [1, 1, 3, 5])
+        self.assertIsNone(KLLSketch().quantile(0.5))
+        with self.assertRaises(ValueError):
+            sketch.quantile(1.5)
+
+    def test_rank_error_and_merge(self):
+        """测试分批合并后的排名误差"""
+        rng = random.Random(3)
+        data = [rng.expovariate(1.0) for _ in range(100000)]
+        merged = KLLSketch(seed=1)
+        for start in range(0, len(data), 25000):
+            part = KLLSketch(seed=start)
+            part.update(data[start : start + 25000])
+            merged.merge(part)
+        ordered = sorted(data)
+        self.assertEqual(merged.count, len(data))
+        for q in (0.01, 0.5, 0.95, 0.99):
+            rank = bisect.bisect_left(ordered, merged.quantile(q)) / len(data)
+            self.assertLess(abs(rank - q), 0.02)
+        self.assertLess(sum(len(level) for level in merged._levels), 2000)
+        with self.assertRaises(ValueError):
+            merged.merge(KLLSketch(k=100))
+
+
+class TestCountMinSketch(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(9)
+        self.values = [f"page-{rng.randrange(5)}" for _ in range(5000)]
+        self.values += [f"tail-{rng.randrange(20000)}" for _ in range(50000)]
+        rng.shuffle(self.values)
+
+    def test_heavy_hitters(self):
+        """测试热点值以及估计频率不小于真实频率"""
+        sketch = CountMinSketch(top=5)
+        sketch.update(self.values)
+        counts = Counter(self.values)
+        hitters = sketch.heavy_hitters()
+        self.assertEqual(
+            {value for value, _ in hitters}, {f"page-{i}" for i in range(5)}
+        )
+        for value, estimate in hitters:
+            self.assertGreaterEqual(estimate, counts[value])
+            self.assertLessEqual(estimate, counts[value] + len(self.values) * 0.01)
+        self.assertEqual(sketch.total, len(self.values))
+
+    def test_merge(self):
+        """测试分批合并与一次添加的结果相同"""
+        whole = CountMinSketch(top=5)
+        whole.update(self.values)
+        merged = CountMinSketch(top=5)
+        for start in range(0, len(self.values), 10000):
+            part = CountMinSketch(top=5)
+            part.update(self.values[start : start + 10000])
+            merged.merge(pickle.loads(pickle.dumps(part)))
+        self.assertEqual(merged._table, whole._table)
+        self.assertEqual(merged.heavy_hitters(), whole.heavy_hitters())
+        with self.assertRaises(ValueError):
+            merged.merge(CountMinSketch(width=10))
+
+    def test_unhashable_values(self):
+        """测试字典、列表等不可哈希的值按repr计数并可以合并"""
+        values = [{"page": 1}] * 30 + [[1, 2]] * 20 + [{"page": i} for i in range(50)]
+        sketch = CountMinSketch(top=2)
+        sketch.update(values)
+        sketch.add({"page": 1}, 5)
+        self.assertEqual(sketch.heavy_hitters(), [({"page": 1}, 36), ([1, 2], 20)])
+        other = CountMinSketch(top=2)
+        other.update([[1, 2]] * 30)
+        copied = pickle.loads(pickle.dumps(sketch))
+        self.assertEqual(copied.heavy_hitters(), sketch.heavy_hitters())
+        self.assertEqual(
+            sketch.merge(other).heavy_hitters(), [([1, 2], 50), ({"page": 1}, 36)]
+        )
+
+
+class TestSketchCollectors(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(1)
+        self.events = [
+            {"user": rng.randrange(3000), "latency": rng.randrange(1, 1000)}
+            for _ in range(20000)
+        ]
+
+    def run_both(self, element):
+        eager = (Start() | (lambda: self.events) | element)()
+        streamed = (Start() | (lambda: iter(self.events)) | element).stream()
+        return eager, streamed
+
+    def test_distinct(self):
+        """测试DISTINCT近似去重计数"""
+        eager, streamed = self.run_both(DISTINCT("user"))
+        exact = len({event["user"] for event in self.events})
+        self.assertEqual(eager, streamed)
+        self.assertLessEqual(abs(eager - exact), exact * 0.03)
+
+    def test_quantiles(self):
+        """测试QUANTILES的结果与精确分位数接近"""
+        eager, streamed = self.run_both(QUANTILES((0.5, 0.99), key="latency"))
+        self.assertEqual(list(eager), [0.5, 0.99])
+        ordered = sorted(event["latency"] for event in self.events)
+        for q, value in streamed.items():
+            rank = bisect.bisect_left(ordered, value) / len(ordered)
+            self.assertLess(abs(rank - q), 0.02)
+
+    def test_heavy_hitters_and_sketch_output(self):
+        """测试HEAVY_HITTERS以及sketch=True时返回可合并的数据结构"""
+        events = self.events + [{"user": -1, "latency": 1}] * 500
+        hitters = (Start() | (lambda: events) | HEAVY_HITTERS(1, "user"))()
+        self.assertEqual(hitters[0][0], -1)
+        first = (Start() | (lambda: events) | DISTINCT("user", sketch=True))()
+        second = (Start() | (lambda: events) | DISTINCT("user", sketch=True))()
+        self.assertIsInstance(first, HyperLogLog)
+        self.assertEqual(first.merge(second).count(), second.count())
+        rows = [{"page": 1}] * 5 + [{"page": 2}]
+        self.assertEqual(
+            (Start() | (lambda: rows) | HEAVY_HITTERS(1))(), [({"page": 1}, 5)]
+        )
+
+    def test_invalid_arguments(self):
+        """测试不合法的参数在构建时报错"""
+        with self.assertRaises(ValidationError):
+            DISTINCT(precision=30)
+        with self.assertRaises(ValidationError):
+            QUANTILES((0.5, 2))
+        with self.assertRaises(ValidationError):
+            QUANTILES(k=2)
+        with self.assertRaises(ValidationError):
+            HEAVY_HITTERS(0)
+
+
+if __name__ == "__main__":
+    unittest.main()
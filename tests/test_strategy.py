@@ -48,6 +48,16 @@ class TestStrategyFactory(unittest.TestCase):
         result = StrategyFactory.process(element)
         self.assertEqual(result, [{"id": 1}])
 
+    def test_process_with_explicit_left_data(self):
+        """测试通过参数传入左侧数据，不修改Element"""
+        element = Element(element_type="one", right_func=lambda x: x * 2)
+        self.assertEqual(StrategyFactory.process(element, [1, 2]), [2, 4])
+        self.assertIsNone(element.left_data)
+        # 未传入左侧数据时使用创建Element时的left_data
+        element = Element(element_type="one", right_func=lambda x: x * 2, left_data=[3])
+        self.assertEqual(StrategyFactory.process(element), [6])
+        self.assertEqual(StrategyFactory.process(element, 5), [10])
+
     def test_init_processor_no_func(self):
         """测试初始化处理器无函数异常"""
         element = Element(element_type="init")
@@ -477,6 +487,45 @@ class TestStrategyFactory(unittest.TestCase):
         self.assertEqual(result[0]["id"], 1)
         self.assertEqual(result[0]["value"], 100)
 
+    def test_all_join_processor_unmatched_right_rows(self):
+        """测试全连接只为右侧建一次索引，没有匹配的右侧数据按原顺序追加一次"""
+        right_rows = [
+            {"user_id": 3, "tag": "c"},
+            {"user_id": 1, "tag": "a1"},
+            {"user_id": 1, "tag": "a2"},
+            {"user_id": 4, "tag": "d"},
+            {"user_id": 3, "tag": "c2"},
+        ]
+
+        def right_func(rows):
+            return right_rows
+
+        right_keys = []
+
+        def right_key(row):
+            right_keys.append(row["user_id"])
+            return row["user_id"]
+
+        def join_func(
+            left_key=lambda x: x["id"],
+            right_key=right_key,
+            left_property=None,
+            one_to_many=True,
+        ):
+            pass
+
+        element = Element(
+            element_type="all_join", right_func=right_func, join_func=join_func
+        )
+        left_data = [{"id": 1}, {"id": 2}, {"id": 1}]
+        factory = StrategyFactory()
+        result = factory.all_join(element, left_data)
+        self.assertEqual(len(right_keys), len(right_rows))
+        self.assertEqual(
+            [row.get("tag") for row in result],
+            ["a1", "a2", None, "a1", "a2", "c", "c2", "d"],
+        )
+
     def test_all_join_processor_empty_right_data(self):
         """测试全连接处理器处理空右侧数据"""
 
@@ -1,3 +1,5 @@
+import threading
+import time
 import unittest
 from antchain.stream import (
     Stream,
@@ -27,7 +29,16 @@ from antchain.stream import (
     MIN,
     SUM,
     AVG,
+    AGG,
+    REVERSE,
+    SORT,
+    TOPK,
+    UNIQUE,
+    collect_aggregates,
+    collect_topk,
+    collect_unique,
 )
+from antchain.exceptions import ElementError, ValidationError
 
 
 class TestStream(unittest.TestCase):
@@ -59,6 +70,30 @@ class TestStream(unittest.TestCase):
         # 验证返回的是不同的对象
         self.assertNotEqual(id(stream1), id(stream2))
 
+    def test_branches_share_prefix(self):
+        """测试从同一条链延伸出的多条链共享公共前缀，且互不影响"""
+        stream = Stream("init", Element())
+        base = stream | Element() | Element()
+        left_element = Element()
+        right_element = Element()
+        left = base | left_element
+        right = base | right_element
+        self.assertEqual(len(base), 3)
+        self.assertEqual(len(left), 4)
+        self.assertIs(left._tail[1], base._tail)
+        self.assertIs(right._tail[1], base._tail)
+        self.assertEqual(left.child_nodes[-1].element, left_element)
+        self.assertEqual(right.child_nodes[-1].element, right_element)
+        self.assertEqual(len(base.child_nodes), 2)
+
+    def test_long_chain_building(self):
+        """测试构建很长的链时每次|都是O(1)"""
+        chain = Start() | (lambda: 0)
+        for _ in range(5000):
+            chain = chain | (DATA > (lambda x: x + 1))
+        self.assertEqual(len(chain), 5001)
+        self.assertEqual(chain(), [5000])
+
     def test_collect_functions(self):
         """测试收集函数"""
         # 测试collect_list
@@ -238,6 +273,23 @@ class TestStream(unittest.TestCase):
         result = collect_avg(data)
         self.assertEqual(result, 0.0)
 
+    def test_collect_functions_with_iterator(self):
+        """测试收集函数直接消费迭代器"""
+        self.assertEqual(collect_list(iter([1, 2])), [1, 2])
+        self.assertEqual(collect_set(iter([1, 1, 2])), {1, 2})
+        self.assertEqual(collect_count(iter([1, 2, 3])), 3)
+        self.assertEqual(collect_tuple(iter([1, 2])), (1, 2))
+        self.assertEqual(collect_first(iter([4, 5])), 4)
+        self.assertIsNone(collect_first(iter([])))
+        self.assertEqual(collect_last(iter([4, 5])), 5)
+        self.assertIsNone(collect_last(iter([])))
+        self.assertEqual(collect_max(iter([4, 9, 5])), 9)
+        self.assertEqual(collect_min(iter([4, 9, 5])), 4)
+        self.assertIsNone(collect_max(iter([])))
+        self.assertEqual(collect_sum(iter([1, 2, 3])), 6)
+        self.assertEqual(collect_avg(iter([1, 2, 3])), 2.0)
+        self.assertEqual(collect_avg(iter([])), 0.0)
+
     def test_builtin_operators(self):
         """测试内置操作符"""
         # 测试DATA元素类型
@@ -306,6 +358,235 @@ class TestStream(unittest.TestCase):
         self.assertEqual(stream.element.element_type, "init")
         self.assertEqual(stream.element.right_func, test_func)
 
+    def test_stream_is_immutable(self):
+        """测试Stream创建后不可修改"""
+        stream = Start() | (lambda: [1])
+        with self.assertRaises(ElementError):
+            stream.element = Element()
+
+    def test_shared_chain_across_threads(self):
+        """测试同一条链被多个线程同时执行时数据不会串"""
+        local = threading.local()
+
+        def source():
+            return [local.value] * 5
+
+        def slow(row):
+            time.sleep(0.001)
+            return row
+
+        chain = Start() | source | (DATA > slow) | (DATA >> (lambda rows: rows)) | SET
+        plan = chain.compile()
+        errors = []
+
+        def worker(value):
+            local.value = value
+            for run in (chain, plan):
+                for _ in range(5):
+                    result = run()
+                    if result != {value}:
+                        errors.append((value, result))
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+
+class TestAggregate(unittest.TestCase):
+
+    def setUp(self):
+        self.orders = [
+            {"amount": 10, "qty": 1, "city": "b"},
+            {"amount": 30, "qty": None, "city": "a"},
+            {"amount": 20, "qty": 5, "city": "c"},
+        ]
+
+    def test_same_as_separate_collectors(self):
+        """测试AGG的结果与分别执行各个收集器一致"""
+        amounts = [row["amount"] for row in self.orders]
+        result = collect_aggregates(
+            self.orders,
+            {
+                "count": True,
+                "sum": "amount",
+                "min": "amount",
+                "max": "amount",
+                "avg": "amount",
+            },
+        )
+        self.assertEqual(
+            result,
+            {
+                "count": collect_count(amounts),
+                "sum": collect_sum(amounts),
+                "min": collect_min(amounts),
+                "max": collect_max(amounts),
+                "avg": collect_avg(amounts),
+            },
+        )
+
+    def test_multiple_chunks(self):
+        """测试数据超过一个块时列表和迭代器的结果一致"""
+        values = [(i * 37) % 1001 - 500 for i in range(2500)]
+        expected = {
+            "count": 2500,
+            "sum": sum(values),
+            "min": min(values),
+            "max": max(values),
+            "avg": sum(values) / 2500,
+        }
+        specs = {name: True for name in expected}
+        self.assertEqual(collect_aggregates(values, specs), expected)
+        self.assertEqual(collect_aggregates(iter(values), specs), expected)
+
+    def test_multiple_fields_and_none(self):
+        """测试多个字段、键函数以及None值的处理"""
+        result = collect_aggregates(
+            self.orders,
+            {
+                "count": {"rows": True, "qty": "qty"},
+                "avg": {"amount": "amount", "qty": "qty"},
+                "min": lambda row: row["city"],
+                "max": {"city": "city", "double": lambda row: row["amount"] * 2},
+            },
+        )
+        self.assertEqual(result["count"], {"rows": 3, "qty": 2})
+        self.assertEqual(result["avg"], {"amount": 20.0, "qty": 3.0})
+        self.assertEqual(result["min"], "a")
+        self.assertEqual(result["max"], {"city": "c", "double": 60})
+
+    def test_empty_and_scalar(self):
+        """测试空数据和单个数据"""
+        empty = {"count": 0, "sum": 0, "min": None, "max": None, "avg": 0.0}
+        specs = {name: True for name in empty}
+        self.assertEqual(collect_aggregates([], specs), empty)
+        self.assertEqual(collect_aggregates(None, specs), empty)
+        self.assertEqual(
+            collect_aggregates(4, specs),
+            {"count": 1, "sum": 4, "min": 4, "max": 4, "avg": 4.0},
+        )
+
+    def test_single_pass_in_stream_mode(self):
+        """测试流式执行时只遍历一次上游数据"""
+        pulled = []
+
+        def source():
+            for row in self.orders:
+                pulled.append(row)
+                yield row
+
+        chain = Start() | source | AGG(count=True, sum="amount", max="qty")
+        expected = {"count": 3, "sum": 60, "max": 5}
+        self.assertEqual(chain.stream(), expected)
+        self.assertEqual(len(pulled), 3)
+        self.assertEqual(
+            (
+                Start()
+                | (lambda: self.orders)
+                | AGG(count=True, sum="amount", max="qty")
+            )(),
+            expected,
+        )
+
+    def test_invalid_aggregates(self):
+        """测试不支持的聚合和字段在构建时报错"""
+        with self.assertRaises(ValidationError):
+            AGG()
+        with self.assertRaises(ValidationError):
+            AGG(median="amount")
+        with self.assertRaises(ValidationError):
+            AGG(sum=1)
+
+
+class TestOrderingCollectors(unittest.TestCase):
+
+    def setUp(self):
+        self.rows = [{"id": i % 7, "score": (i * 37) % 11, "seq": i} for i in range(50)]
+
+    def run_both(self, element):
+        eager = (Start() | (lambda: self.rows) | element)()
+        streamed = (Start() | (lambda: iter(self.rows)) | element).stream()
+        self.assertEqual(eager, streamed)
+        return eager
+
+    def test_topk_same_as_sorted(self):
+        """测试TOPK与排序后取前n条一致，相同分数保持原有顺序"""
+        for n in (0, 1, 5, 50, 80):
+            for reverse in (True, False):
+                with self.subTest(n=n, reverse=reverse):
+                    expected = sorted(
+                        self.rows, key=lambda row: row["score"], reverse=reverse
+                    )[:n]
+                    self.assertEqual(
+                        self.run_both(TOPK(n, "score", reverse=reverse)), expected
+                    )
+        self.assertEqual(collect_topk(iter([3, 1, 2]), 2), [3, 2])
+        self.assertEqual(collect_topk(None, 2), [])
+
+    def test_topk_keeps_only_n_rows(self):
+        """测试流式执行时TOPK直接消费迭代器"""
+        pulled = []
+
+        def source():
+            for i in range(1000):
+                pulled.append(i)
+                yield {"score": i % 97}
+
+        result = (Start() | source | TOPK(3, lambda row: row["score"])).stream()
+        self.assertEqual([row["score"] for row in result], [96, 96, 96])
+        self.assertEqual(len(pulled), 1000)
+
+    def test_unique_keeps_first_occurrence(self):
+        """测试UNIQUE按首次出现的顺序保留数据"""
+        result = self.run_both(UNIQUE("id"))
+        self.assertEqual([row["seq"] for row in result], list(range(7)))
+        self.assertEqual(collect_unique([3, 1, 3, 2, 1]), [3, 1, 2])
+        by_pair = self.run_both(UNIQUE(("id", "score")))
+        self.assertEqual(
+            len(by_pair), len({(row["id"], row["score"]) for row in self.rows})
+        )
+
+    def test_unique_dict_rows_without_key(self):
+        """测试不传key时字典等不可哈希的数据按内容去重"""
+        rows = [
+            {"a": 1, "tags": ["x"]},
+            {"a": 1, "tags": ["x"]},
+            {"tags": ["x"], "a": 1},
+            {"a": 1, "tags": ["y"]},
+            {"a": 2},
+        ]
+        expected = [rows[0], rows[3], rows[4]]
+        self.assertEqual((Start() | (lambda: rows) | UNIQUE())(), expected)
+        streamed = (Start() | (lambda: iter(rows)) | UNIQUE()).stream()
+        self.assertEqual(streamed, expected)
+        mixed = [1, [1], (1,), [1], {"a": 1}, 1]
+        self.assertEqual(collect_unique(mixed), [1, [1], (1,), {"a": 1}])
+        by_tags = collect_unique(rows, key=lambda row: row.get("tags"))
+        self.assertEqual(by_tags, [rows[0], rows[3], rows[4]])
+
+    def test_sort_and_reverse(self):
+        """测试SORT和REVERSE"""
+        result = self.run_both(SORT("score", reverse=True))
+        self.assertEqual(
+            result, sorted(self.rows, key=lambda row: row["score"], reverse=True)
+        )
+        self.assertEqual(self.run_both(REVERSE), self.rows[::-1])
+        numbers = (Start() | (lambda: [3, 1, 2]) | SORT())()
+        self.assertEqual(numbers, [1, 2, 3])
+
+    def test_invalid_arguments(self):
+        """测试不合法的参数在构建时报错"""
+        for n in (-1, 1.5, True):
+            with self.assertRaises(ValidationError):
+                TOPK(n)
+        with self.assertRaises(ValidationError):
+            SORT(1)
+        with self.assertRaises(ValidationError):
+            UNIQUE(1)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,8 +1,16 @@
+import inspect
+import threading
+import time
 import unittest
+from unittest import mock
 from antchain.utils import (
     get_function_args_count,
     get_stream_size,
+    get_default_values,
+    get_join_condition,
     batch_process_data,
+    iter_batches,
+    iter_key_batches,
     get_function_return_type,
     mapping,
     group_by,
@@ -73,6 +81,87 @@ class TestUtils(unittest.TestCase):
         expected = [2, 4, 6, 8, 10, 12, 14, 16, 18, 20]
         self.assertEqual(result, expected)
 
+    def test_batch_process_data_concurrency(self):
+        """测试stream_concurrency并发调用切片且结果按顺序拼接"""
+        lock = threading.Lock()
+        state = {"running": 0, "peak": 0}
+
+        def remote_lookup(items, stream_size=2, stream_concurrency=4):
+            with lock:
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+            # 越靠前的切片越慢，验证结果仍按切片顺序拼接
+            time.sleep(0.005 * (10 - items[0]) / 2)
+            with lock:
+                state["running"] -= 1
+            return [x * 10 for x in items]
+
+        data = list(range(10))
+        result = batch_process_data(data, remote_lookup)
+        self.assertEqual(result, [x * 10 for x in data])
+        self.assertGreater(state["peak"], 1)
+        self.assertLessEqual(state["peak"], 4)
+
+        # 预先解析的参数优先于函数签名
+        state["peak"] = 0
+        result = batch_process_data(data, remote_lookup, concurrency=1)
+        self.assertEqual(result, [x * 10 for x in data])
+        self.assertEqual(state["peak"], 1)
+
+    def test_get_default_values(self):
+        """测试一次性获取所有默认参数"""
+
+        def func(items, stream_size=3, stream_concurrency=2):
+            pass
+
+        self.assertEqual(
+            get_default_values(func), {"stream_size": 3, "stream_concurrency": 2}
+        )
+
+    def test_default_values_follow_reassigned_defaults(self):
+        """测试给__defaults__和__kwdefaults__重新赋值后读取到新的默认值"""
+
+        def func(items, stream_size=3, *, workers=2):
+            pass
+
+        self.assertEqual(get_stream_size(func), 3)
+        func.__defaults__ = (5,)
+        self.assertEqual(get_stream_size(func), 5)
+        self.assertEqual(get_default_values(func)["workers"], 2)
+        func.__kwdefaults__ = {"workers": 4}
+        self.assertEqual(get_default_values(func), {"stream_size": 5, "workers": 4})
+
+    def test_get_join_condition_is_cached(self):
+        """测试重复获取连接条件时不会再次读取函数签名"""
+
+        def join_func(left_key=lambda x: x["id"], right_key=None, left_property="info"):
+            pass
+
+        left_key, right_key, left_property, one_to_many = get_join_condition(join_func)
+        self.assertEqual(left_key({"id": 1}), 1)
+        self.assertIsNone(right_key)
+        self.assertEqual(left_property, "info")
+        self.assertIsNone(one_to_many)
+        with mock.patch.object(inspect, "signature") as signature:
+            self.assertEqual(get_join_condition(join_func)[2], "info")
+        signature.assert_not_called()
+        join_func.__defaults__ = (left_key, None, "detail")
+        self.assertEqual(get_join_condition(join_func)[2], "detail")
+
+    def test_iter_batches(self):
+        """测试按批次切分迭代器"""
+        self.assertEqual(list(iter_batches(iter(range(5)), 2)), [[0, 1], [2, 3], [4]])
+        self.assertEqual(list(iter_batches([], 2)), [])
+
+    def test_iter_key_batches(self):
+        """测试按批次切分已排序数据时不拆分键相同的连续行"""
+        rows = [1, 1, 2, 2, 2, 3, 4]
+        self.assertEqual(
+            list(iter_key_batches(iter(rows), lambda x: x, 2)),
+            [[1, 1], [2, 2, 2], [3, 4]],
+        )
+        self.assertEqual(list(iter_key_batches([], lambda x: x, 2)), [])
+
     def test_get_function_return_type(self):
         """测试获取函数返回类型"""
         self.assertEqual(get_function_return_type(sample_func_with_return_type), list)